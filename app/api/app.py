@@ -1,10 +1,17 @@
+import asyncio
+import json
+import re
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from loguru import logger
 
-from app.engine.extractor import run_extraction
 from app.engine.models_registry import ModelsRegistry
+from app.engine.profiling import PROFILE_MODES, profiling_active, resolve_profile_mode
+from app.engine.run_manager import RunManager
+from src import metrics
 from src.odoo_extractor.odoo_client import OdooClient
 
 
@@ -14,6 +21,11 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Execuções rodam em threads próprias; o event loop só enfileira e consulta.
+run_manager = RunManager()
+_SSE_POLL_SECONDS = 0.5
+_QUEUE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
 
 # ----------------------------------------------------------------------
 # Health
@@ -23,6 +35,15 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Métricas no formato texto do Prometheus.
+    """
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 # ----------------------------------------------------------------------
 # Models registry endpoints
 # ----------------------------------------------------------------------
@@ -107,14 +128,31 @@ def _select_models(prefix: Optional[str]) -> List[str]:
     return all_models
 
 
-def _run_etl(
+async def _run_etl(
     *,
+    kind: str,
     prefix: Optional[str],
     fields: Optional[List[str]],
     limit: Optional[int],
     incremental: bool,
-) -> dict:
-    models = _select_models(prefix)
+    wait: bool,
+    queue: Optional[str] = None,
+    profile: Optional[str] = None,
+):
+    if queue and not _QUEUE_ID_PATTERN.match(queue):
+        raise HTTPException(status_code=400, detail="queue deve conter apenas [A-Za-z0-9_.-]")
+    if profile and profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail="profile deve ser run ou model")
+    try:
+        profile_mode = resolve_profile_mode(profile)
+    except ValueError as exc:
+        # ETL_PROFILE inválido: falha aqui em vez de em cada execução.
+        raise HTTPException(status_code=500, detail=str(exc))
+    # tracemalloc/cProfile são globais ao processo: uma execução perfilada por vez.
+    if profile_mode and profiling_active():
+        raise HTTPException(status_code=409, detail="Já existe uma execução com profiling ativa")
+
+    models = await run_in_threadpool(_select_models, prefix)
 
     if not models:
         return {
@@ -123,17 +161,35 @@ def _run_etl(
             "results": [],
         }
 
-    try:
-        return run_extraction(
-            models=models,
-            fields=fields,
-            limit=limit,
-            batch_size=2000,
-            incremental=incremental,
+    # Com `queue`, réplicas chamadas com o mesmo id dividem os models via leases.
+    record = run_manager.submit(
+        kind=kind,
+        models=models,
+        queue=queue,
+        fields=fields,
+        limit=limit,
+        batch_size=2000,
+        incremental=incremental,
+        profile=profile,
+    )
+
+    if not wait:
+        return JSONResponse(
+            status_code=202,
+            content={
+                "run_id": record.run_id,
+                "status": record.status,
+                "status_url": f"/runs/{record.run_id}",
+                "events_url": f"/runs/{record.run_id}/events",
+            },
         )
-    except Exception as e:
-        logger.error(f"💥 Falha na execução do ETL via API: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    # Compatibilidade: aguarda sem bloquear o event loop e devolve o resumo.
+    await asyncio.wrap_future(record.future)
+    if record.status == "error":
+        logger.error(f"💥 Falha na execução do ETL via API: {record.error}")
+        raise HTTPException(status_code=500, detail=record.error)
+    return {"run_id": record.run_id, **record.summary}
 
 
 # ----------------------------------------------------------------------
@@ -144,16 +200,23 @@ async def run_incremental(
     prefix: Optional[str] = None,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = None,
+    wait: bool = False,
+    queue: Optional[str] = None,
+    profile: Optional[str] = None,
 ):
     """
     Executa extração incremental (append) usando cursor persistido.
     """
 
-    return _run_etl(
+    return await _run_etl(
+        kind="inc",
         prefix=prefix,
         fields=fields,
         limit=limit,
         incremental=True,
+        wait=wait,
+        queue=queue,
+        profile=profile,
     )
 
 
@@ -162,16 +225,23 @@ async def run_full(
     prefix: Optional[str] = None,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = None,
+    wait: bool = False,
+    queue: Optional[str] = None,
+    profile: Optional[str] = None,
 ):
     """
     Executa extração full refresh ignorando cursores incrementais.
     """
 
-    return _run_etl(
+    return await _run_etl(
+        kind="full",
         prefix=prefix,
         fields=fields,
         limit=limit,
         incremental=False,
+        wait=wait,
+        queue=queue,
+        profile=profile,
     )
 
 
@@ -180,13 +250,86 @@ async def run_etl(
     prefix: Optional[str] = None,
     fields: Optional[List[str]] = None,
     limit: Optional[int] = None,
+    wait: bool = True,
+    queue: Optional[str] = None,
+    profile: Optional[str] = None,
 ):
     """
     Endpoint legada — mantém comportamento incremental por compatibilidade.
+
+    Por padrão aguarda o fim e devolve o resumo, como antes; `wait=false`
+    segue o contrato assíncrono de `/run/inc` (202 com `run_id`).
     """
-    return _run_etl(
+    return await _run_etl(
+        kind="inc",
         prefix=prefix,
         fields=fields,
         limit=limit,
         incremental=True,
+        wait=wait,
+        queue=queue,
+        profile=profile,
+    )
+
+
+# ----------------------------------------------------------------------
+# Run status endpoints
+# ----------------------------------------------------------------------
+def _get_run(run_id: str):
+    record = run_manager.get(run_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Execução {run_id} não encontrada")
+    return record
+
+
+@app.get("/runs")
+async def list_runs():
+    """
+    Lista as execuções mantidas em memória (mais recentes primeiro).
+    """
+    runs = [record.to_dict() for record in run_manager.list()]
+    for run in runs:
+        run.pop("summary", None)
+    return {"runs": runs}
+
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    """
+    Retorna status, progresso e, ao final, o resumo da execução.
+    """
+    return _get_run(run_id).to_dict()
+
+
+@app.get("/runs/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request):
+    """
+    Stream SSE com o progresso por model até o fim da execução.
+
+    Aceita o header `Last-Event-ID` para retomar após reconexão.
+    """
+    record = _get_run(run_id)
+    last_event_id = request.headers.get("last-event-id")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        seq = start
+        while True:
+            for event in record.events_since(seq):
+                seq = event["seq"] + 1
+                yield (
+                    f"id: {event['seq']}\n"
+                    f"event: {event['event']}\n"
+                    f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+                )
+                if event["event"] == "run_finished":
+                    return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(_SSE_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
     )
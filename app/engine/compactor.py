@@ -0,0 +1,229 @@
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import polars as pl
+from loguru import logger
+
+from app.engine.run_pointer import RunPointerStore, pointer_files, pointer_timestamps
+from src.storage import (
+    build_object_uri,
+    collect_old_runs,
+    list_model_parquet_uris,
+    list_relation_datasets,
+    resolve_writer_profile,
+)
+
+# Coluna opcional marcando registros removidos no Odoo.
+_TOMBSTONE_COLUMN = "__deleted"
+_ORDER_COLUMNS = ("write_date", "ingestion_ts")
+_ORDER_KEY = "__order_key"
+
+
+class CompactionResult:
+    """Resultado da compactação de um único model."""
+
+    def __init__(
+        self,
+        model: str,
+        status: str,
+        source_files: int = 0,
+        file_path: Optional[str] = None,
+        link_paths: Optional[Dict[str, str]] = None,
+        error: Optional[str] = None,
+    ):
+        self.model = model
+        self.status = status
+        self.source_files = source_files
+        self.file_path = file_path
+        self.link_paths = link_paths or {}
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "status": self.status,
+            "source_files": self.source_files,
+            "file_path": self.file_path,
+            "link_paths": self.link_paths,
+            "error": self.error,
+        }
+
+
+def _snapshot_dataset_name(model: str) -> str:
+    """Dataset que guarda o snapshot compactado do model."""
+    return f"{model}__snapshot"
+
+
+def build_current_state(sources: List[str]) -> pl.LazyFrame:
+    """
+    Monta (lazy) o estado atual: a linha mais recente por `id`.
+
+    A ordem é `(write_date, ingestion_ts)`. Primeiro calcula-se a chave máxima
+    por id numa projeção estreita; depois as linhas completas são filtradas
+    por join. Assim o estado do group_by guarda só `id` + chave, e não as
+    linhas largas, mantendo a memória limitada no engine de streaming.
+    """
+    lf = pl.concat(
+        [pl.scan_parquet(source) for source in sources],
+        how="diagonal_relaxed",
+    )
+    schema = lf.collect_schema()
+
+    order_columns = [column for column in _ORDER_COLUMNS if column in schema]
+    order_key = pl.concat_str(
+        [pl.col(column).cast(pl.Utf8).fill_null("") for column in order_columns],
+        separator="|",
+    ).alias(_ORDER_KEY)
+
+    keyed = lf.with_columns(order_key)
+    latest = (
+        keyed.select("id", _ORDER_KEY)
+        .group_by("id")
+        .agg(pl.col(_ORDER_KEY).max())
+    )
+    current = (
+        keyed.join(latest, on=["id", _ORDER_KEY], how="inner")
+        .unique(subset=["id"], keep="any")
+        .drop(_ORDER_KEY)
+    )
+
+    if _TOMBSTONE_COLUMN in schema:
+        deleted = (
+            pl.col(_TOMBSTONE_COLUMN)
+            .cast(pl.Utf8)
+            .str.to_lowercase()
+            .is_in(["1", "true"])
+            .fill_null(False)
+        )
+        current = current.filter(~deleted).drop(_TOMBSTONE_COLUMN)
+
+    return current
+
+
+def build_current_links(sources: List[str]) -> pl.LazyFrame:
+    """
+    Monta (lazy) os vínculos atuais de um dataset x2many `(id, related_id)`.
+
+    O conjunto de vínculos de cada `id` vem inteiro da escrita mais recente
+    (`ingestion_ts`) que o contém: um incremental substitui os vínculos
+    anteriores do registro, e a linha marcadora `(id, null)` de uma relação
+    esvaziada retira todos eles.
+    """
+    lf = pl.concat(
+        [pl.scan_parquet(source) for source in sources],
+        how="diagonal_relaxed",
+    )
+    latest = lf.select("id", "ingestion_ts").group_by("id").agg(pl.col("ingestion_ts").max())
+    return (
+        lf.join(latest, on=["id", "ingestion_ts"], how="inner")
+        .filter(pl.col("related_id").is_not_null())
+        .unique(subset=["id", "related_id"], keep="any")
+    )
+
+
+def _source_files(pointer_store: RunPointerStore, model: str) -> List[str]:
+    """Arquivos do `_CURRENT` (base full + incrementais); sem base, lista a pasta."""
+    pointer = pointer_store.load(model)
+    if pointer and pointer.get("base"):
+        return pointer_files(pointer)
+    return list_model_parquet_uris(model)
+
+
+def _compact_dataset(
+    pointer_store: RunPointerStore,
+    dataset: str,
+    build: Callable[[List[str]], pl.LazyFrame],
+    *,
+    model: str,
+) -> Tuple[Optional[str], int]:
+    """Grava e publica o snapshot de um dataset; (None, 0) se não há arquivos."""
+    sources = _source_files(pointer_store, dataset)
+    if not sources:
+        return None, 0
+
+    timestamp_str = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    snapshot = _snapshot_dataset_name(dataset)
+    target = build_object_uri(snapshot, timestamp_str)
+    profile = resolve_writer_profile(model)
+
+    build(sources).sink_parquet(
+        target,
+        engine="streaming",
+        **profile.write_options(),
+    )
+    pointer = pointer_store.publish(
+        snapshot,
+        run_timestamp=timestamp_str,
+        mode="full",
+        files=[target],
+    )
+    collect_old_runs(
+        snapshot,
+        keep_timestamps=pointer_timestamps(pointer),
+        min_timestamp=timestamp_str,
+    )
+    return target, len(sources)
+
+
+def run_compaction(*, models: List[str]) -> Dict[str, Any]:
+    """
+    Gera um snapshot deduplicado por model a partir dos chunks full + incrementais.
+
+    O snapshot é gravado em `<model>__snapshot/<timestamp>.parquet` via
+    `sink_parquet` (streaming) e publicado no `_CURRENT` do dataset de snapshot.
+    Os datasets de vínculos x2many (`<model>__<campo>`) ganham o próprio
+    snapshot em `<model>__<campo>__snapshot/`.
+    """
+
+    logger.info("🗜️ Compactação iniciada")
+    pointer_store = RunPointerStore()
+    results: List[CompactionResult] = []
+
+    for model in models:
+        try:
+            target, source_files = _compact_dataset(
+                pointer_store, model, build_current_state, model=model
+            )
+            if target is None:
+                logger.warning(f"⚠️ Nenhum parquet para compactar em {model}")
+                results.append(CompactionResult(model=model, status="empty"))
+                continue
+
+            link_paths: Dict[str, str] = {}
+            for dataset in list_relation_datasets(model):
+                link_target, _ = _compact_dataset(
+                    pointer_store, dataset, build_current_links, model=model
+                )
+                if link_target:
+                    link_paths[dataset.rsplit("__", 1)[-1]] = link_target
+
+            logger.success(f"✅ {model}: snapshot de {source_files} arquivos em {target}")
+            results.append(
+                CompactionResult(
+                    model=model,
+                    status="success",
+                    source_files=source_files,
+                    file_path=target,
+                    link_paths=link_paths,
+                )
+            )
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao compactar {model}: {e}")
+            results.append(CompactionResult(model=model, status="error", error=str(e)))
+
+    summary = {
+        "total_models": len(models),
+        "successful": sum(r.status == "success" for r in results),
+        "empty": sum(r.status == "empty" for r in results),
+        "failed": sum(r.status == "error" for r in results),
+        "results": [r.to_dict() for r in results],
+    }
+
+    logger.success(
+        "🏁 Compactação finalizada — "
+        f"sucesso={summary['successful']}, "
+        f"vazios={summary['empty']}, "
+        f"erros={summary['failed']}"
+    )
+    return summary
@@ -1,20 +1,57 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sized, Tuple
 
 import polars as pl
 from loguru import logger
 
+from app.engine import profiling
 from app.engine.cursor_store import CursorStore
+from app.engine.run_history import (
+    StageTimer,
+    build_history_record,
+    history_dataframe,
+    timed_iter,
+)
+from app.engine.run_pointer import RunPointerStore, needs_full_refresh, pointer_timestamps
+from app.engine.work_queue import LeaseQueue, default_lease_owner
+from src import metrics, tracing
 from src.odoo_extractor.odoo_client import OdooClient, ModelExtractionError
-from src.storage import cleanup_model_folder, save_dataframe_to_gcs
+from src.storage import (
+    ParquetChunkWriter,
+    PayloadOffloader,
+    UploadPool,
+    payload_upload_pool,
+    collect_old_runs,
+    save_run_history,
+    save_run_manifest,
+    resolve_writer_profile,
+)
 from src.utils import (
     sanitize_records,
     build_polars_schema,
     enforce_polars_schema,
     detect_mixed_type_columns,
+    encode_dictionary_columns,
     ensure_string_columns,
+    env_flag,
+    build_relation_link_frames,
+    relation_list_fields,
+    env_int,
+    offload_large_values,
+    payload_offloaded_column,
+    payload_size_column,
 )
 
+if TYPE_CHECKING:
+    from app.engine.run_manager import ModelLocks
+
+ProgressCallback = Callable[..., None]
+# Datasets de vínculo: `related_id` é um id (min/max numérico no manifest).
+_LINK_FIELDS_METADATA = {"related_id": {"type": "integer"}}
+
 
 class ExtractionResult:
     """
@@ -28,13 +65,21 @@ class ExtractionResult:
         status: str,
         records_count: int = 0,
         file_paths: Optional[List[str]] = None,
+        link_paths: Optional[Dict[str, List[str]]] = None,
+        manifest_path: Optional[str] = None,
         error: Optional[str] = None,
+        stages: Optional[Dict[str, float]] = None,
+        cursor_field: Optional[str] = None,
     ):
         self.model = model
         self.status = status
         self.records_count = records_count
         self.file_paths = file_paths or []
+        self.link_paths = link_paths or {}
+        self.manifest_path = manifest_path
         self.error = error
+        self.stages = stages or {}
+        self.cursor_field = cursor_field
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -43,7 +88,11 @@ class ExtractionResult:
             "records_count": self.records_count,
             "file_paths": self.file_paths,
             "file_path": self.file_paths[-1] if self.file_paths else None,
+            "link_file_paths": self.link_paths,
+            "manifest_path": self.manifest_path,
             "error": self.error,
+            "stages": self.stages,
+            "cursor_field": self.cursor_field,
         }
 
 
@@ -137,32 +186,157 @@ def _build_incremental_domain(
     ]
 
 
+def _link_dataset_name(model: str, field: str) -> str:
+    """Nome do dataset `(id, related_id)` de um campo x2many."""
+    return f"{model}__{field}"
+
+
+def _collect_old_runs(dataset: str, pointer: Dict[str, Any], run_timestamp: str) -> None:
+    try:
+        collect_old_runs(
+            dataset,
+            keep_timestamps=pointer_timestamps(pointer),
+            min_timestamp=run_timestamp,
+        )
+    except Exception as exc:
+        logger.warning(f"⚠️ Falha na retenção de {dataset}: {exc}")
+
+
+def _publish_run(
+    pointer_store: RunPointerStore,
+    gc_executor: ThreadPoolExecutor,
+    writer: ParquetChunkWriter,
+    *,
+    mode: str,
+) -> str:
+    """
+    Grava o manifest da execução e a publica no `_CURRENT` do dataset.
+
+    Em full refresh, a remoção das execuções antigas roda em background
+    (retenção preguiçosa), fora do caminho crítico da extração.
+    Retorna a URI do manifest.
+    """
+    dataset = writer.model
+    run_timestamp = writer.object_timestamp
+    manifest = writer.manifest(mode=mode)
+    manifest_uri = save_run_manifest(dataset, run_timestamp, manifest, mode=mode)
+
+    pointer = pointer_store.publish(
+        dataset,
+        run_timestamp=run_timestamp,
+        mode=mode,
+        files=[chunk["uri"] for chunk in manifest["chunks"]],
+        manifest=manifest_uri,
+    )
+    if mode == "full":
+        gc_executor.submit(_collect_old_runs, dataset, pointer, run_timestamp)
+    return manifest_uri
+
+
+def _notify(progress: Optional[ProgressCallback], event: str, **data: Any) -> None:
+    """Repassa um evento de progresso; falhas do callback não afetam a extração."""
+    if progress is None:
+        return
+    try:
+        progress(event, **data)
+    except Exception as exc:
+        logger.warning(f"⚠️ Callback de progresso falhou ({event}): {exc}")
+
+
+@tracing.traced("run_extraction")
+@profiling.profiled
 def run_extraction(
     *,
-    models: List[str],
+    models: Iterable[str],
     fields: Optional[List[str]],
     limit: Optional[int],
     batch_size: int,
     incremental: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    model_locks: Optional["ModelLocks"] = None,
+    run_id: Optional[str] = None,
+    profile: Optional[str] = None,
+    queue: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Engine principal de extração.
     - Não sabe o que é HTTP
     - Não sabe o que é Cloud Run
     - Não sabe quem chamou
+
+    `progress` recebe eventos por model (`model_started`, `batch`,
+    `model_finished`); `model_locks` impede que execuções simultâneas
+    do mesmo processo extraiam o mesmo model.
+
+    `models` pode ser qualquer iterável — por exemplo, uma `LeaseQueue`,
+    que só entrega o próximo model quando o anterior terminou. `queue`
+    monta essa fila sobre `models`, com owner `<host>/<pid>/<run_id>`: duas
+    execuções do mesmo processo não retomam os leases uma da outra. Com
+    fila, só models em sucesso ou vazios são concluídos; os demais voltam
+    para ela.
+
+    `profile` (`run` ou `model`; default `ETL_PROFILE`) liga o cProfile e
+    o pico de memória por batch — tratado pelo decorator `profiling.profiled`.
     """
 
     logger.info("🚀 Engine de extração iniciada")
+    run_owner = run_id or uuid.uuid4().hex
     client = OdooClient()
     cursor_store = CursorStore() if incremental else None
+    categorical_columns = env_flag("PARQUET_CATEGORICAL_COLUMNS")
+    explode_relations = env_flag("ODOO_EXPLODE_X2MANY")
+    offload_thresholds = {
+        "binary": env_int("ODOO_OFFLOAD_BINARY_BYTES"),
+        "html": env_int("ODOO_OFFLOAD_HTML_BYTES"),
+    }
+
+    upload_pool = UploadPool()
+    payload_pool = payload_upload_pool()
+    # Digests de payloads já enviados nesta execução (compartilhado entre models).
+    payload_digests: Dict[str, str] = {}
+    pointer_store = RunPointerStore()
+    gc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gcs-gc")
+    run_mode = "inc" if incremental else "full"
+    run_timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    history_enabled = env_flag("RUN_HISTORY", True)
+    history: List[Dict[str, Any]] = []
+    profiling_session = profiling.current_session()
+    profiling_session.bind(run_id=run_owner, run_timestamp=run_timestamp)
+
+    if queue:
+        models = LeaseQueue(queue, list(models), owner=f"{default_lease_owner()}/{run_owner}")
+    lease_queue = models if isinstance(models, LeaseQueue) else None
 
     results: List[ExtractionResult] = []
+    total_models = len(models) if isinstance(models, Sized) else None
+    tracing.annotate(run_id=run_owner, mode=run_mode, batch_size=batch_size)
+    _notify(progress, "run_started", total=total_models, mode=run_mode)
+
+    for index, model in enumerate(models, start=1):
+        if model_locks is not None and not model_locks.acquire(model, run_owner):
+            reason = f"model em extração pela execução {model_locks.owner(model)}"
+            logger.warning(f"🔒 Model {model} ignorado: {reason}")
+            results.append(ExtractionResult(model=model, status="skipped", error=reason))
+            if lease_queue is not None:
+                lease_queue.release(model)
+            _notify(progress, "model_finished", **results[-1].to_dict())
+            continue
 
-    for model in models:
+        _notify(progress, "model_started", model=model, index=index, total=total_models)
+        timer = StageTimer()
+        model_started_at = datetime.now(timezone.utc).isoformat()
+        model_started = time.perf_counter()
+        rpc_before = client.rpc_stats()
+        batch_rows: List[int] = []
+        writers: List[ParquetChunkWriter] = []
+        metrics.MODELS_IN_FLIGHT.inc()
+        model_span = tracing.start_span("model", model=model, mode=run_mode)
+        profiling_session.start_model(model)
         try:
             logger.info(f"📊 Processando model: {model}")
 
-            fields_metadata = client.get_fields_metadata(model)
+            with timer.stage("schema"):
+                fields_metadata = client.get_fields_metadata(model)
             all_fields = list(fields_metadata.keys())
 
             for field_name, field_type in {
@@ -181,6 +355,16 @@ def run_extraction(
             domain: List[Any] = []
             cursor_field: Optional[str] = None
             cursor_data = None
+            model_mode = run_mode
+
+            if incremental and needs_full_refresh(pointer_store.load(model)):
+                # Sem base publicada ou com incrementais demais sobre ela:
+                # um full (re)cria a base do `_CURRENT`.
+                model_mode = "full"
+                logger.info(
+                    "♻️ {} sem base no _CURRENT ou no limite de incrementais — full refresh",
+                    model,
+                )
 
             if incremental and cursor_store:
                 has_write_date = "write_date" in all_fields
@@ -193,7 +377,7 @@ def run_extraction(
                     if "id" not in model_fields:
                         model_fields.append("id")
 
-                    if cursor_data and cursor_data.last_value:
+                    if model_mode == "inc" and cursor_data and cursor_data.last_value:
                         domain = _build_incremental_domain(
                             cursor_field=cursor_field,
                             last_value=cursor_data.last_value,
@@ -230,76 +414,157 @@ def run_extraction(
                     seen_fields.add(field_name)
             model_fields = deduped_fields
 
-            model_schema = build_polars_schema(fields_metadata, model_fields)
+            # Colunas de tamanho/marcação existem só no Parquet, nunca no search_read.
+            schema_fields = list(model_fields)
+            for field_name in model_fields:
+                field_type = (fields_metadata.get(field_name) or {}).get("type")
+                if offload_thresholds.get(field_type or "", 0) > 0:
+                    for column in (payload_size_column(field_name), payload_offloaded_column(field_name)):
+                        fields_metadata[column] = {"type": "integer"}
+                        schema_fields.append(column)
+
+            model_schema = build_polars_schema(fields_metadata, schema_fields)
+            link_fields = (
+                relation_list_fields(fields_metadata, model_fields)
+                if explode_relations
+                else []
+            )
 
-            chunk_paths: List[str] = []
+            writer_profile = resolve_writer_profile(model)
             model_records = 0
-            chunk_index = 1
             timestamp_str = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            writer = ParquetChunkWriter(
+                model,
+                object_timestamp=timestamp_str,
+                profile=writer_profile,
+                upload_pool=upload_pool,
+                mode=model_mode,
+                fields_metadata=fields_metadata,
+            )
+            link_writers = {
+                field: ParquetChunkWriter(
+                    _link_dataset_name(model, field),
+                    object_timestamp=timestamp_str,
+                    profile=writer_profile,
+                    upload_pool=upload_pool,
+                    mode=model_mode,
+                    fields_metadata=_LINK_FIELDS_METADATA,
+                )
+                for field in link_fields
+            }
+            writers = [writer, *link_writers.values()]
+            payload_offloader = PayloadOffloader(payload_pool, payload_digests)
             latest_cursor: Optional[Tuple[datetime, str, Optional[int]]] = None
 
-            for batch in client.iter_batches(
-                model=model,
-                domain=domain,
-                fields=model_fields,
-                batch_size=batch_size,
-                limit=limit,
+            for batch in timed_iter(
+                client.iter_batches(
+                    model=model,
+                    domain=domain,
+                    fields=model_fields,
+                    batch_size=batch_size,
+                    limit=limit,
+                ),
+                timer,
+                "fetch",
             ):
                 if not batch:
                     continue
-
-                mixed_columns = detect_mixed_type_columns(batch)
-                for column, info in mixed_columns.items():
-                    types = ", ".join(info["types"])
-                    logger.warning(
-                        'Column "{}" had mixed types ({}) with {} incoherent values; forced to Utf8.',
-                        column,
-                        types,
-                        info["incoherent_count"],
-                    )
-
-                sanitized = sanitize_records(batch, fields_metadata)
-                if not sanitized:
-                    continue
-
-                df = pl.DataFrame(sanitized, schema=model_schema, strict=False)
-                df = enforce_polars_schema(df, model_schema)
-                df = ensure_string_columns(
-                    df,
-                    on_cast_warning=lambda column, dtype: logger.warning(
-                        'Column "{}" detected as {}; casted to string.',
-                        column,
-                        dtype,
-                    ),
-                )
-
-                if cursor_field:
-                    candidate = _extract_batch_cursor(
+                with (
+                    tracing.span("batch", model=model, rows=len(batch)),
+                    profiling_session.batch(model, len(batch)),
+                ):
+                    transform_started = time.perf_counter()
+                    batch_rows.append(len(batch))
+
+                    offloaded = offload_large_values(
                         batch,
-                        cursor_field=cursor_field,
+                        fields_metadata,
+                        offload_thresholds,
+                        payload_offloader,
                     )
-                    if candidate:
-                        latest_cursor = _compare_cursor(latest_cursor, candidate)
-
-                gcs_uri = save_dataframe_to_gcs(
-                    df,
-                    model,
-                    object_timestamp=timestamp_str,
-                    chunk_index=chunk_index,
-                )
+                    if offloaded:
+                        logger.info(f"📎 {offloaded} payloads binary/html movidos para _blobs ({model})")
+
+                    mixed_columns = detect_mixed_type_columns(batch)
+                    for column, info in mixed_columns.items():
+                        types = ", ".join(info["types"])
+                        logger.warning(
+                            'Column "{}" had mixed types ({}) with {} incoherent values; forced to Utf8.',
+                            column,
+                            types,
+                            info["incoherent_count"],
+                        )
 
-                chunk_paths.append(gcs_uri)
-                model_records += len(batch)
-                chunk_index += 1
+                    with tracing.span("sanitize", model=model, rows=len(batch)) as sanitize_span:
+                        sanitized = sanitize_records(
+                            batch,
+                            fields_metadata,
+                            explode_relations=explode_relations,
+                        )
+                        if sanitized:
+                            df = pl.DataFrame(sanitized, schema=model_schema, strict=False)
+                            df = enforce_polars_schema(df, model_schema)
+                            df = ensure_string_columns(
+                                df,
+                                on_cast_warning=lambda column, dtype: logger.warning(
+                                    'Column "{}" detected as {}; casted to string.',
+                                    column,
+                                    dtype,
+                                ),
+                            )
+                            if categorical_columns:
+                                df = encode_dictionary_columns(df, fields_metadata)
+                            sanitize_span.set_attribute("columns", df.width)
+                    if not sanitized:
+                        continue
+
+                    for field, link_df in build_relation_link_frames(batch, link_fields).items():
+                        link_writers[field].write(link_df)
+
+                    if cursor_field:
+                        candidate = _extract_batch_cursor(
+                            batch,
+                            cursor_field=cursor_field,
+                        )
+                        if candidate:
+                            latest_cursor = _compare_cursor(latest_cursor, candidate)
+
+                    timer.add("transform", time.perf_counter() - transform_started)
+
+                    with timer.stage("encode"), tracing.span(
+                        "write_parquet", model=model, rows=df.height
+                    ):
+                        writer.write(df)
+                    model_records += len(batch)
+                    metrics.ROWS.labels(model=model, mode=run_mode).inc(len(batch))
+                    _notify(progress, "batch", model=model, records=model_records)
+
+            # Aguarda os uploads pendentes antes de limpeza/cursor.
+            with timer.stage("upload"), tracing.span("wait_uploads", model=model):
+                payload_offloader.wait()
+                chunk_paths = writer.close()
+                link_paths = {
+                    field: link_writer.close()
+                    for field, link_writer in link_writers.items()
+                }
 
             if not chunk_paths:
                 logger.warning(f"⚠️ Nenhum registro encontrado para {model}")
-                if not incremental:
-                    cleanup_model_folder(model)
+                if model_mode == "full":
+                    # Full vazio publica um estado vazio; os arquivos antigos expiram.
+                    with timer.stage("upload"):
+                        for dataset_writer in writers:
+                            _publish_run(
+                                pointer_store,
+                                gc_executor,
+                                dataset_writer,
+                                mode=model_mode,
+                            )
                 results.append(
                     ExtractionResult(
                         model=model,
                         status="empty",
+                        cursor_field=cursor_field,
                     )
                 )
                 continue
@@ -308,17 +573,31 @@ def run_extraction(
                 f"✅ {model}: {model_records} registros em {len(chunk_paths)} arquivos"
             )
 
-            if not incremental:
-                cleanup_model_folder(model, keep_timestamp=timestamp_str)
+            with timer.stage("upload"):
+                manifest_path = _publish_run(
+                    pointer_store,
+                    gc_executor,
+                    writer,
+                    mode=model_mode,
+                )
+                for field, link_writer in link_writers.items():
+                    if link_paths[field] or model_mode == "full":
+                        _publish_run(
+                            pointer_store,
+                            gc_executor,
+                            link_writer,
+                            mode=model_mode,
+                        )
 
             if cursor_field and latest_cursor and cursor_store:
                 _, cursor_value, cursor_id = latest_cursor
-                cursor_store.save(
-                    model,
-                    cursor_field=cursor_field,
-                    last_value=cursor_value,
-                    last_id=cursor_id,
-                )
+                with timer.stage("cursor"):
+                    cursor_store.save(
+                        model,
+                        cursor_field=cursor_field,
+                        last_value=cursor_value,
+                        last_id=cursor_id,
+                    )
 
             results.append(
                 ExtractionResult(
@@ -326,6 +605,9 @@ def run_extraction(
                     status="success",
                     records_count=model_records,
                     file_paths=chunk_paths,
+                    link_paths=link_paths,
+                    manifest_path=manifest_path,
+                    cursor_field=cursor_field,
                 )
             )
 
@@ -349,17 +631,77 @@ def run_extraction(
                 )
             )
 
+        finally:
+            metrics.MODELS_IN_FLIGHT.dec()
+            if model_locks is not None:
+                model_locks.release(model, run_owner)
+            result = results[-1]
+            if lease_queue is not None:
+                try:
+                    lease_queue.finish(model, success=result.status in {"success", "empty"})
+                except Exception as exc:
+                    logger.warning(f"⚠️ Falha ao reportar {model} na fila de leases: {exc}")
+            result.stages = timer.as_dict()
+            bytes_written = sum(w.bytes_written for w in writers)
+            model_span.end(
+                error=result.error if result.status == "error" else None,
+                status=result.status,
+                rows=result.records_count,
+                bytes=bytes_written,
+            )
+            profiling_session.finish_model(
+                model,
+                timestamp=writers[0].object_timestamp if writers else run_timestamp,
+                mode=run_mode,
+            )
+            if history_enabled:
+                rpc_after = client.rpc_stats()
+                history.append(
+                    build_history_record(
+                        run_id=run_owner,
+                        run_timestamp=run_timestamp,
+                        mode=run_mode,
+                        result=result.to_dict(),
+                        started_at=model_started_at,
+                        duration_s=time.perf_counter() - model_started,
+                        stages=result.stages,
+                        rpc={key: rpc_after[key] - rpc_before[key] for key in rpc_after},
+                        bytes_written=bytes_written,
+                        batch_size=batch_size,
+                        batch_rows=batch_rows,
+                    )
+                )
+            _notify(progress, "model_finished", **result.to_dict())
+
+    upload_pool.shutdown()
+    payload_pool.shutdown()
+    gc_executor.shutdown(wait=True)
+
+    history_path: Optional[str] = None
+    if history:
+        try:
+            history_path = save_run_history(history_dataframe(history), run_timestamp, run_owner)
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao gravar histórico da execução: {exc}")
+
     # --- Resumo global ---
     summary = {
-        "total_models": len(models),
+        "total_models": len(results),
         "successful": sum(r.status == "success" for r in results),
         "empty": sum(r.status == "empty" for r in results),
         "skipped": sum(r.status == "skipped" for r in results),
         "failed": sum(r.status == "error" for r in results),
         "total_records": sum(r.records_count for r in results),
         "results": [r.to_dict() for r in results],
+        "history_path": history_path,
     }
 
+    tracing.annotate(
+        models=summary["total_models"],
+        failed=summary["failed"],
+        rows=summary["total_records"],
+    )
+
     logger.success(
         "🏁 Engine finalizada — "
         f"sucesso={summary['successful']}, "
@@ -0,0 +1,241 @@
+import cProfile
+import functools
+import io
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+
+from loguru import logger
+
+from src.storage import save_profile_reports
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PROFILE_MODES = ("run", "model")
+_TOP_FUNCTIONS = 60
+_TOP_ALLOCATIONS = 25
+
+# tracemalloc é global ao processo: execuções concorrentes compartilham a mesma sessão.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+# cProfile e o `reset_peak` do tracemalloc também são globais: uma execução perfilada por vez.
+_profiled_run_lock = threading.Lock()
+
+
+class ProfilingBusyError(RuntimeError):
+    """Outra execução com profiling já está ativa neste processo."""
+
+
+def resolve_profile_mode(value: Optional[str]) -> Optional[str]:
+    """`run`, `model` ou None; sem valor explícito usa `ETL_PROFILE`."""
+    raw = value if value is not None else os.getenv("ETL_PROFILE", "")
+    mode = raw.strip().lower()
+    if mode in {"", "0", "off", "none"}:
+        return None
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo de profiling inválido: {raw} (use run ou model)")
+    return mode
+
+
+def profiling_active() -> bool:
+    """Indica se há uma execução perfilada em andamento no processo."""
+    return _profiled_run_lock.locked()
+
+
+def _start_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users = max(_tracemalloc_users - 1, 0)
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class ExtractionProfiler:
+    """
+    cProfile de um escopo (execução inteira ou um model) mais o pico de
+    memória Python de cada batch via tracemalloc.
+
+    O cProfile cobre só a thread que chamou `start`; uploads no pool
+    aparecem como espera em `Future.result`.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._cpu = cProfile.Profile()
+        self._running = False
+        self._batches: List[Dict[str, Any]] = []
+        self._peak_batch: Optional[Dict[str, Any]] = None
+        self._top_allocations: List[Dict[str, Any]] = []
+
+    def start(self) -> None:
+        _start_tracemalloc()
+        self._cpu.enable()
+        self._running = True
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._cpu.disable()
+        self._running = False
+        _stop_tracemalloc()
+
+    @contextmanager
+    def batch(self, model: str, rows: int) -> Iterator[None]:
+        """Mede o pico de alocações do batch; o maior pico guarda um snapshot."""
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        yield
+        current, peak = tracemalloc.get_traced_memory()
+        entry = {
+            "model": model,
+            "batch": len(self._batches) + 1,
+            "rows": rows,
+            "seconds": round(time.perf_counter() - started, 6),
+            "peak_bytes": peak,
+            "current_bytes": current,
+        }
+        self._batches.append(entry)
+        if self._peak_batch is None or peak > self._peak_batch["peak_bytes"]:
+            self._peak_batch = entry
+            # O snapshot é caro: fica fora do cProfile para não poluir o relatório.
+            self._cpu.disable()
+            try:
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    (tracemalloc.Filter(False, tracemalloc.__file__),)
+                )
+                self._top_allocations = [
+                    {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]
+                ]
+            finally:
+                if self._running:
+                    self._cpu.enable()
+
+    def reports(self) -> Dict[str, bytes]:
+        """Relatórios por extensão: `pstats` (binário), `txt` e `json` (memória)."""
+        stream = io.StringIO()
+        stats = pstats.Stats(self._cpu, stream=stream)
+        raw_stats = marshal.dumps(stats.stats)
+        stats.sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+        memory = {
+            "scope": self.scope,
+            "batches": self._batches,
+            "peak_batch": self._peak_batch,
+            # Alocações ainda vivas ao fim do batch de maior pico.
+            "top_allocations": self._top_allocations,
+        }
+        return {
+            "pstats": raw_stats,
+            "txt": stream.getvalue().encode("utf-8"),
+            "json": json.dumps(memory, ensure_ascii=False).encode("utf-8"),
+        }
+
+
+class ProfilingSession:
+    """Estado do profiling de uma chamada de `run_extraction`."""
+
+    def __init__(self, mode: Optional[str]):
+        self.mode = mode
+        self.run_id: Optional[str] = None
+        self.run_timestamp: Optional[str] = None
+        self.report_paths: List[str] = []
+        self.current: Optional[ExtractionProfiler] = None
+
+    def bind(self, *, run_id: str, run_timestamp: str) -> None:
+        self.run_id = run_id
+        self.run_timestamp = run_timestamp
+
+    def batch(self, model: str, rows: int) -> ContextManager[None]:
+        if self.current is None:
+            return nullcontext()
+        return self.current.batch(model, rows)
+
+    def start_model(self, model: str) -> None:
+        if self.mode != "model":
+            return
+        self.current = ExtractionProfiler(model)
+        self.current.start()
+
+    def finish_model(self, model: str, *, timestamp: str, mode: str) -> None:
+        if self.mode != "model" or self.current is None:
+            return
+        profiler, self.current = self.current, None
+        profiler.stop()
+        self.save(profiler, timestamp=timestamp, model=model, mode=mode)
+
+    def save(self, profiler: ExtractionProfiler, **location: Any) -> None:
+        try:
+            self.report_paths.extend(save_profile_reports(profiler.reports(), **location))
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao gravar relatórios de profiling ({profiler.scope}): {exc}")
+
+
+_session: ContextVar[Optional[ProfilingSession]] = ContextVar("etl_profiling_session", default=None)
+
+
+def current_session() -> ProfilingSession:
+    """Sessão da execução corrente (desligada fora de `profiled`)."""
+    return _session.get() or ProfilingSession(None)
+
+
+def profiled(func: F) -> F:
+    """
+    Decorator do `run_extraction`: lê o argumento `profile` (ou `ETL_PROFILE`)
+    e, em `run`, envolve a chamada inteira no profiler. Garante que nenhum
+    profiler fique ativo na thread se a execução falhar, e adiciona
+    `profile_paths` ao resumo.
+
+    Só uma execução perfilada roda por vez no processo: a segunda falha com
+    `ProfilingBusyError` antes de extrair qualquer model. Execuções sem
+    profiling não são afetadas.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        session = ProfilingSession(resolve_profile_mode(kwargs.get("profile")))
+        if session.mode is not None and not _profiled_run_lock.acquire(blocking=False):
+            raise ProfilingBusyError("Já existe uma execução com profiling ativa neste processo")
+        run_profiler = ExtractionProfiler("run") if session.mode == "run" else None
+        token = _session.set(session)
+        try:
+            if run_profiler is not None:
+                session.current = run_profiler
+                run_profiler.start()
+            summary = func(*args, **kwargs)
+        finally:
+            if session.current is not None:
+                session.current.stop()
+            _session.reset(token)
+            if session.mode is not None:
+                _profiled_run_lock.release()
+
+        if run_profiler is not None and session.run_timestamp:
+            session.save(
+                run_profiler,
+                timestamp=session.run_timestamp,
+                run_id=session.run_id,
+            )
+        if session.mode is not None:
+            summary["profile_paths"] = session.report_paths
+            logger.info(f"🔬 Relatórios de profiling: {', '.join(session.report_paths) or '-'}")
+        return summary
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,120 @@
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import polars as pl
+
+T = TypeVar("T")
+
+STAGES = ("schema", "fetch", "transform", "encode", "upload", "cursor")
+
+# Schema fixo: arquivos de execuções diferentes podem ser lidos juntos.
+RUN_HISTORY_SCHEMA: Dict[str, pl.DataType] = {
+    "run_id": pl.Utf8,
+    "run_timestamp": pl.Utf8,
+    "release": pl.Utf8,
+    "mode": pl.Utf8,
+    "model": pl.Utf8,
+    "status": pl.Utf8,
+    "error": pl.Utf8,
+    "started_at": pl.Utf8,
+    "duration_s": pl.Float64,
+    **{f"{stage}_s": pl.Float64 for stage in STAGES},
+    "rpc_calls": pl.Int64,
+    "rpc_retries": pl.Int64,
+    "rpc_s": pl.Float64,
+    "rows": pl.Int64,
+    "bytes": pl.Int64,
+    "files": pl.Int64,
+    "batches": pl.Int64,
+    "batch_size": pl.Int64,
+    "batch_rows_min": pl.Int64,
+    "batch_rows_max": pl.Int64,
+    "batch_rows_avg": pl.Float64,
+}
+
+
+def current_release() -> Optional[str]:
+    """Identificação da versão em execução (`APP_RELEASE` ou revisão do Cloud Run)."""
+    return os.getenv("APP_RELEASE") or os.getenv("K_REVISION") or os.getenv("CLOUD_RUN_JOB")
+
+
+class StageTimer:
+    """Acumula o tempo gasto em cada etapa da extração de um model."""
+
+    def __init__(self) -> None:
+        self._durations: Dict[str, float] = defaultdict(float)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self._durations[stage] += seconds
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {stage: round(self._durations.get(stage, 0.0), 6) for stage in STAGES}
+
+
+def timed_iter(iterable: Iterable[T], timer: StageTimer, stage: str) -> Iterator[T]:
+    """Itera contabilizando em `stage` apenas o tempo de espera por cada item."""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timer.add(stage, time.perf_counter() - started)
+            return
+        timer.add(stage, time.perf_counter() - started)
+        yield item
+
+
+def build_history_record(
+    *,
+    run_id: str,
+    run_timestamp: str,
+    mode: str,
+    result: Dict[str, Any],
+    started_at: str,
+    duration_s: float,
+    stages: Dict[str, float],
+    rpc: Dict[str, Any],
+    bytes_written: int,
+    batch_size: int,
+    batch_rows: List[int],
+) -> Dict[str, Any]:
+    """Monta a linha do histórico de um model a partir do resultado da extração."""
+    return {
+        "run_id": run_id,
+        "run_timestamp": run_timestamp,
+        "release": current_release(),
+        "mode": mode,
+        "model": result["model"],
+        "status": result["status"],
+        "error": result.get("error"),
+        "started_at": started_at,
+        "duration_s": round(duration_s, 6),
+        **{f"{stage}_s": seconds for stage, seconds in stages.items()},
+        "rpc_calls": rpc.get("calls", 0),
+        "rpc_retries": rpc.get("retries", 0),
+        "rpc_s": round(rpc.get("seconds", 0.0), 6),
+        "rows": result.get("records_count", 0),
+        "bytes": bytes_written,
+        "files": len(result.get("file_paths") or []),
+        "batches": len(batch_rows),
+        "batch_size": batch_size,
+        "batch_rows_min": min(batch_rows) if batch_rows else None,
+        "batch_rows_max": max(batch_rows) if batch_rows else None,
+        "batch_rows_avg": sum(batch_rows) / len(batch_rows) if batch_rows else None,
+    }
+
+
+def history_dataframe(records: List[Dict[str, Any]]) -> pl.DataFrame:
+    return pl.DataFrame(records, schema=RUN_HISTORY_SCHEMA, strict=False)
@@ -0,0 +1,200 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sized
+
+from loguru import logger
+
+from app.engine.extractor import run_extraction
+from src import metrics
+from src.utils import env_int
+
+_DEFAULT_MAX_CONCURRENT_RUNS = 2
+_DEFAULT_RUN_HISTORY = 100
+_FINAL_STATUSES = {"success", "error"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ModelLocks:
+    """
+    Locks por model compartilhados entre execuções do mesmo processo.
+
+    A aquisição não bloqueia: se outra execução já está extraindo o model,
+    quem chega depois o ignora em vez de duplicar chunks e cursor.
+    """
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        self._owners: Dict[str, str] = {}
+
+    def acquire(self, model: str, owner: str) -> bool:
+        with self._guard:
+            current = self._owners.get(model)
+            if current is not None and current != owner:
+                return False
+            self._owners[model] = owner
+            return True
+
+    def release(self, model: str, owner: str) -> None:
+        with self._guard:
+            if self._owners.get(model) == owner:
+                del self._owners[model]
+
+    def owner(self, model: str) -> Optional[str]:
+        with self._guard:
+            return self._owners.get(model)
+
+
+class RunRecord:
+    """
+    Estado de uma execução submetida em background.
+
+    Os eventos de progresso ficam em memória, numerados, para que o
+    stream SSE possa retomar a partir do último evento entregue.
+    """
+
+    def __init__(self, run_id: str, kind: str, params: Dict[str, Any]):
+        self.run_id = run_id
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.models_total = 0
+        self.models_done = 0
+        self.current_model: Optional[str] = None
+        self.summary: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINAL_STATUSES
+
+    def emit(self, event: str, **data: Any) -> None:
+        """Registra um evento de progresso (callback passado para a engine)."""
+        with self._lock:
+            if event == "run_started":
+                self.models_total = data.get("total", 0)
+            elif event == "model_started":
+                self.current_model = data.get("model")
+            elif event == "model_finished":
+                self.models_done += 1
+                self.current_model = None
+            self._events.append(
+                {"seq": len(self._events), "event": event, "at": _now(), **data}
+            )
+
+    def events_since(self, seq: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events[seq:])
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "kind": self.kind,
+                "status": self.status,
+                "params": self.params,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "models_total": self.models_total,
+                "models_done": self.models_done,
+                "current_model": self.current_model,
+                "summary": self.summary,
+                "error": self.error,
+            }
+
+
+class RunManager:
+    """
+    Executa extrações em um pool limitado de threads, fora do event loop.
+
+    Cada submissão recebe um `run_id` consultável enquanto estiver no
+    histórico (`API_RUN_HISTORY` execuções mais recentes).
+    """
+
+    def __init__(
+        self,
+        *,
+        runner: Callable[..., Dict[str, Any]] = run_extraction,
+        max_workers: Optional[int] = None,
+        history: Optional[int] = None,
+    ):
+        self.runner = runner
+        self.model_locks = ModelLocks()
+        self.history = history or env_int("API_RUN_HISTORY", _DEFAULT_RUN_HISTORY)
+        workers = max_workers or env_int(
+            "API_MAX_CONCURRENT_RUNS", _DEFAULT_MAX_CONCURRENT_RUNS
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers),
+            thread_name_prefix="etl-run",
+        )
+        self._runs: "OrderedDict[str, RunRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, *, kind: str, models: Iterable[str], **kwargs: Any) -> RunRecord:
+        run_id = uuid.uuid4().hex
+        models_count = len(models) if isinstance(models, Sized) else None
+        record = RunRecord(run_id, kind, {"models_count": models_count, **kwargs})
+        with self._lock:
+            self._runs[run_id] = record
+            while len(self._runs) > self.history:
+                oldest_id, oldest = next(iter(self._runs.items()))
+                if not oldest.finished:
+                    break
+                del self._runs[oldest_id]
+
+        record.future = self._executor.submit(self._execute, record, models, kwargs)
+        target = f"{models_count} models" if models_count is not None else "fila de leases"
+        logger.info(f"📨 Execução {run_id} ({kind}) enfileirada com {target}")
+        return record
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def list(self) -> List[RunRecord]:
+        with self._lock:
+            return list(reversed(self._runs.values()))
+
+    def _execute(
+        self,
+        record: RunRecord,
+        models: Iterable[str],
+        kwargs: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        record.status = "running"
+        record.started_at = _now()
+        metrics.RUNS_IN_FLIGHT.inc()
+        try:
+            record.summary = self.runner(
+                models=models,
+                progress=record.emit,
+                model_locks=self.model_locks,
+                run_id=record.run_id,
+                **kwargs,
+            )
+            record.status = "success"
+        except Exception as exc:
+            logger.error(f"💥 Execução {record.run_id} falhou: {exc}")
+            record.error = str(exc)
+            record.status = "error"
+        finally:
+            metrics.RUNS_IN_FLIGHT.dec()
+            record.finished_at = _now()
+            record.emit("run_finished", status=record.status, error=record.error)
+        return record.summary
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
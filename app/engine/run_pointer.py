@@ -0,0 +1,183 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from google.cloud import storage
+from loguru import logger
+
+from src.utils import env_int
+
+_storage_client: Optional[storage.Client] = None
+_GCS_BUCKET = "gobrax-data-lake"
+_GCS_BASE_PATH = "data-lake/odoo"
+_POINTER_FILE_NAME = "_CURRENT.json"
+_PUBLISH_ATTEMPTS = 5
+_DEFAULT_MAX_INCREMENTAL = 500
+
+
+def _get_storage_client() -> storage.Client:
+    """Retorna instância singleton do client do GCS."""
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def _safe_model_name(model: str) -> str:
+    return model.replace(".", "_")
+
+
+def pointer_files(pointer: Optional[Dict[str, Any]]) -> List[str]:
+    """URIs que compõem o estado publicado: run full base + incrementais seguintes."""
+    if not pointer:
+        return []
+    files: List[str] = []
+    base = pointer.get("base")
+    if base:
+        files.extend(base.get("files", []))
+    for run in pointer.get("incremental", []):
+        files.extend(run.get("files", []))
+    return files
+
+
+def pointer_timestamps(pointer: Optional[Dict[str, Any]]) -> Set[str]:
+    """Timestamps das execuções referenciadas pelo ponteiro."""
+    if not pointer:
+        return set()
+    runs = list(pointer.get("incremental", []))
+    if pointer.get("base"):
+        runs.append(pointer["base"])
+    return {run["run_timestamp"] for run in runs if run.get("run_timestamp")}
+
+
+def max_incremental_runs() -> int:
+    """Limite de execuções incrementais sobre uma base (`GCS_POINTER_MAX_INCREMENTAL`)."""
+    return max(env_int("GCS_POINTER_MAX_INCREMENTAL", _DEFAULT_MAX_INCREMENTAL), 1)
+
+
+def needs_full_refresh(pointer: Optional[Dict[str, Any]]) -> bool:
+    """
+    True quando o próximo incremental precisa ser um full refresh.
+
+    Sem ponteiro ou sem `base` (models do layout anterior ao `_CURRENT`,
+    primeira execução sem cursor), um incremental publicaria só os arquivos
+    novos e os leitores perderiam o histórico. Com base, força o full quando
+    o ponteiro já acumula `max_incremental_runs()` incrementais: só um full
+    zera a lista, e sem ele o ponteiro (e o número de arquivos lidos por
+    consumidores) cresce sem limite.
+    """
+    if not pointer or not pointer.get("base"):
+        return True
+    return len(pointer.get("incremental", [])) >= max_incremental_runs()
+
+
+class RunPointerStore:
+    """
+    Publica o ponteiro `_CURRENT.json` de cada model.
+
+    O ponteiro é um objeto pequeno sobrescrito de forma atômica (com
+    precondição de geração) apenas quando a execução termina. Leitores
+    encontram os arquivos vigentes com um único GET, sem listar o bucket.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket_name: Optional[str] = None,
+        base_path: Optional[str] = None,
+    ):
+        self.bucket_name = (bucket_name or _GCS_BUCKET).strip()
+        self.base_path = (base_path or _GCS_BASE_PATH).strip("/")
+
+    def _object_name(self, model: str) -> str:
+        return f"{self.base_path}/{_safe_model_name(model)}/{_POINTER_FILE_NAME}".lstrip("/")
+
+    def _get_blob(self, model: str) -> storage.Blob:
+        client = _get_storage_client()
+        return client.bucket(self.bucket_name).blob(self._object_name(model))
+
+    def _read(self, model: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Retorna (ponteiro, geração); geração 0 quando o objeto não existe."""
+        client = _get_storage_client()
+        blob = client.bucket(self.bucket_name).get_blob(self._object_name(model))
+        if blob is None:
+            return None, 0
+        raw = blob.download_as_text(encoding="utf-8", if_generation_match=blob.generation)
+        return json.loads(raw), blob.generation
+
+    def load(self, model: str) -> Optional[Dict[str, Any]]:
+        """Carrega o ponteiro publicado para o model."""
+        try:
+            pointer, _ = self._read(model)
+            return pointer
+        except NotFound:
+            return None
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao carregar _CURRENT de {model}: {exc}")
+            return None
+
+    def publish(
+        self,
+        model: str,
+        *,
+        run_timestamp: str,
+        mode: str,
+        files: List[str],
+        manifest: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Publica a execução concluída.
+
+        `full` substitui a base e zera os incrementais; `inc` acrescenta a
+        execução à lista de incrementais da base vigente.
+        """
+        run = {
+            "run_timestamp": run_timestamp,
+            "mode": mode,
+            "manifest": manifest,
+            "files": list(files),
+        }
+
+        for attempt in range(_PUBLISH_ATTEMPTS):
+            try:
+                current, generation = self._read(model)
+            except NotFound:
+                current, generation = None, 0
+            except PreconditionFailed:
+                # Sobrescrito entre o get_blob e o download: relê.
+                logger.warning(
+                    f"⏳ _CURRENT de {model} alterado durante a leitura "
+                    f"(tentativa {attempt + 1}/{_PUBLISH_ATTEMPTS})"
+                )
+                continue
+
+            if mode == "full" or not current:
+                pointer: Dict[str, Any] = {
+                    "model": model,
+                    "base": run if mode == "full" else None,
+                    "incremental": [] if mode == "full" else [run],
+                }
+            else:
+                pointer = dict(current)
+                pointer["incremental"] = list(current.get("incremental", [])) + [run]
+            pointer["published_at"] = datetime.now(timezone.utc).isoformat()
+
+            try:
+                self._get_blob(model).upload_from_string(
+                    json.dumps(pointer, ensure_ascii=False),
+                    content_type="application/json",
+                    if_generation_match=generation,
+                )
+            except PreconditionFailed:
+                # Outro writer publicou no meio tempo: relê e tenta de novo.
+                logger.warning(
+                    f"⏳ _CURRENT de {model} alterado concorrentemente "
+                    f"(tentativa {attempt + 1}/{_PUBLISH_ATTEMPTS})"
+                )
+                continue
+
+            logger.info(f"📌 _CURRENT de {model} publicado ({mode}, run={run_timestamp})")
+            return pointer
+
+        raise RuntimeError(f"Não foi possível publicar _CURRENT de {model}")
@@ -0,0 +1,208 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.api_core.exceptions import PreconditionFailed
+from google.cloud import storage
+from loguru import logger
+
+from src.utils import env_int
+
+_storage_client: Optional[storage.Client] = None
+_GCS_BUCKET = "gobrax-data-lake"
+_GCS_BASE_PATH = "data-lake/odoo"
+_STATE_OBJECT = "_schedule/cadence.json"
+_SAVE_ATTEMPTS = 5
+# Peso da última observação na média móvel exponencial da taxa de mudança.
+_EWMA_ALPHA = 0.5
+# Tolerância sobre a cadência: invocações agendadas chegam com alguns segundos de variação.
+_DUE_SLACK = 0.05
+
+TIERS = ("hot", "warm", "cold")
+_DEFAULT_CADENCE_MINUTES = {"hot": 0, "warm": 60, "cold": 24 * 60}
+_DEFAULT_HOT_ROWS_PER_HOUR = 10
+_DEFAULT_WARM_ROWS_PER_DAY = 1
+
+
+def _get_storage_client() -> storage.Client:
+    """Retorna instância singleton do client do GCS."""
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def cadence_minutes(tier: str) -> int:
+    """Intervalo mínimo entre extrações do tier (`SCHEDULER_<TIER>_MINUTES`)."""
+    return env_int(f"SCHEDULER_{tier.upper()}_MINUTES", _DEFAULT_CADENCE_MINUTES[tier])
+
+
+def classify_rate(rows_per_hour: float) -> str:
+    """Tier correspondente à taxa de mudança observada (linhas alteradas por hora)."""
+    if rows_per_hour >= env_int("SCHEDULER_HOT_ROWS_PER_HOUR", _DEFAULT_HOT_ROWS_PER_HOUR):
+        return "hot"
+    if rows_per_hour * 24 >= env_int("SCHEDULER_WARM_ROWS_PER_DAY", _DEFAULT_WARM_ROWS_PER_DAY):
+        return "warm"
+    return "cold"
+
+
+def _env_tier(name: str, default: str) -> str:
+    value = (os.getenv(name) or default).strip().lower()
+    return value if value in TIERS else default
+
+
+def is_due(entry: Optional[Dict[str, Any]], now: datetime) -> bool:
+    """Model sem histórico está sempre vencido; os demais seguem a cadência do tier."""
+    if not entry or not entry.get("last_run_at"):
+        return True
+    cadence = timedelta(minutes=cadence_minutes(entry.get("tier", "hot")))
+    elapsed = now - datetime.fromisoformat(entry["last_run_at"])
+    return elapsed >= cadence * (1 - _DUE_SLACK)
+
+
+def update_entry(
+    entry: Optional[Dict[str, Any]],
+    *,
+    rows: int,
+    has_cursor: bool,
+    now: datetime,
+) -> Dict[str, Any]:
+    """
+    Atualiza o estado do model após uma extração incremental.
+
+    A taxa é o avanço do cursor na execução (linhas novas/alteradas desde a
+    anterior) dividido pelo tempo decorrido, suavizada por EWMA. Models sem
+    `write_date` fazem full refresh a cada execução, então o volume não mede
+    mudança: ficam no tier de `SCHEDULER_NO_CURSOR_TIER` (default `warm`).
+    """
+    entry = dict(entry or {})
+    previous_run = entry.get("last_run_at")
+    entry["last_run_at"] = now.isoformat()
+    entry["last_rows"] = rows
+
+    if not has_cursor:
+        entry["tier"] = _env_tier("SCHEDULER_NO_CURSOR_TIER", "warm")
+        entry.pop("rows_per_hour", None)
+        return entry
+
+    if not previous_run:
+        # Primeira observação mede o backlog inteiro, não a taxa: mantém em hot.
+        entry["tier"] = "hot"
+        return entry
+
+    hours = max((now - datetime.fromisoformat(previous_run)).total_seconds() / 3600, 1 / 60)
+    observed = rows / hours
+    current = entry.get("rows_per_hour")
+    rate = observed if current is None else _EWMA_ALPHA * observed + (1 - _EWMA_ALPHA) * current
+    entry["rows_per_hour"] = round(rate, 6)
+    entry["tier"] = classify_rate(rate)
+    return entry
+
+
+class CadenceStore:
+    """
+    Estado do scheduler (`_schedule/cadence.json`): tier, taxa e última
+    execução de cada model.
+
+    Tasks paralelos atualizam o mesmo objeto; a escrita usa precondição de
+    geração e é refeita sobre o estado mais recente em caso de conflito.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket_name: Optional[str] = None,
+        base_path: Optional[str] = None,
+    ):
+        self.bucket_name = (bucket_name or _GCS_BUCKET).strip()
+        base = (base_path or _GCS_BASE_PATH).strip("/")
+        self.object_name = f"{base}/{_STATE_OBJECT}".lstrip("/")
+
+    def _read(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        client = _get_storage_client()
+        blob = client.bucket(self.bucket_name).get_blob(self.object_name)
+        if blob is None:
+            return {}, 0
+        raw = blob.download_as_text(encoding="utf-8", if_generation_match=blob.generation)
+        return json.loads(raw).get("models", {}), blob.generation
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            state, _ = self._read()
+            return state
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao carregar estado do scheduler: {exc}")
+            return {}
+
+    def update(self, mutate: Callable[[Dict[str, Dict[str, Any]]], None]) -> None:
+        for attempt in range(_SAVE_ATTEMPTS):
+            try:
+                state, generation = self._read()
+            except PreconditionFailed:
+                continue
+            mutate(state)
+            payload = {
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "models": state,
+            }
+            blob = _get_storage_client().bucket(self.bucket_name).blob(self.object_name)
+            try:
+                blob.upload_from_string(
+                    json.dumps(payload, ensure_ascii=False, sort_keys=True),
+                    content_type="application/json",
+                    if_generation_match=generation,
+                )
+                return
+            except PreconditionFailed:
+                logger.warning(
+                    f"⏳ Estado do scheduler alterado concorrentemente "
+                    f"(tentativa {attempt + 1}/{_SAVE_ATTEMPTS})"
+                )
+        raise RuntimeError("Não foi possível salvar o estado do scheduler")
+
+
+class ChangeRateScheduler:
+    """
+    Seleciona os models vencidos em cada invocação incremental e aprende a
+    taxa de mudança de cada um a partir dos resultados da extração.
+    """
+
+    def __init__(self, store: Optional[CadenceStore] = None):
+        self.store = store or CadenceStore()
+
+    def due_models(self, models: List[str], *, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now(timezone.utc)
+        state = self.store.load()
+        due = [model for model in models if is_due(state.get(model), now)]
+
+        tiers: Dict[str, int] = {}
+        for model in models:
+            tier = (state.get(model) or {}).get("tier", "new")
+            tiers[tier] = tiers.get(tier, 0) + 1
+        summary = ", ".join(f"{tier}={count}" for tier, count in sorted(tiers.items()))
+        logger.info(f"🗓️ {len(due)} de {len(models)} models vencidos ({summary})")
+        return due
+
+    def record_results(
+        self,
+        results: List[Dict[str, Any]],
+        *,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Atualiza o estado com os models extraídos com sucesso (ou vazios)."""
+        now = now or datetime.now(timezone.utc)
+        finished = [result for result in results if result["status"] in {"success", "empty"}]
+        if not finished:
+            return
+
+        def mutate(state: Dict[str, Dict[str, Any]]) -> None:
+            for result in finished:
+                state[result["model"]] = update_entry(
+                    state.get(result["model"]),
+                    rows=result.get("records_count", 0),
+                    has_cursor=bool(result.get("cursor_field")),
+                    now=now,
+                )
+
+        self.store.update(mutate)
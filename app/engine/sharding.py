@@ -0,0 +1,195 @@
+import heapq
+import json
+import os
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from google.api_core.exceptions import PreconditionFailed
+from google.cloud import storage
+from loguru import logger
+
+from app.engine.run_pointer import RunPointerStore
+from app.engine.work_queue import LeaseQueue
+from src.storage import load_run_manifest
+from src.utils import env_int
+
+_storage_client: Optional[storage.Client] = None
+_GCS_BUCKET = "gobrax-data-lake"
+_GCS_BASE_PATH = "data-lake/odoo"
+_SHARDS_FOLDER = "_shards"
+_DEFAULT_WEIGHT = 1.0
+_WEIGHT_WORKERS = 16
+
+
+def _get_storage_client() -> storage.Client:
+    """Retorna instância singleton do client do GCS."""
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def lpt_partition(weights: Dict[str, float], bins: int) -> List[List[str]]:
+    """
+    Distribui os models em `bins` grupos pelo longest-processing-time-first.
+
+    Os models mais pesados são alocados primeiro, sempre no grupo com menor
+    carga acumulada. O desempate por nome torna o resultado determinístico.
+    """
+    bins = max(1, bins)
+    groups: List[List[str]] = [[] for _ in range(bins)]
+    heap = [(0.0, index) for index in range(bins)]
+    for model in sorted(weights, key=lambda name: (-weights[name], name)):
+        load, index = heapq.heappop(heap)
+        groups[index].append(model)
+        heapq.heappush(heap, (load + weights[model], index))
+    return groups
+
+
+def _model_weight(pointer_store: RunPointerStore, model: str, mode: str) -> Optional[float]:
+    """
+    Peso do model a partir do último manifest publicado no `_CURRENT`.
+
+    Em `inc` usa a última execução incremental (mais representativa do
+    delta); em `full`, a base. O tamanho em bytes do Parquet é o proxy de
+    custo por considerar linhas e largura; `records_count` é o fallback.
+    """
+    pointer = pointer_store.load(model)
+    if not pointer:
+        return None
+    runs = list(pointer.get("incremental", [])) if mode == "inc" else []
+    run = runs[-1] if runs else pointer.get("base")
+    if not run or not run.get("manifest"):
+        return None
+    manifest = load_run_manifest(run["manifest"])
+    if not manifest:
+        return None
+    weight = manifest.get("bytes") or manifest.get("records_count")
+    return float(weight) if weight else None
+
+
+def estimate_model_weights(
+    models: List[str],
+    *,
+    mode: str,
+    pointer_store: Optional[RunPointerStore] = None,
+) -> Dict[str, float]:
+    """
+    Estima o custo de cada model pelo histórico publicado.
+
+    Models sem histórico recebem a mediana dos conhecidos, para não serem
+    todos empilhados no mesmo task.
+    """
+    store = pointer_store or RunPointerStore()
+
+    def weight_or_none(model: str) -> Optional[float]:
+        try:
+            return _model_weight(store, model, mode)
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao estimar peso de {model}: {exc}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=_WEIGHT_WORKERS) as executor:
+        known = dict(zip(models, executor.map(weight_or_none, models)))
+
+    measured = [weight for weight in known.values() if weight]
+    default = statistics.median(measured) if measured else _DEFAULT_WEIGHT
+    return {model: weight or default for model, weight in known.items()}
+
+
+class ShardPlanStore:
+    """
+    Persiste o plano de sharding de uma execução do Cloud Run Job.
+
+    O primeiro task grava o plano com `if_generation_match=0`; os demais
+    leem o mesmo objeto. Assim todos usam a mesma partição mesmo que um
+    task comece depois de outro já ter publicado novos manifests.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket_name: Optional[str] = None,
+        base_path: Optional[str] = None,
+    ):
+        self.bucket_name = (bucket_name or _GCS_BUCKET).strip()
+        self.base_path = (base_path or _GCS_BASE_PATH).strip("/")
+
+    def _get_blob(self, execution: str) -> storage.Blob:
+        object_name = f"{self.base_path}/{_SHARDS_FOLDER}/{execution}.json".lstrip("/")
+        return _get_storage_client().bucket(self.bucket_name).blob(object_name)
+
+    def load_or_create(
+        self,
+        execution: str,
+        build: Callable[[], List[List[str]]],
+    ) -> List[List[str]]:
+        blob = self._get_blob(execution)
+        if blob.exists():
+            return json.loads(blob.download_as_text(encoding="utf-8"))["shards"]
+
+        shards = build()
+        try:
+            blob.upload_from_string(
+                json.dumps({"execution": execution, "shards": shards}, ensure_ascii=False),
+                content_type="application/json",
+                if_generation_match=0,
+            )
+            logger.info(f"🧩 Plano de sharding gravado para {execution}")
+            return shards
+        except PreconditionFailed:
+            # Outro task gravou primeiro: usa o plano dele.
+            return json.loads(blob.download_as_text(encoding="utf-8"))["shards"]
+
+
+def select_task_models(models: List[str], *, mode: str) -> List[str]:
+    """
+    Retorna a fatia de models deste task (`CLOUD_RUN_TASK_INDEX`/`CLOUD_RUN_TASK_COUNT`).
+
+    Com um único task devolve a lista inteira. Os grupos são balanceados
+    pelo custo histórico de cada model, não pela quantidade de models.
+    """
+    task_count = env_int("CLOUD_RUN_TASK_COUNT", 1)
+    task_index = env_int("CLOUD_RUN_TASK_INDEX", 0)
+    if task_count <= 1:
+        return models
+
+    def build() -> List[List[str]]:
+        weights = estimate_model_weights(models, mode=mode)
+        return lpt_partition(weights, task_count)
+
+    execution = os.getenv("CLOUD_RUN_EXECUTION")
+    shards = ShardPlanStore().load_or_create(execution, build) if execution else build()
+    selected = shards[task_index] if task_index < len(shards) else []
+
+    logger.info(
+        f"🧩 Task {task_index + 1}/{task_count}: {len(selected)} de {len(models)} models"
+    )
+    return selected
+
+
+def schedule_job_models(models: List[str], *, mode: str) -> Iterable[str]:
+    """
+    Models que este task do job deve extrair, conforme `JOB_SCHEDULING`.
+
+    - `static` (default): fatia fixa calculada por `select_task_models`.
+    - `lease`: fila dinâmica em `_leases/<JOB_QUEUE_ID|CLOUD_RUN_EXECUTION>/`,
+      dos models mais pesados para os mais leves; cada task pega o próximo
+      model livre ao terminar o atual.
+    """
+    scheduling = os.getenv("JOB_SCHEDULING", "static").strip().lower()
+    if scheduling != "lease":
+        return select_task_models(models, mode=mode)
+
+    queue_id = os.getenv("JOB_QUEUE_ID") or os.getenv("CLOUD_RUN_EXECUTION")
+    if not queue_id:
+        logger.warning(
+            "⚠️ JOB_SCHEDULING=lease sem JOB_QUEUE_ID/CLOUD_RUN_EXECUTION — usando sharding estático"
+        )
+        return select_task_models(models, mode=mode)
+
+    weights = estimate_model_weights(models, mode=mode)
+    ordered = sorted(models, key=lambda model: (-weights[model], model))
+    logger.info(f"🎫 Fila por leases '{queue_id}' com {len(ordered)} models")
+    return LeaseQueue(queue_id, ordered)
@@ -0,0 +1,264 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from google.cloud import storage
+from loguru import logger
+
+from src.utils import env_int
+
+_storage_client: Optional[storage.Client] = None
+_GCS_BUCKET = "gobrax-data-lake"
+_GCS_BASE_PATH = "data-lake/odoo"
+_LEASES_FOLDER = "_leases"
+_DEFAULT_LEASE_SECONDS = 300
+# Um `done` vale por uma passada da fila: o timeout padrão de um task do job (12h).
+_DEFAULT_DONE_SECONDS = 12 * 60 * 60
+
+
+def _get_storage_client() -> storage.Client:
+    """Retorna instância singleton do client do GCS."""
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def _safe_model_name(model: str) -> str:
+    return model.replace(".", "_")
+
+
+def default_lease_owner() -> str:
+    """
+    Identificador estável de quem processa a fila.
+
+    Em Cloud Run Jobs usa `<execution>/<task>`, assim um task reiniciado
+    reconhece (e retoma) os leases que ele mesmo deixou para trás.
+    """
+    execution = os.getenv("CLOUD_RUN_EXECUTION")
+    if execution:
+        return f"{execution}/{os.getenv('CLOUD_RUN_TASK_INDEX', '0')}"
+    return f"{socket.gethostname()}/{os.getpid()}"
+
+
+class _Heartbeat:
+    """Renova o lease do model em andamento até ser parado."""
+
+    def __init__(self, queue: "LeaseQueue", model: str):
+        self._queue = queue
+        self._model = model
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"lease-{model}",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        interval = max(1.0, self._queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            if not self._queue.renew(self._model):
+                return
+
+
+class LeaseQueue:
+    """
+    Fila de models compartilhada entre tasks/réplicas via leases no GCS.
+
+    Cada model tem um objeto `_leases/<queue_id>/<model>.json`. Quem cria o
+    objeto (`if_generation_match=0`) ou assume um lease expirado (precondição
+    na geração lida) fica com o model; o lease é renovado em background até
+    o consumidor reportar o resultado com `finish` (`complete` em sucesso,
+    `release` em falha). Models já concluídos ou com lease ativo de outro
+    owner são pulados.
+
+    O `done` expira depois de `GCS_LEASE_DONE_SECONDS` (default 12h): reusar
+    o mesmo `queue_id` depois disso extrai os models de novo, em vez de
+    pular todos para sempre.
+    """
+
+    def __init__(
+        self,
+        queue_id: str,
+        models: List[str],
+        *,
+        owner: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+        done_seconds: Optional[int] = None,
+        bucket_name: Optional[str] = None,
+        base_path: Optional[str] = None,
+    ):
+        self.queue_id = queue_id
+        self.models = list(models)
+        self.owner = owner or default_lease_owner()
+        self.lease_seconds = lease_seconds or env_int(
+            "GCS_LEASE_SECONDS", _DEFAULT_LEASE_SECONDS
+        )
+        self.done_seconds = done_seconds or env_int(
+            "GCS_LEASE_DONE_SECONDS", _DEFAULT_DONE_SECONDS
+        )
+        self.bucket_name = (bucket_name or _GCS_BUCKET).strip()
+        self.base_path = (base_path or _GCS_BASE_PATH).strip("/")
+        self._generations: Dict[str, int] = {}
+        self._heartbeats: Dict[str, _Heartbeat] = {}
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_models()
+
+    def _object_name(self, model: str) -> str:
+        return (
+            f"{self.base_path}/{_LEASES_FOLDER}/{self.queue_id}/"
+            f"{_safe_model_name(model)}.json"
+        ).lstrip("/")
+
+    def _get_blob(self, model: str) -> storage.Blob:
+        client = _get_storage_client()
+        return client.bucket(self.bucket_name).blob(self._object_name(model))
+
+    def _read(self, model: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Retorna (lease, geração); geração 0 quando o objeto não existe."""
+        client = _get_storage_client()
+        blob = client.bucket(self.bucket_name).get_blob(self._object_name(model))
+        if blob is None:
+            return None, 0
+        try:
+            raw = blob.download_as_text(encoding="utf-8", if_generation_match=blob.generation)
+        except (NotFound, PreconditionFailed):
+            # Alterado entre o metadata e o download: trata como lease ativo de outro.
+            return {"state": "leased", "expires_at": float("inf")}, blob.generation
+        return json.loads(raw), blob.generation
+
+    def _write(self, model: str, state: str, generation: int, **extra: Any) -> bool:
+        """Grava o lease se a geração ainda for `generation`; False se perdeu a corrida."""
+        ttl = self.done_seconds if state == "done" else self.lease_seconds
+        lease = {
+            "model": model,
+            "owner": self.owner,
+            "state": state,
+            "expires_at": time.time() + ttl,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            **extra,
+        }
+        blob = self._get_blob(model)
+        try:
+            blob.upload_from_string(
+                json.dumps(lease, ensure_ascii=False),
+                content_type="application/json",
+                if_generation_match=generation,
+            )
+        except PreconditionFailed:
+            return False
+        with self._lock:
+            self._generations[model] = blob.generation
+        return True
+
+    def try_claim(self, model: str) -> Optional[bool]:
+        """
+        Tenta assumir o model.
+
+        Retorna True se o lease é nosso, False se o model já foi concluído
+        (`done` ainda válido) e None se outro owner detém um lease válido.
+        """
+        lease, generation = self._read(model)
+        if lease is not None:
+            active = lease.get("expires_at", 0) > time.time()
+            if active and lease.get("state") == "done":
+                logger.info(f"⏭️ {model} já concluído na fila {self.queue_id} ({lease.get('owner')})")
+                return False
+            if active and lease.get("owner") != self.owner:
+                return None
+        if self._write(model, "leased", generation):
+            return True
+        # Outro owner escreveu entre a leitura e a escrita.
+        return None
+
+    def renew(self, model: str) -> bool:
+        with self._lock:
+            generation = self._generations.get(model)
+        if generation is None or not self._write(model, "leased", generation):
+            logger.warning(f"⚠️ Lease de {model} perdido para outro owner")
+            return False
+        return True
+
+    def _stop_heartbeat(self, model: str) -> None:
+        with self._lock:
+            heartbeat = self._heartbeats.pop(model, None)
+        if heartbeat is not None:
+            heartbeat.stop()
+
+    def complete(self, model: str) -> None:
+        self._stop_heartbeat(model)
+        with self._lock:
+            generation = self._generations.get(model)
+        if generation is None or not self._write(model, "done", generation):
+            logger.warning(f"⚠️ Não foi possível marcar {model} como concluído (lease perdido)")
+        with self._lock:
+            self._generations.pop(model, None)
+
+    def release(self, model: str) -> None:
+        """Devolve o model à fila sem concluí-lo (ex.: falha ou processo interrompido)."""
+        self._stop_heartbeat(model)
+        with self._lock:
+            generation = self._generations.pop(model, None)
+        if generation is None:
+            return
+        try:
+            self._get_blob(model).delete(if_generation_match=generation)
+        except (NotFound, PreconditionFailed):
+            pass
+
+    def finish(self, model: str, *, success: bool) -> None:
+        """Reporta o resultado do model: `done` em sucesso, de volta à fila em falha."""
+        if success:
+            self.complete(model)
+        else:
+            self.release(model)
+
+    def iter_models(self) -> Iterator[str]:
+        """
+        Gera os models assumidos por este owner, um de cada vez.
+
+        O lease do model entregue é renovado enquanto o consumidor o
+        processa, até ele chamar `finish`. Model sem resultado reportado
+        quando o próximo é pedido (ou o gerador é fechado) volta à fila.
+        Ao final, models que estavam com outro owner são reavaliados uma
+        vez para assumir leases que expiraram no meio tempo.
+        """
+        deferred: List[str] = []
+        for candidates, defer in ((self.models, True), (deferred, False)):
+            for model in list(candidates):
+                try:
+                    claimed = self.try_claim(model)
+                except Exception as exc:
+                    logger.warning(f"⚠️ Falha ao consultar lease de {model}: {exc}")
+                    continue
+                if claimed is None and defer:
+                    deferred.append(model)
+                if not claimed:
+                    continue
+
+                logger.info(f"🎫 Lease de {model} assumido por {self.owner}")
+                heartbeat = _Heartbeat(self, model)
+                with self._lock:
+                    self._heartbeats[model] = heartbeat
+                heartbeat.start()
+                try:
+                    yield model
+                finally:
+                    with self._lock:
+                        pending = model in self._generations
+                    if pending:
+                        self.release(model)
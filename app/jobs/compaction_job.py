@@ -0,0 +1,51 @@
+import os
+from loguru import logger
+
+from app.engine.compactor import run_compaction
+from app.engine.models_registry import ModelsRegistry
+
+
+def _select_models(prefix: str | None) -> list[str]:
+    registry = ModelsRegistry()
+    all_models = registry.load()
+
+    if not all_models:
+        logger.error("❌ Nenhum model encontrado no registry. Job abortado.")
+        raise SystemExit(1)
+
+    if prefix:
+        models = [model for model in all_models if model.startswith(prefix)]
+        logger.info(f"🔍 Prefix '{prefix}': {len(models)} models")
+        if not models:
+            logger.error(f"❌ Nenhum model encontrado para o prefix '{prefix}'.")
+            raise SystemExit(1)
+        return models
+
+    logger.info(f"📋 {len(all_models)} models carregados para compactação")
+    return all_models
+
+
+def main() -> None:
+    """
+    Entrypoint do Cloud Run Job para COMPACTAÇÃO.
+
+    Gera, por model, o snapshot com a versão mais recente de cada `id`.
+    """
+
+    logger.info("🗜️ Iniciando COMPACTAÇÃO (Cloud Run Job)")
+
+    prefix = os.getenv("ODOO_MODELS_PREFIX")
+    models = _select_models(prefix)
+
+    result = run_compaction(models=models)
+
+    logger.success(
+        "🏁 Compactação finalizada — "
+        f"{result['successful']} sucesso, "
+        f"{result['empty']} vazios, "
+        f"{result['failed']} erros"
+    )
+
+
+if __name__ == "__main__":
+    main()
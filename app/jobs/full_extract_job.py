@@ -3,6 +3,8 @@ from loguru import logger
 
 from app.engine.extractor import run_extraction
 from app.engine.models_registry import ModelsRegistry
+from app.engine.profiling import resolve_profile_mode
+from app.engine.sharding import schedule_job_models
 
 
 def _select_models(prefix: str | None) -> list[str]:
@@ -37,6 +39,13 @@ def main() -> None:
 
     logger.info("🚀 Iniciando FULL EXTRACT (Cloud Run Job)")
 
+    # Valida ETL_PROFILE antes de carregar o registry e agendar models.
+    try:
+        profile = resolve_profile_mode(None)
+    except ValueError as exc:
+        logger.error(f"❌ {exc}")
+        raise SystemExit(1)
+
     # Configurações de execução batch
     batch_size = int(os.getenv("ODOO_BATCH_SIZE", "2000"))
     prefix = os.getenv("ODOO_MODELS_PREFIX")
@@ -45,6 +54,10 @@ def main() -> None:
 
     # Carrega registry de models
     models = _select_models(prefix)
+    models = schedule_job_models(models, mode="full")
+    if not models:
+        logger.info("ℹ️ Nenhum model atribuído a este task. Nada a fazer.")
+        return
 
     # Executa engine
     result = run_extraction(
@@ -53,6 +66,7 @@ def main() -> None:
         limit=limit,
         batch_size=batch_size,
         incremental=False,
+        profile=profile,
     )
 
     logger.success(
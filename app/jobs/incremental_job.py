@@ -1,8 +1,14 @@
 import os
+from datetime import datetime, timezone
+
 from loguru import logger
 
 from app.engine.extractor import run_extraction
 from app.engine.models_registry import ModelsRegistry
+from app.engine.profiling import resolve_profile_mode
+from app.engine.scheduler import ChangeRateScheduler
+from app.engine.sharding import schedule_job_models
+from src.utils import env_flag
 
 
 def _select_models(prefix: str | None) -> list[str]:
@@ -32,6 +38,13 @@ def main() -> None:
 
     logger.info("Iniciando INCREMENTAL EXTRACT (Cloud Run Job)")
 
+    # Valida ETL_PROFILE antes de carregar o registry e agendar models.
+    try:
+        profile = resolve_profile_mode(None)
+    except ValueError as exc:
+        logger.error(str(exc))
+        raise SystemExit(1)
+
     batch_size = int(os.getenv("ODOO_BATCH_SIZE", "2000"))
     prefix = os.getenv("ODOO_MODELS_PREFIX")
     limit_env = os.getenv("ODOO_LIMIT")
@@ -40,14 +53,34 @@ def main() -> None:
 
     models = _select_models(prefix)
 
+    # Com SCHEDULER_ADAPTIVE, extrai apenas os models cuja cadencia (hot/warm/cold) venceu.
+    scheduler = ChangeRateScheduler() if env_flag("SCHEDULER_ADAPTIVE") else None
+    invoked_at = datetime.now(timezone.utc)
+    if scheduler:
+        models = scheduler.due_models(models, now=invoked_at)
+        if not models:
+            logger.info("Nenhum model vencido nesta invocacao. Nada a fazer.")
+            return
+    models = schedule_job_models(models, mode="inc")
+    if not models:
+        logger.info("Nenhum model atribuido a este task. Nada a fazer.")
+        return
+
     result = run_extraction(
         models=models,
         fields=fields,
         limit=limit,
         batch_size=batch_size,
         incremental=True,
+        profile=profile,
     )
 
+    if scheduler:
+        try:
+            scheduler.record_results(result["results"], now=invoked_at)
+        except Exception as exc:
+            logger.warning(f"Falha ao atualizar estado do scheduler: {exc}")
+
     logger.success(
         "Incremental extract finalizado - "
         f"{result['successful']} sucesso, "
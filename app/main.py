@@ -14,6 +14,7 @@ def main() -> None:
     Em MODE=job, a variavel JOB_TYPE controla o fluxo:
     - JOB_TYPE=full (default)
     - JOB_TYPE=inc
+    - JOB_TYPE=compact (snapshot deduplicado por id)
     """
 
     mode = os.getenv("MODE", "service").lower()
@@ -39,16 +40,24 @@ def main() -> None:
 
         if job_type == "full":
             from app.jobs.full_extract_job import main as job_main
-
-            job_main()
         elif job_type == "inc":
             from app.jobs.incremental_job import main as job_main
-
-            job_main()
+        elif job_type == "compact":
+            from app.jobs.compaction_job import main as job_main
         else:
             logger.error(f"JOB_TYPE invalido: {job_type}")
             sys.exit(1)
 
+        from src.metrics import export_job_metrics
+        from src.tracing import shutdown_tracing
+
+        try:
+            job_main()
+        finally:
+            # Jobs nao tem scrape: exporta via Pushgateway/textfile se configurado.
+            export_job_metrics(f"odoo-extractor-{job_type}")
+            shutdown_tracing()
+
     else:
         logger.error(f"MODE invalido: {mode}")
         sys.exit(1)
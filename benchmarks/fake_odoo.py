@@ -0,0 +1,296 @@
+"""
+Servidor XML-RPC local que imita o Odoo para benchmarks da extração.
+
+Implementa `authenticate` (`/xmlrpc/2/common`) e `execute_kw` com
+`fields_get`, `search_read` e `search_count` (`/xmlrpc/2/object`) sobre
+models sintéticos: largura, quantidade de linhas, mistura de tipos de campo
+e latência por chamada configuráveis. Os registros são gerados de forma
+determinística a partir de `seed`, model e id, então duas execuções com os
+mesmos parâmetros recebem exatamente os mesmos dados.
+
+O domínio do `search_read` é ignorado (os benchmarks extraem em full).
+O tempo que o servidor gasta gerando e serializando respostas fica em
+`server_stats` (`/xmlrpc/2/common`), para ser descontado do `fetch`.
+"""
+import base64
+import multiprocessing
+import random
+import socketserver
+import threading
+import time
+import xmlrpc.client
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from xmlrpc.server import MultiPathXMLRPCServer, SimpleXMLRPCDispatcher, SimpleXMLRPCRequestHandler
+
+FAKE_DB = "bench"
+FAKE_LOGIN = "bench@example.com"
+FAKE_PASSWORD = "bench"
+FAKE_UID = 2
+
+# Tipos suportados e peso default de cada um na largura do model.
+DEFAULT_TYPE_MIX: Dict[str, int] = {
+    "char": 4,
+    "integer": 2,
+    "float": 2,
+    "monetary": 1,
+    "boolean": 1,
+    "date": 1,
+    "datetime": 1,
+    "selection": 1,
+    "many2one": 2,
+    "many2many": 1,
+    "text": 1,
+}
+_SELECTION_VALUES = ("draft", "posted", "cancel", "done")
+_EPOCH = datetime(2024, 1, 1)
+
+
+def parse_type_mix(raw: str) -> Dict[str, int]:
+    """Converte `char=4,integer=2,html=1` no dicionário de pesos."""
+    mix: Dict[str, int] = {}
+    for item in raw.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if name not in _GENERATORS:
+            raise ValueError(f"Tipo de campo não suportado: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+@dataclass
+class SyntheticModel:
+    """
+    Model sintético: `width` campos além de `id`, `display_name`,
+    `create_date` e `write_date`, distribuídos por `type_mix`.
+    """
+
+    name: str
+    rows: int
+    width: int = 30
+    type_mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_TYPE_MIX))
+    null_ratio: float = 0.1
+    seed: int = 0
+
+    def fields(self) -> Dict[str, Dict[str, Any]]:
+        types = [name for name, weight in sorted(self.type_mix.items()) for _ in range(weight)]
+        metadata: Dict[str, Dict[str, Any]] = {
+            "id": {"type": "integer", "string": "ID"},
+            "display_name": {"type": "char", "string": "Display Name"},
+            "create_date": {"type": "datetime", "string": "Created on"},
+            "write_date": {"type": "datetime", "string": "Last Updated on"},
+        }
+        for index in range(self.width):
+            field_type = types[index % len(types)]
+            info: Dict[str, Any] = {"type": field_type, "string": f"Campo {index}"}
+            if field_type in {"many2one", "many2many", "one2many"}:
+                info["relation"] = "res.partner"
+            metadata[f"x_{field_type}_{index}"] = info
+        return metadata
+
+    def record(self, record_id: int, fields: List[str], metadata: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        rng = random.Random(f"{self.seed}:{self.name}:{record_id}")
+        written = _EPOCH + timedelta(seconds=record_id * 37)
+        record: Dict[str, Any] = {"id": record_id}
+        for name in fields:
+            if name == "id" or name not in metadata:
+                continue
+            if name == "display_name":
+                record[name] = f"{self.name} #{record_id}"
+            elif name in {"create_date", "write_date"}:
+                record[name] = written.strftime("%Y-%m-%d %H:%M:%S")
+            elif rng.random() < self.null_ratio:
+                # O Odoo devolve False para campos vazios de qualquer tipo.
+                record[name] = False
+            else:
+                record[name] = _GENERATORS[metadata[name]["type"]](rng, record_id)
+        return record
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(f"w{rng.randrange(5000)}" for _ in range(count))
+
+
+_GENERATORS = {
+    "char": lambda rng, _: _words(rng, rng.randint(1, 6)),
+    "text": lambda rng, _: _words(rng, rng.randint(20, 80)),
+    "html": lambda rng, _: f"<p>{_words(rng, rng.randint(50, 400))}</p>",
+    # O Odoo devolve campos binary como base64 em texto.
+    "binary": lambda rng, _: base64.b64encode(rng.randbytes(rng.randint(256, 16_384))).decode("ascii"),
+    "integer": lambda rng, _: rng.randint(-(2**31), 2**31 - 1),
+    "float": lambda rng, _: round(rng.uniform(-1e6, 1e6), 4),
+    "monetary": lambda rng, _: round(rng.uniform(0, 1e5), 2),
+    "boolean": lambda rng, _: rng.random() < 0.5,
+    "date": lambda rng, _: (_EPOCH + timedelta(days=rng.randrange(730))).strftime("%Y-%m-%d"),
+    "datetime": lambda rng, _: (_EPOCH + timedelta(seconds=rng.randrange(63_072_000))).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    ),
+    "selection": lambda rng, _: rng.choice(_SELECTION_VALUES),
+    "many2one": lambda rng, _: [rng.randint(1, 10_000), f"Parceiro {rng.randint(1, 10_000)}"],
+    "many2many": lambda rng, _: sorted(rng.sample(range(1, 10_000), rng.randint(0, 5))),
+    "one2many": lambda rng, _: sorted(rng.sample(range(1, 10_000), rng.randint(0, 5))),
+}
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+    # Respostas sem gzip, como o XML-RPC do Odoo.
+    encode_threshold = None
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, MultiPathXMLRPCServer):
+    daemon_threads = True
+
+
+class _TimedDispatcher(SimpleXMLRPCDispatcher):
+    """Aplica a latência simulada e mede o trabalho do servidor por chamada."""
+
+    def __init__(self, latency: float):
+        super().__init__(allow_none=True)
+        self.latency = latency
+        self.calls = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _marshaled_dispatch(self, data: bytes, dispatch_method: Any = None, path: Any = None) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        started = time.perf_counter()
+        response = super()._marshaled_dispatch(data, dispatch_method, path)
+        with self._lock:
+            self.calls += 1
+            self.seconds += time.perf_counter() - started
+        return response
+
+
+class FakeOdooServer:
+    """Servidor XML-RPC com os models sintéticos; `latency_ms` é somada a cada chamada."""
+
+    def __init__(
+        self,
+        models: List[SyntheticModel],
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+    ):
+        self.models = {model.name: model for model in models}
+        self._metadata = {name: model.fields() for name, model in self.models.items()}
+        self._server = _ThreadingServer(
+            (host, port),
+            requestHandler=_RequestHandler,
+            logRequests=False,
+            allow_none=True,
+        )
+
+        common = SimpleXMLRPCDispatcher(allow_none=True)
+        common.register_function(self.authenticate, "authenticate")
+        common.register_function(lambda: {"server_version": "17.0-fake"}, "version")
+        common.register_function(self.server_stats, "server_stats")
+        self._objects = _TimedDispatcher(latency_ms / 1000)
+        self._objects.register_function(self.execute_kw, "execute_kw")
+        self._server.add_dispatcher("/xmlrpc/2/common", common)
+        self._server.add_dispatcher("/xmlrpc/2/object", self._objects)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def authenticate(self, db: str, login: str, password: str, context: Dict[str, Any]) -> Any:
+        if (db, login, password) == (FAKE_DB, FAKE_LOGIN, FAKE_PASSWORD):
+            return FAKE_UID
+        return False
+
+    def server_stats(self) -> Dict[str, Any]:
+        """Chamadas ao `/object` e segundos gastos gerando/serializando respostas."""
+        return {"calls": self._objects.calls, "seconds": self._objects.seconds}
+
+    def execute_kw(
+        self,
+        db: str,
+        uid: int,
+        password: str,
+        model: str,
+        method: str,
+        args: List[Any],
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if uid != FAKE_UID or password != FAKE_PASSWORD:
+            raise xmlrpc.client.Fault(3, "Access Denied")
+        if model not in self.models:
+            raise xmlrpc.client.Fault(2, f"Object {model} doesn't exist (unknown model)")
+
+        kwargs = kwargs or {}
+        spec = self.models[model]
+        metadata = self._metadata[model]
+        if method == "fields_get":
+            attributes = kwargs.get("attributes")
+            if not attributes:
+                return metadata
+            return {
+                name: {key: value for key, value in info.items() if key in attributes}
+                for name, info in metadata.items()
+            }
+        if method == "search_count":
+            return spec.rows
+        if method == "search_read":
+            fields = kwargs.get("fields") or list(metadata)
+            unknown = [name for name in fields if name not in metadata]
+            if unknown:
+                raise xmlrpc.client.Fault(2, f"Invalid field {unknown[0]!r} on model {model!r}")
+            offset = int(kwargs.get("offset") or 0)
+            limit = kwargs.get("limit")
+            stop = spec.rows if not limit else min(spec.rows, offset + int(limit))
+            return [spec.record(record_id, fields, metadata) for record_id in range(offset + 1, stop + 1)]
+        raise xmlrpc.client.Fault(1, f"NotImplementedError: {method}")
+
+    def start(self) -> "FakeOdooServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOdooServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def _serve(models: List[SyntheticModel], latency_ms: float, ready: Any) -> None:
+    server = FakeOdooServer(models, latency_ms=latency_ms)
+    ready.put(server.url)
+    server.serve_forever()
+
+
+def start_server_process(
+    models: List[SyntheticModel],
+    *,
+    latency_ms: float = 0.0,
+) -> Tuple[multiprocessing.Process, str]:
+    """
+    Sobe o servidor em outro processo, para que a geração e a serialização
+    das respostas não contem no CPU nem no RSS medidos da extração.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    process = context.Process(target=_serve, args=(models, latency_ms, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
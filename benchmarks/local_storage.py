@@ -0,0 +1,190 @@
+"""
+Substituto do `google.cloud.storage.Client` sobre o sistema de arquivos.
+
+Cobre a superfície usada pela extração (upload/download com precondição de
+geração, `get_blob`, `list_blobs`, `delete`, `open`) e grava cada objeto em
+`<root>/<bucket>/<nome do objeto>`. `install_local_storage` injeta o client
+nos singletons `_storage_client` de todos os módulos que acessam o bucket.
+"""
+import importlib
+import os
+import threading
+from datetime import datetime, timezone
+from itertools import count
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+_STORAGE_MODULES = (
+    "src.storage",
+    "app.engine.cursor_store",
+    "app.engine.models_registry",
+    "app.engine.run_pointer",
+    "app.engine.scheduler",
+    "app.engine.sharding",
+    "app.engine.work_queue",
+)
+
+
+class LocalBlob:
+    def __init__(self, client: "LocalStorageClient", bucket_name: str, name: str):
+        self._client = client
+        self.bucket_name = bucket_name
+        self.name = name
+        self.generation: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._client.root, self.bucket_name, self.name)
+
+    @property
+    def size(self) -> Optional[int]:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else None
+
+    @property
+    def time_created(self) -> Optional[datetime]:
+        if not os.path.exists(self.path):
+            return None
+        return datetime.fromtimestamp(os.path.getmtime(self.path), tz=timezone.utc)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def reload(self) -> None:
+        if not self.exists():
+            raise NotFound(self.name)
+        self.generation = self._client._generation(self.path)
+
+    def _check(self, if_generation_match: Optional[int]) -> None:
+        if if_generation_match is None:
+            return
+        current = self._client._generation(self.path) if self.exists() else 0
+        if current != if_generation_match:
+            raise PreconditionFailed(self.name)
+
+    def upload_from_string(
+        self,
+        data: Any,
+        content_type: Optional[str] = None,
+        if_generation_match: Optional[int] = None,
+    ) -> None:
+        payload = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        with self._client._lock:
+            self._check(if_generation_match)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporary = f"{self.path}.tmp-{threading.get_ident()}"
+            with open(temporary, "wb") as handle:
+                handle.write(payload)
+            os.replace(temporary, self.path)
+            self.generation = self._client._bump(self.path)
+
+    def upload_from_file(
+        self,
+        file_obj: IO[bytes],
+        rewind: bool = False,
+        size: Optional[int] = None,
+        content_type: Optional[str] = None,
+        if_generation_match: Optional[int] = None,
+    ) -> None:
+        if rewind:
+            file_obj.seek(0)
+        data = file_obj.read(size) if size is not None else file_obj.read()
+        self.upload_from_string(data, content_type=content_type, if_generation_match=if_generation_match)
+
+    def download_as_bytes(self, if_generation_match: Optional[int] = None) -> bytes:
+        with self._client._lock:
+            if not self.exists():
+                raise NotFound(self.name)
+            self._check(if_generation_match)
+            with open(self.path, "rb") as handle:
+                return handle.read()
+
+    def download_as_text(self, encoding: str = "utf-8", if_generation_match: Optional[int] = None) -> str:
+        return self.download_as_bytes(if_generation_match=if_generation_match).decode(encoding)
+
+    def open(self, mode: str = "rb", **kwargs: Any) -> IO[Any]:
+        if "r" in mode and not self.exists():
+            raise NotFound(self.name)
+        return open(self.path, mode)
+
+    def delete(self, if_generation_match: Optional[int] = None) -> None:
+        with self._client._lock:
+            if not self.exists():
+                raise NotFound(self.name)
+            self._check(if_generation_match)
+            os.remove(self.path)
+            self._client._generations.pop(self.path, None)
+
+
+class LocalBucket:
+    def __init__(self, client: "LocalStorageClient", name: str):
+        self.client = client
+        self.name = name
+
+    def blob(self, name: str) -> LocalBlob:
+        return LocalBlob(self.client, self.name, name)
+
+    def get_blob(self, name: str) -> Optional[LocalBlob]:
+        blob = self.blob(name)
+        try:
+            blob.reload()
+        except NotFound:
+            return None
+        return blob
+
+    def list_blobs(self, prefix: Optional[str] = None) -> Iterator[LocalBlob]:
+        return self.client.list_blobs(self.name, prefix=prefix)
+
+
+class LocalStorageClient:
+    """Client de storage com objetos em `<root>/<bucket>/...` e gerações em memória."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.RLock()
+        self._generations: Dict[str, int] = {}
+        self._counter = count(1)
+
+    def _generation(self, path: str) -> int:
+        # Objetos de execuções anteriores ganham uma geração na primeira leitura.
+        with self._lock:
+            if path not in self._generations:
+                self._generations[path] = next(self._counter)
+            return self._generations[path]
+
+    def _bump(self, path: str) -> int:
+        self._generations[path] = next(self._counter)
+        return self._generations[path]
+
+    def bucket(self, name: str) -> LocalBucket:
+        return LocalBucket(self, name)
+
+    def list_blobs(self, bucket_or_name: Any, prefix: Optional[str] = None) -> Iterator[LocalBlob]:
+        bucket_name = getattr(bucket_or_name, "name", bucket_or_name)
+        bucket_root = os.path.join(self.root, bucket_name)
+        names: List[str] = []
+        for directory, _, files in os.walk(bucket_root):
+            for file_name in files:
+                if ".tmp-" in file_name:
+                    continue
+                relative = os.path.relpath(os.path.join(directory, file_name), bucket_root)
+                name = relative.replace(os.sep, "/")
+                if not prefix or name.startswith(prefix):
+                    names.append(name)
+        for name in sorted(names):
+            blob = LocalBlob(self, bucket_name, name)
+            blob.generation = self._generation(blob.path)
+            yield blob
+
+    def path_for_uri(self, uri: str) -> str:
+        """Caminho local de uma URI `gs://bucket/objeto`."""
+        bucket_name, _, object_name = uri.removeprefix("gs://").partition("/")
+        return os.path.join(self.root, bucket_name, object_name)
+
+
+def install_local_storage(root: str) -> LocalStorageClient:
+    """Aponta os singletons de storage da aplicação para o diretório `root`."""
+    client = LocalStorageClient(root)
+    for module_name in _STORAGE_MODULES:
+        importlib.import_module(module_name)._storage_client = client
+    return client
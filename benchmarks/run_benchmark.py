@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta de `run_extraction` sem rede nem GCS.
+
+Sobe o Odoo falso (`benchmarks.fake_odoo`) em outro processo, aponta o
+storage para um diretório local (`benchmarks.local_storage`) e executa um
+full refresh dos models sintéticos. Reporta linhas/s, MB/s de Parquet,
+pico de RSS do processo da extração e o tempo somado de cada etapa
+(`schema`, `fetch`, `transform`, `encode`, `upload`, `cursor`). O `fetch`
+inclui o tempo do próprio servidor falso, reportado à parte em `server_s`.
+
+Com `--replay-dir`, em vez do servidor falso usa respostas reais gravadas
+com `ODOO_TRANSPORT_MODE=record` (`src.odoo_extractor.recording`).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.run_benchmark --models 3 --rows 50000 --width 40
+    python -m benchmarks.run_benchmark --type-mix char=2,html=1,many2many=1 --output bench.json
+    python -m benchmarks.run_benchmark --replay-dir recordings --batch-size 2000
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import xmlrpc.client
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_odoo import (
+    DEFAULT_TYPE_MIX,
+    FAKE_DB,
+    FAKE_LOGIN,
+    FAKE_PASSWORD,
+    SyntheticModel,
+    parse_type_mix,
+    start_server_process,
+)
+from benchmarks.local_storage import install_local_storage
+from src.odoo_extractor.recording import recorded_models
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS, bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_models(
+    count: int,
+    *,
+    rows: int,
+    width: int,
+    type_mix: Optional[Dict[str, int]] = None,
+    null_ratio: float = 0.1,
+    seed: int = 0,
+) -> List[SyntheticModel]:
+    return [
+        SyntheticModel(
+            name=f"bench.model_{index}",
+            rows=rows,
+            width=width,
+            type_mix=dict(type_mix or DEFAULT_TYPE_MIX),
+            null_ratio=null_ratio,
+            seed=seed,
+        )
+        for index in range(count)
+    ]
+
+
+def run_benchmark(
+    models: List[str],
+    *,
+    storage_root: str,
+    server_url: Optional[str] = None,
+    batch_size: int = 2000,
+) -> Dict[str, Any]:
+    """
+    Executa a extração e devolve as medições. Sem `server_url`, a conexão
+    segue o ambiente (ex.: `ODOO_TRANSPORT_MODE=replay`).
+    """
+    if server_url:
+        os.environ.update(
+            {
+                "ODOO_URL": server_url,
+                "ODOO_DB": FAKE_DB,
+                "ODOO_USERNAME": FAKE_LOGIN,
+                "ODOO_PASSWORD": FAKE_PASSWORD,
+            }
+        )
+    client = install_local_storage(storage_root)
+
+    # Importado depois do storage para valer também em imports preguiçosos.
+    from app.engine.extractor import run_extraction
+
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    summary = run_extraction(
+        models=models,
+        fields=None,
+        limit=None,
+        batch_size=batch_size,
+        incremental=False,
+    )
+    seconds = time.perf_counter() - started
+
+    stages: Dict[str, float] = {}
+    parquet_bytes = 0
+    for result in summary["results"]:
+        for stage, value in result["stages"].items():
+            stages[stage] = stages.get(stage, 0.0) + value
+        parquet_bytes += sum(
+            os.path.getsize(client.path_for_uri(uri)) for uri in result["file_paths"]
+        )
+
+    rows = summary["total_records"]
+    peak_rss = _peak_rss_mb()
+    report = {
+        "models": len(models),
+        "rows": rows,
+        "batch_size": batch_size,
+        "failed": summary["failed"],
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1) if seconds else 0.0,
+        "parquet_bytes": parquet_bytes,
+        "parquet_mb_per_s": round(parquet_bytes / (1024 * 1024) / seconds, 3) if seconds else 0.0,
+        "peak_rss_mb": round(peak_rss, 1),
+        "rss_growth_mb": round(peak_rss - rss_before, 1),
+        "stages": {stage: round(value, 3) for stage, value in stages.items()},
+    }
+    if server_url:
+        server = xmlrpc.client.ServerProxy(f"{server_url}/xmlrpc/2/common").server_stats()
+        report["rpc_calls"] = server["calls"]
+        report["server_s"] = round(server["seconds"], 3)
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['models']} models, {report['rows']} linhas (batch {report['batch_size']})")
+    print(
+        f"  - tempo={report['seconds']:.3f}s | linhas/s={report['rows_per_s']:.1f} "
+        f"| parquet={report['parquet_bytes']} bytes ({report['parquet_mb_per_s']:.3f} MB/s)"
+    )
+    print(f"  - pico RSS={report['peak_rss_mb']:.1f} MB (+{report['rss_growth_mb']:.1f} MB na extração)")
+    stages = " | ".join(f"{stage}={value:.3f}s" for stage, value in report["stages"].items())
+    print(f"  - etapas: {stages}")
+    if "server_s" in report:
+        print(
+            f"  - servidor falso: {report['rpc_calls']} chamadas, "
+            f"{report['server_s']:.3f}s (incluídos no fetch)"
+        )
+    if report["failed"]:
+        print(f"  - ⚠️ {report['failed']} models falharam")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mede a extração ponta a ponta contra um Odoo XML-RPC falso local."
+    )
+    parser.add_argument("--models", type=int, default=3, help="Quantidade de models sintéticos.")
+    parser.add_argument("--rows", type=int, default=50_000, help="Linhas por model.")
+    parser.add_argument("--width", type=int, default=30, help="Campos por model (além de id/datas).")
+    parser.add_argument(
+        "--type-mix",
+        default=None,
+        help="Pesos dos tipos de campo, ex.: char=4,integer=2,html=1 (default: mistura típica).",
+    )
+    parser.add_argument("--null-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência somada a cada RPC.")
+    parser.add_argument(
+        "--storage-root",
+        default=None,
+        help="Diretório do storage local (default: temporário, removido ao final).",
+    )
+    parser.add_argument(
+        "--replay-dir",
+        default=None,
+        help="Usa as gravações deste diretório em vez do servidor falso (todos os models gravados).",
+    )
+    parser.add_argument("--replay-speed", type=float, default=0.0, help="0 = sem latência; 1 = original.")
+    parser.add_argument("--output", default=None, help="Grava o relatório em JSON.")
+    return parser.parse_args()
+
+
+def _run_replay(args: argparse.Namespace, storage_root: str) -> Dict[str, Any]:
+    os.environ.update(
+        {
+            "ODOO_TRANSPORT_MODE": "replay",
+            "ODOO_RECORDING_DIR": args.replay_dir,
+            "ODOO_REPLAY_SPEED": str(args.replay_speed),
+            "ODOO_PASSWORD": os.getenv("ODOO_PASSWORD") or "replay",
+        }
+    )
+    models = recorded_models(args.replay_dir)
+    if not models:
+        raise SystemExit(f"Nenhuma gravação encontrada em {args.replay_dir}")
+    report = run_benchmark(models, storage_root=storage_root, batch_size=args.batch_size)
+    report["replay_dir"] = args.replay_dir
+    return report
+
+
+def _run_synthetic(args: argparse.Namespace, storage_root: str) -> Dict[str, Any]:
+    models = build_models(
+        args.models,
+        rows=args.rows,
+        width=args.width,
+        type_mix=parse_type_mix(args.type_mix) if args.type_mix else None,
+        null_ratio=args.null_ratio,
+        seed=args.seed,
+    )
+    process, url = start_server_process(models, latency_ms=args.latency_ms)
+    try:
+        report = run_benchmark(
+            [model.name for model in models],
+            server_url=url,
+            storage_root=storage_root,
+            batch_size=args.batch_size,
+        )
+    finally:
+        process.terminate()
+        process.join()
+    report["width"] = args.width
+    report["latency_ms"] = args.latency_ms
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    storage_root = args.storage_root or tempfile.mkdtemp(prefix="odoo-bench-")
+    try:
+        if args.replay_dir:
+            report = _run_replay(args, storage_root)
+        else:
+            report = _run_synthetic(args, storage_root)
+    finally:
+        if args.storage_root is None:
+            shutil.rmtree(storage_root, ignore_errors=True)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
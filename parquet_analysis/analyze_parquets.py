@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 import argparse
-import os
-import tempfile
-from typing import Dict, List, Optional, Set
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 
 import polars as pl
+import pyarrow.parquet as pq
 from google.cloud import storage
 from loguru import logger
 
 _storage_client: Optional[storage.Client] = None
 _DEFAULT_BUCKET = "gobrax-data-lake"
 _DEFAULT_BASE_PATH = "data-lake/odoo"
+# Leituras por range pequenas: footer e column chunks, nunca o arquivo todo.
+_RANGE_READ_BYTES = 1024 * 1024
+_POINTER_FILE_NAME = "_CURRENT.json"
+# Os chunks de uma execução compartilham o prefixo `YYYYMMDD_HHMMSS`.
+_RUN_TIMESTAMP_LENGTH = len("YYYYMMDD_HHMMSS")
+_DEFAULT_WORKERS = 8
 
 
 def _get_storage_client() -> storage.Client:
@@ -43,34 +51,158 @@ def _find_keyword_fields(
     return matched
 
 
+def _parent_dataset(folder: str, folders: Set[str]) -> Optional[str]:
+    """Model dono de um dataset derivado (`<model>__<campo>`, `<model>__snapshot`)."""
+    parent, separator, _ = folder.rpartition("__")
+    while separator:
+        if parent in folders:
+            return parent
+        parent, separator, _ = parent.rpartition("__")
+    return None
+
+
 def discover_models(bucket_name: str, base_path: str) -> List[str]:
+    """
+    Pastas de models no bucket.
+
+    Pastas internas (`_blobs`, `_leases`...) e datasets derivados de outro
+    model — vínculos x2many `<model>__<campo>` e snapshots
+    `<model>__snapshot` — ficam de fora: não são models do registry.
+    """
     client = _get_storage_client()
     prefix = f"{_normalize_base_path(base_path)}/"
 
-    models: Set[str] = set()
+    folders: Set[str] = set()
     iterator = client.list_blobs(bucket_name, prefix=prefix, delimiter="/")
     for page in iterator.pages:
         for found in page.prefixes:
             normalized = found[len(prefix) :].strip("/")
-            if normalized:
-                models.add(normalized)
+            if normalized and not normalized.startswith("_"):
+                folders.add(normalized)
 
-    return sorted(models)
+    derived = {folder for folder in folders if _parent_dataset(folder, folders)}
+    if derived:
+        logger.info(f"🔗 {len(derived)} datasets derivados (vínculos/snapshots) ignorados")
+    return sorted(folders - derived)
 
 
-def pick_latest_blob(bucket_name: str, model: str, base_path: str):
+def _file_name(blob) -> str:
+    return blob.name.rsplit("/", 1)[-1]
+
+
+def list_latest_partition_blobs(bucket_name: str, model: str, base_path: str) -> List:
+    """
+    Lista os Parquets da raiz da model e da partição `run_date=` mais recente.
+
+    No layout particionado evita listar todo o histórico; no layout plano
+    equivale a listar a pasta da model.
+    """
     client = _get_storage_client()
     prefix = f"{_normalize_base_path(base_path)}/{model}/"
 
+    iterator = client.list_blobs(bucket_name, prefix=prefix, delimiter="/")
+    blobs = [blob for blob in iterator if blob.name.endswith(".parquet")]
+    partitions = sorted(
+        found for found in iterator.prefixes if found[len(prefix) :].startswith("run_date=")
+    )
+    if partitions:
+        blobs.extend(
+            blob
+            for blob in client.list_blobs(bucket_name, prefix=partitions[-1])
+            if blob.name.endswith(".parquet")
+        )
+    return blobs
+
+
+def pick_latest_blob(bucket_name: str, model: str, base_path: str):
     latest_blob = None
-    for blob in client.list_blobs(bucket_name, prefix=prefix):
-        if not blob.name.endswith(".parquet"):
-            continue
-        if latest_blob is None or blob.name > latest_blob.name:
+    for blob in list_latest_partition_blobs(bucket_name, model, base_path):
+        if latest_blob is None or _file_name(blob) > _file_name(latest_blob):
             latest_blob = blob
     return latest_blob
 
 
+def _load_json(bucket_name: str, object_name: str) -> Optional[Dict[str, object]]:
+    blob = _get_storage_client().bucket(bucket_name).get_blob(object_name)
+    if blob is None:
+        return None
+    return json.loads(blob.download_as_text(encoding="utf-8"))
+
+
+def _load_pointer(bucket_name: str, model: str, base_path: str) -> Optional[Dict[str, object]]:
+    object_name = f"{_normalize_base_path(base_path)}/{model}/{_POINTER_FILE_NAME}"
+    return _load_json(bucket_name, object_name)
+
+
+def load_manifest(uri: str) -> Optional[Dict[str, object]]:
+    """Carrega o manifest `gs://.../<timestamp>_manifest.json` (None se não existir)."""
+    bucket_name, _, object_name = uri.removeprefix("gs://").partition("/")
+    return _load_json(bucket_name, object_name)
+
+
+def latest_run(bucket_name: str, model: str, base_path: str) -> Dict[str, object]:
+    """
+    Retorna `run_timestamp`, `files` e `manifest` da execução mais recente.
+
+    Usa o ponteiro `_CURRENT.json` quando existe (sem listar o bucket);
+    caso contrário agrupa os Parquets pelo prefixo de timestamp do nome e
+    supõe o manifest ao lado dos chunks.
+    """
+    pointer = _load_pointer(bucket_name, model, base_path)
+    if pointer:
+        runs = [pointer["base"]] if pointer.get("base") else []
+        runs.extend(pointer.get("incremental", []))
+        runs = [run for run in runs if run.get("files")]
+        if runs:
+            latest = max(runs, key=lambda run: run["run_timestamp"])
+            return {
+                "run_timestamp": latest["run_timestamp"],
+                "files": list(latest["files"]),
+                "manifest": latest.get("manifest"),
+            }
+
+    blobs = list_latest_partition_blobs(bucket_name, model, base_path)
+    if not blobs:
+        return {"run_timestamp": None, "files": [], "manifest": None}
+    run_timestamp = max(_file_name(blob)[:_RUN_TIMESTAMP_LENGTH] for blob in blobs)
+    uris = sorted(
+        f"gs://{bucket_name}/{blob.name}"
+        for blob in blobs
+        if _file_name(blob).startswith(run_timestamp)
+    )
+    folder = uris[0].rsplit("/", 1)[0]
+    return {
+        "run_timestamp": run_timestamp,
+        "files": uris,
+        "manifest": f"{folder}/{run_timestamp}_manifest.json",
+    }
+
+
+def latest_run_uris(bucket_name: str, model: str, base_path: str) -> Tuple[Optional[str], List[str]]:
+    """Retorna (timestamp, URIs) de todos os chunks da execução mais recente."""
+    run = latest_run(bucket_name, model, base_path)
+    return run["run_timestamp"], run["files"]
+
+
+def _select_fields(
+    columns: List[str],
+    base_fields: List[str],
+    keyword_terms: List[str],
+    ignored_fields: Set[str],
+) -> Tuple[List[str], List[str]]:
+    """Retorna (campos a analisar em ordem, campos encontrados pelos termos)."""
+    keyword_fields = _find_keyword_fields(columns, keyword_terms, ignored_fields)
+
+    ordered_fields: List[str] = []
+    seen: Set[str] = set()
+    for field in base_fields + keyword_fields:
+        if field in ignored_fields or field in seen:
+            continue
+        ordered_fields.append(field)
+        seen.add(field)
+    return ordered_fields, keyword_fields
+
+
 def _compute_field_stats(df: pl.DataFrame, field: str) -> Dict[str, object]:
     if field not in df.columns:
         return {"available": False}
@@ -103,27 +235,40 @@ def _compute_field_stats(df: pl.DataFrame, field: str) -> Dict[str, object]:
     }
 
 
-def analyze_blob(blob, fields: List[str]) -> Dict[str, object]:
-    with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tmp:
-        temp_path = tmp.name
-
-    try:
-        blob.download_to_filename(temp_path)
-        df = pl.read_parquet(temp_path)
-    finally:
-        try:
-            os.remove(temp_path)
-        except FileNotFoundError:
-            pass
-
-    stats = {
-        field: _compute_field_stats(df, field)
-        for field in fields
-    }
+def _footer_field_stats(metadata, column_index: int) -> Optional[Dict[str, object]]:
+    """
+    Estatísticas de um campo somando os row groups do footer.
+
+    Retorna None quando algum row group não tem estatísticas completas
+    (nesse caso é preciso ler a coluna).
+    """
+    total = metadata.num_rows
+    nulls = 0
+    min_val = None
+    max_val = None
+    for rg_index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg_index)
+        stats = row_group.column(column_index).statistics
+        if stats is None or not stats.has_null_count:
+            return None
+        nulls += stats.null_count
+        if stats.null_count == row_group.num_rows:
+            continue
+        if not stats.has_min_max:
+            return None
+        if not getattr(stats, "is_min_value_exact", True) or not getattr(
+            stats, "is_max_value_exact", True
+        ):
+            return None
+        min_val = stats.min if min_val is None else min(min_val, stats.min)
+        max_val = stats.max if max_val is None else max(max_val, stats.max)
 
     return {
-        "rows": df.height,
-        "stats": stats,
+        "available": True,
+        "total": total,
+        "null_pct": (nulls / total) * 100 if total else 0.0,
+        "min": str(min_val) if min_val is not None else None,
+        "max": str(max_val) if max_val is not None else None,
     }
 
 
@@ -133,49 +278,206 @@ def analyze_blob(
     keyword_terms: List[str],
     ignored_fields: Set[str],
 ) -> Dict[str, object]:
-    with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tmp:
-        temp_path = tmp.name
+    """
+    Calcula estatísticas sem baixar o arquivo inteiro.
+
+    Lê apenas o footer (range read no fim do objeto) e usa as estatísticas
+    dos row groups; só as colunas sem estatísticas completas são lidas,
+    e apenas os column chunks delas.
+    """
+    with blob.open("rb", chunk_size=_RANGE_READ_BYTES) as reader:
+        parquet_file = pq.ParquetFile(reader)
+        metadata = parquet_file.metadata
+        columns = parquet_file.schema_arrow.names
+        column_indexes = {
+            metadata.schema.column(index).path: index
+            for index in range(metadata.num_columns)
+        }
 
-    try:
-        blob.download_to_filename(temp_path)
-        df = pl.read_parquet(temp_path)
-    finally:
-        try:
-            os.remove(temp_path)
-        except FileNotFoundError:
-            pass
+        ordered_fields, keyword_fields = _select_fields(
+            columns, base_fields, keyword_terms, ignored_fields
+        )
 
-    keyword_fields = _find_keyword_fields(df.columns, keyword_terms, ignored_fields)
+        stats: Dict[str, Dict[str, object]] = {}
+        to_read: List[str] = []
+        for field in ordered_fields:
+            if field not in column_indexes:
+                stats[field] = {"available": False}
+                continue
+            footer_stats = _footer_field_stats(metadata, column_indexes[field])
+            if footer_stats is None:
+                to_read.append(field)
+            else:
+                stats[field] = footer_stats
 
-    ordered_fields: List[str] = []
-    seen: Set[str] = set()
+        if to_read:
+            df = pl.from_arrow(parquet_file.read(columns=to_read))
+            for field in to_read:
+                stats[field] = _compute_field_stats(df, field)
+
+    return {
+        "rows": metadata.num_rows,
+        "stats": stats,
+        "keyword_fields": keyword_fields,
+        "columns_read": to_read,
+    }
 
-    def add_field(field: str) -> None:
-        if field in ignored_fields:
-            return
-        if field not in seen:
-            ordered_fields.append(field)
-            seen.add(field)
 
-    for field in base_fields:
-        if field in ignored_fields:
+def analyze_run(
+    uris: List[str],
+    base_fields: List[str],
+    keyword_terms: List[str],
+    ignored_fields: Set[str],
+) -> Dict[str, object]:
+    """
+    Calcula estatísticas sobre todos os chunks de uma execução.
+
+    Faz um scan lazy dos arquivos com projeção apenas dos campos
+    selecionados e agrega nulls/min/max em um único select.
+    """
+    lazy = pl.scan_parquet(uris, missing_columns="insert", extra_columns="ignore")
+    columns = lazy.collect_schema().names()
+    ordered_fields, keyword_fields = _select_fields(
+        columns, base_fields, keyword_terms, ignored_fields
+    )
+    present = [field for field in ordered_fields if field in columns]
+
+    exprs: List[pl.Expr] = [pl.len().alias("\x00rows")]
+    for field in present:
+        values = pl.col(field).cast(pl.Utf8)
+        exprs.extend(
+            [
+                values.null_count().alias(f"{field}\x00nulls"),
+                values.min().alias(f"{field}\x00min"),
+                values.max().alias(f"{field}\x00max"),
+            ]
+        )
+    row = lazy.select(exprs).collect(engine="streaming").row(0, named=True)
+    total = row["\x00rows"]
+
+    stats: Dict[str, Dict[str, object]] = {}
+    for field in ordered_fields:
+        if field not in columns:
+            stats[field] = {"available": False}
             continue
-        add_field(field)
-    for field in keyword_fields:
-        add_field(field)
+        nulls = row[f"{field}\x00nulls"]
+        stats[field] = {
+            "available": True,
+            "total": total,
+            "null_pct": (nulls / total) * 100 if total else 0.0,
+            "min": row[f"{field}\x00min"],
+            "max": row[f"{field}\x00max"],
+        }
 
-    stats = {
-        field: _compute_field_stats(df, field)
-        for field in ordered_fields
+    return {
+        "rows": total,
+        "stats": stats,
+        "keyword_fields": keyword_fields,
+        "chunks": len(uris),
     }
 
+
+def manifest_stats(
+    manifest: Dict[str, object],
+    base_fields: List[str],
+    keyword_terms: List[str],
+    ignored_fields: Set[str],
+) -> Optional[Dict[str, object]]:
+    """
+    Estatísticas a partir dos perfis de coluna gravados no manifest.
+
+    Não lê nenhum Parquet. Retorna None quando o manifest não tem perfil
+    para algum campo selecionado (execuções antigas ou perfis desligados).
+    """
+    profiles = manifest.get("columns") or {}
+    if not profiles:
+        return None
+    columns = list(manifest.get("schema") or profiles)
+    ordered_fields, keyword_fields = _select_fields(
+        columns, base_fields, keyword_terms, ignored_fields
+    )
+
+    stats: Dict[str, Dict[str, object]] = {}
+    for field in ordered_fields:
+        if field not in columns:
+            stats[field] = {"available": False}
+            continue
+        profile = profiles.get(field)
+        if profile is None:
+            return None
+        stats[field] = {
+            "available": True,
+            "total": profile["count"],
+            "null_pct": profile["null_pct"],
+            "min": str(profile["min"]) if profile["min"] is not None else None,
+            "max": str(profile["max"]) if profile["max"] is not None else None,
+            "approx_distinct": profile.get("approx_distinct"),
+        }
+
     return {
-        "rows": df.height,
+        "rows": manifest.get("records_count", 0),
         "stats": stats,
         "keyword_fields": keyword_fields,
+        "chunks": len(manifest.get("chunks") or []),
+        "source": "manifest",
     }
 
 
+def _analyze_model_run(
+    bucket_name: str,
+    model: str,
+    base_path: str,
+    base_fields: List[str],
+    keyword_terms: List[str],
+    ignored_fields: Set[str],
+) -> Optional[Dict[str, object]]:
+    run = latest_run(bucket_name, model, base_path)
+    if not run["files"]:
+        return None
+    manifest = load_manifest(run["manifest"]) if run["manifest"] else None
+    result = (
+        manifest_stats(manifest, base_fields, keyword_terms, ignored_fields)
+        if manifest
+        else None
+    )
+    if result is None:
+        result = analyze_run(run["files"], base_fields, keyword_terms, ignored_fields)
+    result["run_timestamp"] = run["run_timestamp"]
+    return result
+
+
+def result_rows(model: str, result: Dict[str, object]) -> List[Dict[str, object]]:
+    """Achata o resultado de um model em uma linha por campo."""
+    rows: List[Dict[str, object]] = []
+    for field, field_stats in sorted(result["stats"].items()):
+        rows.append(
+            {
+                "model": model,
+                "run_timestamp": result.get("run_timestamp"),
+                "chunks": result.get("chunks", 1),
+                "rows": result["rows"],
+                "field": field,
+                "available": field_stats["available"],
+                "null_pct": field_stats.get("null_pct"),
+                "min": field_stats.get("min"),
+                "max": field_stats.get("max"),
+                "approx_distinct": field_stats.get("approx_distinct"),
+                "source": result.get("source", "parquet"),
+            }
+        )
+    return rows
+
+
+def write_results(rows: List[Dict[str, object]], output: str) -> None:
+    """Grava o resultado em Parquet (extensão `.parquet`) ou JSON."""
+    path = Path(output)
+    if path.suffix == ".parquet":
+        pl.DataFrame(rows, infer_schema_length=None).write_parquet(path)
+    else:
+        path.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"💾 {len(rows)} linhas gravadas em {path}")
+
+
 def _print_field_line(field: str, stats: Dict[str, Dict[str, object]]) -> None:
     field_stats = stats.get(field)
     if not field_stats:
@@ -189,9 +491,11 @@ def _print_field_line(field: str, stats: Dict[str, Dict[str, object]]) -> None:
     null_pct = field_stats["null_pct"]
     min_val = field_stats["min"] or "-"
     max_val = field_stats["max"] or "-"
+    distinct = field_stats.get("approx_distinct")
     print(
         f"  - {field}: nulls={null_pct:.2f}% "
         f"| min={min_val} | max={max_val}"
+        + (f" | distintos≈{distinct}" if distinct is not None else "")
     )
 
 
@@ -206,6 +510,12 @@ def print_report(
     selected_fields = sorted(stats.keys())
 
     print(f"\nmodel: {model}")
+    if result.get("run_timestamp"):
+        print(
+            f"execução: {result['run_timestamp']} "
+            f"({result['chunks']} chunks, {result['rows']} linhas, "
+            f"fonte: {result.get('source', 'parquet')})"
+        )
     print("campos:")
     if not selected_fields:
         print("  - nenhum campo com os termos especificados")
@@ -215,6 +525,46 @@ def print_report(
         _print_field_line(field, stats)
 
 
+def sweep_models(
+    models: List[str],
+    *,
+    bucket_name: str,
+    base_path: str,
+    base_fields: List[str],
+    keyword_terms: List[str],
+    ignored_fields: Set[str],
+    workers: int,
+) -> List[Dict[str, object]]:
+    """Analisa a execução mais recente de cada model com um pool limitado."""
+    rows: List[Dict[str, object]] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(
+                _analyze_model_run,
+                bucket_name,
+                model,
+                base_path,
+                base_fields,
+                keyword_terms,
+                ignored_fields,
+            ): model
+            for model in models
+        }
+        for future in as_completed(futures):
+            model = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                logger.error(f"❌ Falha ao analisar {model}: {exc}")
+                continue
+            if result is None:
+                logger.warning(f"⚠️ Nenhum parquet encontrado para {model}")
+                continue
+            print_report(model, bucket_name, None, result, base_fields)
+            rows.extend(result_rows(model, result))
+    return sorted(rows, key=lambda row: (row["model"], row["field"]))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Analisa amostras Parquet para decidir write_date vs __last_update."
@@ -265,6 +615,22 @@ def parse_args() -> argparse.Namespace:
         ],
         help="Campos ignorados mesmo que apareçam nos termos.",
     )
+    parser.add_argument(
+        "--whole-run",
+        action="store_true",
+        help="Analisa todos os chunks da execução mais recente de cada model, em paralelo.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_DEFAULT_WORKERS,
+        help=f"Models analisados em paralelo com --whole-run (default: {_DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Grava o resultado em arquivo (.parquet ou .json), uma linha por model/campo.",
+    )
     return parser.parse_args()
 
 
@@ -291,6 +657,21 @@ def main() -> None:
         f"🗂️ Analisando {len(models)} models em gs://{args.bucket}/{_normalize_base_path(args.base_path)}"
     )
 
+    if args.whole_run:
+        rows = sweep_models(
+            models,
+            bucket_name=args.bucket,
+            base_path=args.base_path,
+            base_fields=base_fields,
+            keyword_terms=args.search_terms,
+            ignored_fields=ignored_fields,
+            workers=args.workers,
+        )
+        if args.output:
+            write_results(rows, args.output)
+        return
+
+    rows = []
     for model in models:
         try:
             blob = pick_latest_blob(args.bucket, model, args.base_path)
@@ -311,10 +692,14 @@ def main() -> None:
                 result,
                 base_fields,
             )
+            rows.extend(result_rows(model, result))
 
         except Exception as exc:
             logger.error(f"❌ Falha ao analisar {model}: {exc}")
 
+    if args.output:
+        write_results(rows, args.output)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Compara Utf8 x Categorical nas colunas de baixa cardinalidade dos maiores models.
+
+Uso (a partir da raiz do repositório):
+    python -m parquet_analysis.benchmark_encoding --largest 5
+"""
+import argparse
+import io
+import time
+from typing import Dict, List
+
+import polars as pl
+from loguru import logger
+
+from parquet_analysis.analyze_parquets import (
+    _DEFAULT_BASE_PATH,
+    _DEFAULT_BUCKET,
+    discover_models,
+    pick_latest_blob,
+)
+
+
+def _low_cardinality_columns(df: pl.DataFrame, max_ratio: float) -> List[str]:
+    if df.height == 0:
+        return []
+    columns: List[str] = []
+    for column, dtype in df.schema.items():
+        if dtype not in (pl.Utf8, pl.Categorical):
+            continue
+        distinct = df.get_column(column).n_unique()
+        if distinct / df.height <= max_ratio:
+            columns.append(column)
+    return columns
+
+
+def _measure(df: pl.DataFrame, columns: List[str], repeat: int) -> Dict[str, float]:
+    encode_times: List[float] = []
+    payload = b""
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        df.write_parquet(buffer)
+        encode_times.append(time.perf_counter() - start)
+        payload = buffer.getvalue()
+
+    decode_times: List[float] = []
+    projected_times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pl.read_parquet(io.BytesIO(payload))
+        decode_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pl.read_parquet(io.BytesIO(payload), columns=columns)
+        projected_times.append(time.perf_counter() - start)
+
+    return {
+        "bytes": len(payload),
+        "encode_s": min(encode_times),
+        "decode_s": min(decode_times),
+        "decode_cols_s": min(projected_times),
+    }
+
+
+def benchmark_blob(blob, max_ratio: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    df = pl.read_parquet(io.BytesIO(blob.download_as_bytes()))
+    columns = _low_cardinality_columns(df, max_ratio)
+    if not columns:
+        return {}
+
+    as_utf8 = df.with_columns([pl.col(column).cast(pl.Utf8) for column in columns])
+    as_categorical = df.with_columns(
+        [pl.col(column).cast(pl.Categorical) for column in columns]
+    )
+    return {
+        "utf8": _measure(as_utf8, columns, repeat),
+        "categorical": _measure(as_categorical, columns, repeat),
+        "_meta": {"rows": df.height, "columns": len(columns)},
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mede tamanho e tempo de decode de Utf8 vs Categorical em Parquets do bucket."
+    )
+    parser.add_argument("--bucket", default=_DEFAULT_BUCKET)
+    parser.add_argument("--base-path", default=_DEFAULT_BASE_PATH)
+    parser.add_argument(
+        "--models",
+        nargs="*",
+        help="Models a comparar. Se vazio, usa os maiores arquivos recentes do bucket.",
+    )
+    parser.add_argument(
+        "--largest",
+        type=int,
+        default=5,
+        help="Quantidade de models (pelo tamanho do Parquet mais recente) quando --models não é informado.",
+    )
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=0.05,
+        help="Razão máxima distintos/linhas para considerar a coluna de baixa cardinalidade.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    models = args.models or discover_models(args.bucket, args.base_path)
+    blobs = []
+    for model in models:
+        blob = pick_latest_blob(args.bucket, model, args.base_path)
+        if blob is not None:
+            blobs.append((model, blob))
+
+    if not args.models:
+        blobs.sort(key=lambda item: item[1].size or 0, reverse=True)
+        blobs = blobs[: args.largest]
+
+    logger.info(f"📏 Comparando encoding em {len(blobs)} models")
+
+    for model, blob in blobs:
+        try:
+            result = benchmark_blob(blob, args.max_ratio, args.repeat)
+        except Exception as exc:
+            logger.error(f"❌ Falha ao medir {model}: {exc}")
+            continue
+
+        if not result:
+            print(f"\nmodel: {model} — nenhuma coluna de baixa cardinalidade")
+            continue
+
+        meta = result["_meta"]
+        print(f"\nmodel: {model} ({meta['rows']} linhas, {meta['columns']} colunas candidatas)")
+        for variant in ("utf8", "categorical"):
+            stats = result[variant]
+            print(
+                f"  - {variant:<11} bytes={stats['bytes']:>12} "
+                f"| encode={stats['encode_s']:.3f}s "
+                f"| decode={stats['decode_s']:.3f}s "
+                f"| decode_cols={stats['decode_cols_s']:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Compara os perfis de escrita Parquet (`src.storage.WRITER_PROFILES`) em models reais.
+
+Para cada model, concatena os chunks mais recentes e mede, por perfil:
+tempo de encode, tamanho dos objetos e tempo de scan downstream (leitura
+completa e filtro por `write_date`, que exercita as estatísticas).
+
+O encode passa pelo mesmo caminho da extração: `ParquetChunkWriter`
+(pyarrow `ParquetWriter` com `arrow_writer_options()`), recebendo a
+amostra em batches de `--batch-size` linhas, com os mesmos row groups,
+limite de memória pendente e tamanho alvo de arquivo. Os chunks ficam em
+memória em vez de irem para o bucket.
+
+Uso (a partir da raiz do repositório):
+    python -m parquet_analysis.benchmark_writer_profiles --models account.move sale.order
+"""
+import argparse
+import io
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import polars as pl
+from loguru import logger
+
+from parquet_analysis.analyze_parquets import (
+    _DEFAULT_BASE_PATH,
+    _DEFAULT_BUCKET,
+    _get_storage_client,
+    _normalize_base_path,
+)
+from src.storage import WRITER_PROFILES, ParquetChunkWriter, ParquetWriterProfile
+
+_DEFAULT_BATCH_SIZE = 2000
+
+
+class _MemoryUploads:
+    """Faz o papel do `UploadPool`: guarda os chunks fechados em memória."""
+
+    def __init__(self) -> None:
+        self.payloads: List[bytes] = []
+
+    def submit(self, object_name: str, buffer: io.BytesIO) -> "Future[str]":
+        self.payloads.append(buffer.getvalue())
+        future: "Future[str]" = Future()
+        future.set_result(object_name)
+        return future
+
+
+def _latest_blobs(bucket_name: str, model: str, base_path: str, count: int) -> List:
+    client = _get_storage_client()
+    prefix = f"{_normalize_base_path(base_path)}/{model.replace('.', '_')}/"
+    blobs = [
+        blob
+        for blob in client.list_blobs(bucket_name, prefix=prefix)
+        if blob.name.endswith(".parquet")
+    ]
+    blobs.sort(key=lambda blob: blob.name.rsplit("/", 1)[-1], reverse=True)
+    return blobs[:count]
+
+
+def _load_sample(blobs: List) -> pl.DataFrame:
+    frames = [pl.read_parquet(io.BytesIO(blob.download_as_bytes())) for blob in blobs]
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def _scan_filter(df: pl.DataFrame) -> Optional[pl.Expr]:
+    if "write_date" not in df.columns:
+        return None
+    values = df.get_column("write_date").drop_nulls().sort()
+    if values.is_empty():
+        return None
+    # Seleciona ~10% mais recente, como um consumidor incremental faria.
+    threshold = values[int(len(values) * 0.9)]
+    return pl.col("write_date") >= threshold
+
+
+def encode_with_writer(
+    df: pl.DataFrame,
+    profile: ParquetWriterProfile,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+) -> List[bytes]:
+    """Grava `df` com o `ParquetChunkWriter` da extração e devolve os chunks."""
+    uploads = _MemoryUploads()
+    writer = ParquetChunkWriter(
+        "benchmark",
+        object_timestamp="19700101_000000",
+        profile=profile,
+        upload_pool=uploads,
+    )
+    for batch in df.iter_slices(batch_size):
+        writer.write(batch)
+    writer.close()
+    return uploads.payloads
+
+
+def _scan(payloads: List[bytes]) -> pl.LazyFrame:
+    return pl.concat([pl.scan_parquet(io.BytesIO(payload)) for payload in payloads])
+
+
+def benchmark_profile(
+    df: pl.DataFrame,
+    profile: ParquetWriterProfile,
+    repeat: int,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+) -> Dict[str, float]:
+    encode_times: List[float] = []
+    payloads: List[bytes] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payloads = encode_with_writer(df, profile, batch_size)
+        encode_times.append(time.perf_counter() - start)
+
+    predicate = _scan_filter(df)
+    scan_times: List[float] = []
+    filtered_times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _scan(payloads).collect()
+        scan_times.append(time.perf_counter() - start)
+
+        if predicate is not None:
+            start = time.perf_counter()
+            _scan(payloads).filter(predicate).collect()
+            filtered_times.append(time.perf_counter() - start)
+
+    return {
+        "bytes": sum(len(payload) for payload in payloads),
+        "chunks": len(payloads),
+        "encode_s": min(encode_times),
+        "scan_s": min(scan_times),
+        "filtered_scan_s": min(filtered_times) if filtered_times else float("nan"),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mede encode, tamanho e scan de cada perfil de escrita Parquet."
+    )
+    parser.add_argument("--bucket", default=_DEFAULT_BUCKET)
+    parser.add_argument("--base-path", default=_DEFAULT_BASE_PATH)
+    parser.add_argument("--models", nargs="+", required=True)
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=50,
+        help="Quantidade de chunks recentes concatenados por model.",
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="*",
+        default=sorted(WRITER_PROFILES),
+        help="Perfis a comparar (default: todos).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=_DEFAULT_BATCH_SIZE,
+        help="Linhas por batch entregue ao writer, como o search_read da extração.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    for model in args.models:
+        blobs = _latest_blobs(args.bucket, model, args.base_path, args.chunks)
+        if not blobs:
+            logger.warning(f"⚠️ Nenhum parquet encontrado para {model}")
+            continue
+
+        df = _load_sample(blobs)
+        print(f"\nmodel: {model} ({df.height} linhas, {df.width} colunas, {len(blobs)} chunks)")
+
+        for name in args.profiles:
+            profile = WRITER_PROFILES.get(name)
+            if profile is None:
+                logger.warning(f"⚠️ Perfil desconhecido: {name}")
+                continue
+            stats = benchmark_profile(df, profile, args.repeat, args.batch_size)
+            print(
+                f"  - {name:<9} bytes={stats['bytes']:>12} chunks={stats['chunks']:>3} "
+                f"| encode={stats['encode_s']:.3f}s "
+                f"| scan={stats['scan_s']:.3f}s "
+                f"| scan_filtrado={stats['filtered_scan_s']:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
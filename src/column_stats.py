@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import polars as pl
+
+# Tamanho do sketch KMV (k menores hashes); erro relativo ~ 1/sqrt(k) ≈ 3%.
+_SKETCH_SIZE = 1024
+_HASH_SPACE = float(2**64)
+_HASH_SEED = 0
+# Até este tamanho, os hashes novos são inseridos por busca binária no sketch.
+_SMALL_MERGE = 64
+# Tipos Odoo cujo min/max é numérico (o Parquet guarda tudo como Utf8).
+_NUMERIC_FIELD_TYPES = {"integer": pl.Int64, "float": pl.Float64, "monetary": pl.Float64}
+
+
+def _merge_sketches(left: List[int], right: List[int]) -> List[int]:
+    """União dos k menores hashes de dois sketches ordenados."""
+    if len(right) > len(left):
+        left, right = right, left
+    if not right:
+        return left
+    if len(right) > _SMALL_MERGE:
+        return sorted(set(left).union(right))[:_SKETCH_SIZE]
+
+    # Com limite por batch, o sketch novo costuma ter poucos hashes.
+    merged = list(left)
+    for value in right:
+        index = bisect_left(merged, value)
+        if index >= _SKETCH_SIZE or (index < len(merged) and merged[index] == value):
+            continue
+        merged.insert(index, value)
+    del merged[_SKETCH_SIZE:]
+    return merged
+
+
+@dataclass
+class ColumnProfile:
+    """
+    Perfil de uma coluna acumulado durante a extração.
+
+    `sketch` guarda os k menores hashes distintos (KMV), que podem ser
+    unidos entre chunks para estimar a cardinalidade sem reler os dados;
+    `None` quando os distintos não foram calculados.
+    """
+
+    count: int = 0
+    null_count: int = 0
+    min: Any = None
+    max: Any = None
+    sketch: Optional[List[int]] = field(default_factory=list)
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        mins = [value for value in (self.min, other.min) if value is not None]
+        maxs = [value for value in (self.max, other.max) if value is not None]
+        return ColumnProfile(
+            count=self.count + other.count,
+            null_count=self.null_count + other.null_count,
+            min=min(mins) if mins else None,
+            max=max(maxs) if maxs else None,
+            sketch=(
+                _merge_sketches(self.sketch, other.sketch)
+                if self.sketch is not None and other.sketch is not None
+                else None
+            ),
+        )
+
+    def sketch_bound(self) -> Optional[int]:
+        """Maior hash do sketch cheio; hashes acima dele nunca entram no sketch."""
+        if self.sketch is None or len(self.sketch) < _SKETCH_SIZE:
+            return None
+        return self.sketch[_SKETCH_SIZE - 1]
+
+    def approx_distinct(self) -> Optional[int]:
+        if self.sketch is None:
+            return None
+        if len(self.sketch) < _SKETCH_SIZE:
+            return len(self.sketch)
+        kth = self.sketch[_SKETCH_SIZE - 1]
+        return int((_SKETCH_SIZE - 1) * _HASH_SPACE / (kth + 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "null_count": self.null_count,
+            "null_pct": (self.null_count / self.count) * 100 if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "approx_distinct": self.approx_distinct(),
+        }
+
+
+def profile_dataframe(
+    df: pl.DataFrame,
+    sketch_bounds: Optional[Dict[str, Optional[int]]] = None,
+    *,
+    distinct: bool = True,
+    fields_metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, ColumnProfile]:
+    """
+    Calcula null count, min, max e sketch de distintos de todas as colunas em um único select.
+
+    Com `fields_metadata`, colunas integer/float/monetary (e `id`) têm
+    min/max numéricos, iguais aos `bounds` do manifest; as demais são
+    comparadas como texto.
+
+    Com `distinct=False` o sketch (a parte cara: hash + unique por coluna) é
+    pulado e o perfil fica só com nulos, min e max.
+
+    `sketch_bounds` (de `ColumnProfile.sketch_bound` dos batches anteriores)
+    descarta, antes do `unique`, os hashes que não entrariam no sketch: com
+    o sketch cheio, só uma fração ~k/distintos dos valores é deduplicada.
+    """
+    if df.is_empty():
+        return {}
+
+    sketch_bounds = sketch_bounds or {}
+    fields_metadata = fields_metadata or {}
+    exprs: List[pl.Expr] = []
+    for column, dtype in df.schema.items():
+        values = pl.col(column) if dtype == pl.Utf8 else pl.col(column).cast(pl.Utf8)
+        field_type = "integer" if column == "id" else (fields_metadata.get(column) or {}).get("type")
+        numeric = _NUMERIC_FIELD_TYPES.get(field_type or "")
+        ordered = values.cast(numeric, strict=False) if numeric is not None else values
+        exprs.extend(
+            [
+                values.null_count().alias(f"{column}\x00nulls"),
+                ordered.min().alias(f"{column}\x00min"),
+                ordered.max().alias(f"{column}\x00max"),
+            ]
+        )
+        if not distinct:
+            continue
+        hashes = values.drop_nulls().hash(seed=_HASH_SEED)
+        bound = sketch_bounds.get(column)
+        if bound is not None:
+            hashes = hashes.filter(hashes <= bound)
+        exprs.append(
+            hashes.unique().bottom_k(_SKETCH_SIZE).implode().alias(f"{column}\x00sketch")
+        )
+    row = df.select(exprs).row(0, named=True)
+
+    return {
+        column: ColumnProfile(
+            count=df.height,
+            null_count=row[f"{column}\x00nulls"],
+            min=row[f"{column}\x00min"],
+            max=row[f"{column}\x00max"],
+            sketch=sorted(row[f"{column}\x00sketch"]) if distinct else None,
+        )
+        for column in df.columns
+    }
+
+
+def merge_profiles(
+    current: Dict[str, ColumnProfile],
+    new: Dict[str, ColumnProfile],
+) -> Dict[str, ColumnProfile]:
+    """Une perfis de batches diferentes (colunas ausentes em um lado são mantidas)."""
+    merged = dict(current)
+    for column, profile in new.items():
+        merged[column] = merged[column].merge(profile) if column in merged else profile
+    return merged
@@ -0,0 +1,112 @@
+import os
+
+from loguru import logger
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    push_to_gateway,
+    write_to_textfile,
+)
+
+# Buckets em segundos: de chamadas rápidas (fields_get) a search_read pesados.
+_RPC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_IO_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+RPC_SECONDS = Histogram(
+    "odoo_rpc_seconds",
+    "Latência das chamadas XML-RPC ao Odoo.",
+    ["model", "method"],
+    buckets=_RPC_BUCKETS,
+)
+RPC_ERRORS = Counter(
+    "odoo_rpc_errors_total",
+    "Falhas de chamadas XML-RPC por categoria (temporary = retry).",
+    ["model", "category"],
+)
+RPC_IN_FLIGHT = Gauge(
+    "odoo_rpc_in_flight",
+    "Chamadas XML-RPC em andamento.",
+)
+RPC_RESPONSE_BYTES = Counter(
+    "odoo_rpc_response_bytes_total",
+    "Bytes de XML decodificados das respostas do Odoo.",
+)
+ROWS = Counter(
+    "etl_rows_total",
+    "Registros extraídos e gravados (use rate() para linhas/s).",
+    ["model", "mode"],
+)
+MODELS_IN_FLIGHT = Gauge(
+    "etl_models_in_flight",
+    "Models sendo extraídos neste processo.",
+)
+RUNS_IN_FLIGHT = Gauge(
+    "etl_runs_in_flight",
+    "Execuções da API rodando neste processo.",
+)
+PARQUET_ENCODE_SECONDS = Histogram(
+    "parquet_encode_seconds",
+    "Tempo de encode de row groups/rodapé Parquet.",
+    ["dataset"],
+    buckets=_IO_BUCKETS,
+)
+COLUMN_PROFILE_SECONDS = Histogram(
+    "parquet_column_profile_seconds",
+    "Tempo de cálculo dos perfis de coluna por batch (parte do encode).",
+    ["dataset"],
+    buckets=_IO_BUCKETS,
+)
+GCS_UPLOAD_SECONDS = Histogram(
+    "gcs_upload_seconds",
+    "Latência de upload de objetos no GCS (incluindo retries).",
+    ["kind"],
+    buckets=_IO_BUCKETS,
+)
+GCS_UPLOADED_BYTES = Counter(
+    "gcs_uploaded_bytes_total",
+    "Bytes enviados ao GCS.",
+    ["kind"],
+)
+GCS_UPLOADS_IN_FLIGHT = Gauge(
+    "gcs_uploads_in_flight",
+    "Uploads ao GCS em andamento.",
+)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Exposição no formato texto do Prometheus (corpo, content-type)."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def export_job_metrics(job_name: str) -> None:
+    """
+    Exporta as métricas ao final de um job (sem servidor para o scrape).
+
+    - `METRICS_PUSHGATEWAY_URL`: push para o Pushgateway, agrupado por task.
+    - `METRICS_TEXTFILE_PATH`: grava no formato do textfile collector.
+    """
+    gateway = os.getenv("METRICS_PUSHGATEWAY_URL")
+    textfile = os.getenv("METRICS_TEXTFILE_PATH")
+
+    if gateway:
+        try:
+            push_to_gateway(
+                gateway,
+                job=job_name,
+                registry=REGISTRY,
+                grouping_key={"task": os.getenv("CLOUD_RUN_TASK_INDEX", "0")},
+            )
+            logger.info(f"📈 Métricas enviadas ao Pushgateway ({gateway})")
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao enviar métricas ao Pushgateway: {exc}")
+
+    if textfile:
+        try:
+            write_to_textfile(textfile, REGISTRY)
+            logger.info(f"📈 Métricas gravadas em {textfile}")
+        except Exception as exc:
+            logger.warning(f"⚠️ Falha ao gravar métricas em {textfile}: {exc}")
@@ -3,6 +3,22 @@ import xmlrpc.client
 from loguru import logger
 from xmlrpc.client import Transport
 
+from src import metrics
+
+
+class _CountingParser:
+    """Repassa o XML ao parser original contabilizando os bytes decodificados."""
+
+    def __init__(self, parser):
+        self._parser = parser
+
+    def feed(self, data):
+        metrics.RPC_RESPONSE_BYTES.inc(len(data))
+        self._parser.feed(data)
+
+    def close(self):
+        return self._parser.close()
+
 
 class TimeoutTransport(Transport):
     """
@@ -18,6 +34,10 @@ class TimeoutTransport(Transport):
         conn.timeout = self.timeout
         return conn
 
+    def getparser(self):
+        parser, unmarshaller = super().getparser()
+        return _CountingParser(parser), unmarshaller
+
 
 class OdooConnection:
     """
@@ -49,8 +69,13 @@ class OdooConnection:
     def _connect(self):
         """
         Inicializa proxies XML-RPC e autentica.
+
+        `ODOO_TRANSPORT_MODE=record|replay` grava ou reproduz as respostas
+        (ver `recording.build_transport`).
         """
-        transport = TimeoutTransport(timeout=120)
+        from src.odoo_extractor.recording import build_transport
+
+        transport = build_transport(timeout=120)
 
         self.common = xmlrpc.client.ServerProxy(
             f"{self.url}/xmlrpc/2/common",
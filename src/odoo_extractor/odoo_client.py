@@ -1,6 +1,7 @@
 import time
 from loguru import logger
 
+from src import metrics, tracing
 from src.odoo_extractor.connection import OdooConnection
 from src.odoo_extractor.errors import (
     ModelExtractionError,
@@ -23,6 +24,43 @@ class OdooClient:
     def __init__(self):
         self.conn = OdooConnection()
         self._refresh_connection_refs()
+        # Contadores acumulados; quem precisa por model calcula a diferença.
+        self.rpc_calls = 0
+        self.rpc_retries = 0
+        self.rpc_seconds = 0.0
+
+    def rpc_stats(self) -> dict[str, float]:
+        """Snapshot dos contadores de chamadas XML-RPC."""
+        return {
+            "calls": self.rpc_calls,
+            "retries": self.rpc_retries,
+            "seconds": self.rpc_seconds,
+        }
+
+    def _execute_kw(self, model: str, method: str, args: list, kwargs: dict):
+        """execute_kw contabilizando chamadas e tempo de RPC."""
+        self.rpc_calls += 1
+        started = time.perf_counter()
+        metrics.RPC_IN_FLIGHT.inc()
+        try:
+            with tracing.span("execute_kw", model=model, method=method) as rpc_span:
+                result = self.models.execute_kw(
+                    self.db,
+                    self.uid,
+                    self.password,
+                    model,
+                    method,
+                    args,
+                    kwargs,
+                )
+                if isinstance(result, list):
+                    rpc_span.set_attribute("rows", len(result))
+                return result
+        finally:
+            elapsed = time.perf_counter() - started
+            self.rpc_seconds += elapsed
+            metrics.RPC_IN_FLIGHT.dec()
+            metrics.RPC_SECONDS.labels(model=model, method=method).observe(elapsed)
 
     def _refresh_connection_refs(self) -> None:
         """
@@ -37,10 +75,7 @@ class OdooClient:
     def get_fields_metadata(self, model: str) -> dict[str, dict]:
         """Retorna metadados (tipo, label etc.) de todos os campos do model."""
         try:
-            return self.models.execute_kw(
-                self.db,
-                self.uid,
-                self.password,
+            return self._execute_kw(
                 model,
                 "fields_get",
                 [],
@@ -86,10 +121,7 @@ class OdooClient:
 
             for attempt in range(3):
                 try:
-                    batch = self.models.execute_kw(
-                        self.db,
-                        self.uid,
-                        self.password,
+                    batch = self._execute_kw(
                         model,
                         "search_read",
                         [domain],
@@ -102,11 +134,14 @@ class OdooClient:
 
                     # Erro permanente (schema/permissão/etc.)
                     if is_permanent_schema_error(e):
+                        metrics.RPC_ERRORS.labels(model=model, category="schema").inc()
                         logger.warning(f"⚙️ Modelo {model} ignorado: {reason}")
                         raise ModelExtractionError(model, reason, category="schema")
 
                     # Erro temporário (rede/timeout/etc.) -> retry + reconnect
                     if is_temporary_error(e):
+                        self.rpc_retries += 1
+                        metrics.RPC_ERRORS.labels(model=model, category="temporary").inc()
                         logger.warning(
                             f"⏳ Tentativa {attempt + 1}/3 falhou em {model} "
                             f"(erro temporário): {reason}"
@@ -117,6 +152,7 @@ class OdooClient:
                         continue
 
                     # Erro inesperado
+                    metrics.RPC_ERRORS.labels(model=model, category="unexpected").inc()
                     logger.error(f"❌ Erro inesperado em {model}: {reason}")
                     raise ModelExtractionError(model, reason, category="unexpected")
 
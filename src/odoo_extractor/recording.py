@@ -0,0 +1,189 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.odoo_extractor.connection import TimeoutTransport
+
+_DEFAULT_RECORDING_DIR = "recordings"
+_COMMON_FOLDER = "_common"
+
+
+def _describe_call(handler: str, request_body: bytes) -> Dict[str, Any]:
+    """
+    Identifica a chamada sem credenciais: em `execute_kw` descarta db, uid e
+    senha; em `authenticate`, todos os parâmetros.
+    """
+    params, method = xmlrpc.client.loads(request_body, use_builtin_types=True)
+    if method == "execute_kw":
+        model, kw_method = params[3], params[4]
+        args = params[5] if len(params) > 5 else []
+        kwargs = params[6] if len(params) > 6 else {}
+        return {"endpoint": handler, "model": model, "method": kw_method, "args": args, "kwargs": kwargs or {}}
+    if method == "authenticate":
+        return {"endpoint": handler, "model": None, "method": method, "args": [], "kwargs": {}}
+    return {"endpoint": handler, "model": None, "method": method, "args": list(params), "kwargs": {}}
+
+
+def recording_path(directory: str, call: Dict[str, Any]) -> str:
+    """`<dir>/<model>/<método>_<hash>.json.gz` (`_common/` fora de `execute_kw`)."""
+    key = json.dumps(
+        [call["model"], call["method"], call["args"], call["kwargs"]],
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    folder = (call["model"] or _COMMON_FOLDER).replace(".", "_")
+    return os.path.join(directory, folder, f"{call['method']}_{digest}.json.gz")
+
+
+class RecordingTransport(TimeoutTransport):
+    """
+    Transporte que repassa as chamadas ao Odoo e grava cada resposta XML
+    bruta (inclusive `Fault`) em JSON comprimido, sem as credenciais.
+    """
+
+    def __init__(self, directory: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.directory = directory
+        self._local = threading.local()
+
+    def parse_response(self, response):
+        stream = response
+        if response.getheader("Content-Encoding", "") == "gzip":
+            stream = gzip.GzipFile(mode="rb", fileobj=response)
+        data = stream.read()
+        self._local.response = data
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(data)
+        parser.close()
+        return unmarshaller.close()
+
+    def request(self, host, handler, request_body, verbose=False):
+        self._local.response = None
+        started = time.perf_counter()
+        try:
+            return super().request(host, handler, request_body, verbose)
+        finally:
+            # Inclui respostas `Fault`: o replay reproduz também os erros de schema.
+            if self._local.response is not None:
+                self._save(handler, request_body, time.perf_counter() - started)
+
+    def _save(self, handler: str, request_body: bytes, elapsed: float) -> None:
+        data = self._local.response
+        call = _describe_call(handler, request_body)
+        record = {
+            **call,
+            "elapsed_s": round(elapsed, 6),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "response_bytes": len(data),
+        }
+        try:
+            record["response"] = data.decode("utf-8")
+        except UnicodeDecodeError:
+            record["response_b64"] = base64.b64encode(data).decode("ascii")
+
+        path = recording_path(self.directory, call)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp-{threading.get_ident()}"
+        with gzip.open(temporary, "wt", encoding="utf-8") as handle:
+            json.dump(record, handle, ensure_ascii=False, default=str)
+        os.replace(temporary, path)
+        logger.debug(f"🎙️ Resposta gravada: {path}")
+
+
+class ReplayTransport(TimeoutTransport):
+    """
+    Transporte que responde com as gravações, sem acesso à rede.
+
+    A resposta XML gravada passa pelo mesmo parser do transporte real, então
+    o custo de decode é reproduzido. `speed` controla a latência: 0 responde
+    imediatamente, 1 repete o tempo original, 2 é duas vezes mais rápido.
+    Uma chamada sem gravação vira `Fault` (o model é ignorado com o motivo).
+    """
+
+    def __init__(self, directory: str, *args, speed: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.directory = directory
+        self.speed = speed
+
+    def _load(self, call: Dict[str, Any]) -> Optional[Tuple[bytes, float]]:
+        path = recording_path(self.directory, call)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            record = json.load(handle)
+        if "response" in record:
+            data = record["response"].encode("utf-8")
+        else:
+            data = base64.b64decode(record["response_b64"])
+        return data, float(record.get("elapsed_s") or 0.0)
+
+    def request(self, host, handler, request_body, verbose=False):
+        call = _describe_call(handler, request_body)
+        loaded = self._load(call)
+        if loaded is None:
+            if call["method"] == "authenticate":
+                # Gravações feitas sem passar pela autenticação: qualquer uid serve.
+                return (1,)
+            raise xmlrpc.client.Fault(
+                1,
+                f"Gravação não encontrada para {call['model']}.{call['method']} "
+                f"em {self.directory} (replay exige os mesmos campos, domínio e batch_size)",
+            )
+
+        data, elapsed = loaded
+        if self.speed > 0 and elapsed > 0:
+            time.sleep(elapsed / self.speed)
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(data)
+        parser.close()
+        return unmarshaller.close()
+
+
+def recorded_models(directory: str) -> List[str]:
+    """Models com alguma gravação em `directory` (nome original, com pontos)."""
+    models: List[str] = []
+    if not os.path.isdir(directory):
+        return models
+    for folder in sorted(os.listdir(directory)):
+        path = os.path.join(directory, folder)
+        if folder == _COMMON_FOLDER or not os.path.isdir(path):
+            continue
+        recordings = sorted(name for name in os.listdir(path) if name.endswith(".json.gz"))
+        if not recordings:
+            continue
+        with gzip.open(os.path.join(path, recordings[0]), "rt", encoding="utf-8") as handle:
+            models.append(json.load(handle)["model"])
+    return models
+
+
+def build_transport(timeout: int) -> TimeoutTransport:
+    """
+    Transporte conforme `ODOO_TRANSPORT_MODE`:
+    - vazio/`live`: chamadas reais;
+    - `record`: chamadas reais gravadas em `ODOO_RECORDING_DIR`;
+    - `replay`: respostas servidas de `ODOO_RECORDING_DIR` (`ODOO_REPLAY_SPEED`).
+    """
+    mode = os.getenv("ODOO_TRANSPORT_MODE", "live").strip().lower()
+    directory = os.getenv("ODOO_RECORDING_DIR") or _DEFAULT_RECORDING_DIR
+    if mode == "record":
+        logger.info(f"🎙️ Gravando respostas do Odoo em {directory}")
+        return RecordingTransport(directory, timeout=timeout)
+    if mode == "replay":
+        speed = float(os.getenv("ODOO_REPLAY_SPEED") or 0)
+        logger.info(f"📼 Replay das respostas gravadas em {directory} (velocidade={speed or 'máxima'})")
+        return ReplayTransport(directory, timeout=timeout, speed=speed)
+    if mode not in {"", "live"}:
+        raise ValueError(f"ODOO_TRANSPORT_MODE inválido: {mode} (use live, record ou replay)")
+    return TimeoutTransport(timeout=timeout)
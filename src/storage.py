@@ -1,15 +1,41 @@
+import hashlib
+import io
+import json
 import os
-import tempfile
-from datetime import datetime, timezone
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
 
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import NotFound, PreconditionFailed
 from google.cloud import storage
 from loguru import logger
 
+from src import metrics, tracing
+from src.column_stats import ColumnProfile, merge_profiles, profile_dataframe
+from src.utils import env_flag, env_int
+
 _storage_client: Optional[storage.Client] = None
 _GCS_BUCKET = "gobrax-data-lake"
 _GCS_BASE_PATH = "data-lake/odoo"
+_DEFAULT_TARGET_FILE_MB = 256
+# Batches pequenos são agrupados até este limite antes de virar row group.
+_DEFAULT_ROW_GROUP_ROWS = 100_000
+_MAX_PENDING_BYTES = 64 * 1024 * 1024
+_DEFAULT_UPLOADS_IN_FLIGHT = 2
+# Payloads offloaded são pequenos perto de um Parquet: mais uploads em voo.
+_DEFAULT_PAYLOAD_UPLOADS_IN_FLIGHT = 16
+_UPLOAD_ATTEMPTS = 3
+_DEFAULT_DELETE_WORKERS = 8
+_DELETE_ATTEMPTS = 3
+_DEFAULT_RETENTION_HOURS = 24
+# Colunas com min/max registrados no manifest de cada chunk.
+_BOUND_COLUMNS = ("id", "write_date")
 
 
 def _get_storage_client() -> storage.Client:
@@ -20,14 +46,121 @@ def _get_storage_client() -> storage.Client:
     return _storage_client
 
 
-def _build_object_name(model: str, timestamp_str: str, chunk_suffix: Optional[str] = None) -> str:
-    """Monta o caminho do objeto dentro do bucket."""
+@dataclass(frozen=True)
+class ParquetWriterProfile:
+    """Opções de escrita Parquet (codec, nível, row group, estatísticas, página)."""
+
+    name: str
+    compression: str = "zstd"
+    compression_level: Optional[int] = None
+    row_group_size: Optional[int] = None
+    statistics: Union[bool, str] = True
+    data_page_size: Optional[int] = None
+
+    def write_options(self) -> Dict[str, Any]:
+        """Kwargs para `pl.DataFrame.write_parquet`."""
+        return {
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "row_group_size": self.row_group_size,
+            "statistics": self.statistics,
+            "data_page_size": self.data_page_size,
+        }
+
+    def arrow_writer_options(self) -> Dict[str, Any]:
+        """Kwargs para `pyarrow.parquet.ParquetWriter`."""
+        options: Dict[str, Any] = {
+            "compression": self.compression,
+            "write_statistics": bool(self.statistics),
+        }
+        if self.compression_level is not None:
+            options["compression_level"] = self.compression_level
+        if self.data_page_size is not None:
+            options["data_page_size"] = self.data_page_size
+        return options
+
+
+WRITER_PROFILES: Dict[str, ParquetWriterProfile] = {
+    # zstd nível 3 (o default do writer do Polars usado antes do `ParquetWriter`;
+    # o do pyarrow seria 1) e estatísticas min/max/null_count.
+    "default": ParquetWriterProfile(name="default", compression_level=3),
+    # Menos CPU por chunk, arquivos maiores.
+    "fast": ParquetWriterProfile(name="fast", compression="lz4"),
+    "balanced": ParquetWriterProfile(
+        name="balanced",
+        compression_level=3,
+        row_group_size=250_000,
+        statistics="full",
+    ),
+    # Mais CPU na escrita em troca de menos bytes e row groups maiores.
+    "compact": ParquetWriterProfile(
+        name="compact",
+        compression_level=19,
+        row_group_size=1_000_000,
+        statistics="full",
+        data_page_size=1024 * 1024,
+    ),
+}
+
+
+def _parse_profile_overrides(raw: str) -> Dict[str, str]:
+    overrides: Dict[str, str] = {}
+    for item in raw.split(","):
+        model, _, profile = item.partition("=")
+        if model.strip() and profile.strip():
+            overrides[model.strip()] = profile.strip().lower()
+    return overrides
+
+
+def resolve_writer_profile(model: Optional[str] = None) -> ParquetWriterProfile:
+    """
+    Escolhe o perfil de escrita do model.
+
+    `PARQUET_WRITER_PROFILE` define o perfil do deployment e
+    `PARQUET_WRITER_PROFILE_OVERRIDES` (ex.: `account.move=compact,mail.message=fast`)
+    sobrescreve por model.
+    """
+    name = os.getenv("PARQUET_WRITER_PROFILE", "default").strip().lower() or "default"
+    if model:
+        overrides = _parse_profile_overrides(os.getenv("PARQUET_WRITER_PROFILE_OVERRIDES", ""))
+        name = overrides.get(model, name)
+
+    profile = WRITER_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"⚠️ Perfil Parquet desconhecido '{name}', usando 'default'")
+        return WRITER_PROFILES["default"]
+    return profile
+
+
+def _build_partition_path(timestamp_str: str, mode: str) -> str:
+    """Partição Hive `run_date=YYYY-MM-DD/mode=<full|inc>` derivada do timestamp."""
+    run_date = datetime.strptime(timestamp_str[:8], "%Y%m%d").strftime("%Y-%m-%d")
+    return f"run_date={run_date}/mode={mode}"
+
+
+def _build_object_name(
+    model: str,
+    timestamp_str: str,
+    chunk_suffix: Optional[str] = None,
+    *,
+    mode: Optional[str] = None,
+    extension: str = "parquet",
+) -> str:
+    """
+    Monta o caminho do objeto dentro do bucket.
+
+    Com `GCS_PARTITIONED_LAYOUT=1` e `mode` informado, o arquivo fica em
+    `<model>/run_date=YYYY-MM-DD/mode=<mode>/`, permitindo partition pruning.
+    """
     base_path = _GCS_BASE_PATH.strip("/")
     safe_model_name = model.replace(".", "_")
     file_name = timestamp_str
     if chunk_suffix:
         file_name = f"{timestamp_str}_{chunk_suffix}"
-    return f"{base_path}/{safe_model_name}/{file_name}.parquet"
+    if mode and env_flag("GCS_PARTITIONED_LAYOUT"):
+        partition = _build_partition_path(timestamp_str, mode)
+        return f"{base_path}/{safe_model_name}/{partition}/{file_name}.{extension}"
+    return f"{base_path}/{safe_model_name}/{file_name}.{extension}"
 
 
 def _build_model_prefix(model: str) -> str:
@@ -37,98 +170,665 @@ def _build_model_prefix(model: str) -> str:
     return f"{base_path}/{safe_model_name}/"
 
 
-def cleanup_model_folder(model: str, keep_timestamp: Optional[str] = None) -> int:
+def _build_payload_object_name(digest: str) -> str:
+    """Monta o caminho endereçado por conteúdo de um payload binary/html."""
+    base_path = _GCS_BASE_PATH.strip("/")
+    return f"{base_path}/_blobs/{digest[:2]}/{digest}"
+
+
+def save_payload_to_gcs(payload: bytes, digest: str, field_type: str) -> str:
+    """
+    Persiste um payload grande (binary/html) fora do Parquet, endereçado pelo sha256.
+
+    O upload usa `if_generation_match=0`: se o conteúdo já existe no bucket,
+    o GCS recusa a escrita e o objeto existente é reaproveitado.
+
+    Returns:
+        str: URI gs:// do payload.
+    """
+    object_name = _build_payload_object_name(digest)
+    client = _get_storage_client()
+    blob = client.bucket(_GCS_BUCKET).blob(object_name)
+    content_type = "text/html; charset=utf-8" if field_type == "html" else "text/plain"
+
+    try:
+        with metrics.GCS_UPLOAD_SECONDS.labels(kind="payload").time():
+            blob.upload_from_string(
+                payload,
+                content_type=content_type,
+                if_generation_match=0,
+            )
+        metrics.GCS_UPLOADED_BYTES.labels(kind="payload").inc(len(payload))
+    except PreconditionFailed:
+        pass
+
+    return f"gs://{_GCS_BUCKET}/{object_name}"
+
+
+def build_object_uri(model: str, timestamp_str: str, chunk_suffix: Optional[str] = None) -> str:
+    """URI gs:// de um objeto Parquet do dataset (layout plano)."""
+    return f"gs://{_GCS_BUCKET}/{_build_object_name(model, timestamp_str, chunk_suffix)}"
+
+
+def list_model_parquet_uris(model: str) -> List[str]:
+    """Lista as URIs gs:// dos Parquets da model, ordenadas pelo nome do arquivo."""
+    client = _get_storage_client()
+    blobs = [
+        blob
+        for blob in client.list_blobs(_GCS_BUCKET, prefix=_build_model_prefix(model))
+        if blob.name.endswith(".parquet")
+    ]
+    blobs.sort(key=lambda blob: blob.name.rsplit("/", 1)[-1])
+    return [f"gs://{_GCS_BUCKET}/{blob.name}" for blob in blobs]
+
+
+def list_relation_datasets(model: str) -> List[str]:
+    """
+    Datasets de vínculos x2many (`<model>__<campo>`) publicados para o model.
+
+    Procura `_CURRENT.json` nas pastas irmãs `<model>__*/`, ignorando snapshots.
     """
-    Remove objetos antigos da pasta da model no GCS.
+    base_path = _GCS_BASE_PATH.strip("/")
+    safe_model_name = model.replace(".", "_")
+    prefix = f"{base_path}/{safe_model_name}__"
+    client = _get_storage_client()
+
+    fields: Set[str] = set()
+    for blob in client.list_blobs(_GCS_BUCKET, prefix=prefix):
+        folder, _, file_name = blob.name[len(prefix):].partition("/")
+        if file_name == "_CURRENT.json" and not f"__{folder}".endswith("__snapshot"):
+            fields.add(folder)
+    return [f"{model}__{field}" for field in sorted(fields)]
+
+
+def _delete_blob(blob: storage.Blob) -> bool:
+    """Remove um objeto com retry; objeto já inexistente conta como removido."""
+    for attempt in range(_DELETE_ATTEMPTS):
+        try:
+            blob.delete()
+            return True
+        except NotFound:
+            return True
+        except Exception as exc:
+            if attempt + 1 >= _DELETE_ATTEMPTS:
+                logger.error(f"🚨 Falha ao remover {blob.name}: {exc}")
+                return False
+            time.sleep(attempt + 1)
+    return False
+
 
-    Se keep_timestamp for informado, preserva arquivos da execução atual
-    (ex.: 20260306_180846_chunk0001.parquet).
-    Se keep_timestamp for None, remove todos os arquivos da model.
+def _delete_blobs(model: str, blobs: List[storage.Blob]) -> int:
+    """Remove objetos em paralelo; o tempo deixa de crescer linearmente com os chunks."""
+    if not blobs:
+        return 0
+
+    workers = env_int("GCS_DELETE_WORKERS", _DEFAULT_DELETE_WORKERS)
+    with ThreadPoolExecutor(
+        max_workers=max(workers, 1),
+        thread_name_prefix="gcs-delete",
+    ) as executor:
+        deleted = sum(executor.map(_delete_blob, blobs))
+
+    failed = len(blobs) - deleted
+    if failed:
+        logger.warning(f"⚠️ {failed} arquivos de '{model}' não puderam ser removidos")
+    return deleted
+
+
+def collect_old_runs(
+    model: str,
+    *,
+    keep_timestamps: Iterable[str],
+    min_timestamp: Optional[str] = None,
+    retention_hours: Optional[int] = None,
+) -> int:
+    """
+    Coleta (remove) execuções antigas que não fazem mais parte do estado publicado.
+
+    Preserva arquivos das execuções em `keep_timestamps` (as do `_CURRENT`),
+    execuções com timestamp >= `min_timestamp` (podem estar em andamento) e
+    qualquer objeto mais novo que `GCS_RETENTION_HOURS`, dando uma janela
+    para leitores que ainda usam o ponteiro anterior. Objetos `_*` ficam.
 
     Returns:
         int: quantidade de arquivos removidos.
     """
+    if retention_hours is None:
+        retention_hours = env_int("GCS_RETENTION_HOURS", _DEFAULT_RETENTION_HOURS)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=max(retention_hours, 0))
+    keep: Set[str] = set(keep_timestamps)
+
     client = _get_storage_client()
-    bucket = client.bucket(_GCS_BUCKET)
     prefix = _build_model_prefix(model)
 
-    deleted = 0
-    for blob in client.list_blobs(bucket, prefix=prefix):
+    to_delete: List[storage.Blob] = []
+    for blob in client.list_blobs(_GCS_BUCKET, prefix=prefix):
         file_name = blob.name.rsplit("/", 1)[-1]
-        if keep_timestamp and (
-            file_name.startswith(f"{keep_timestamp}_")
-            or file_name == f"{keep_timestamp}.parquet"
-        ):
+        if file_name.startswith("_"):
             continue
-        blob.delete()
-        deleted += 1
-
-    if keep_timestamp:
-        logger.info(
-            "🧹 Limpeza pós-full da model '{}' (preservando timestamp={}): {} arquivos removidos em gs://{}/{}",
-            model,
-            keep_timestamp,
-            deleted,
-            _GCS_BUCKET,
-            prefix,
-        )
-    else:
-        logger.info(
-            "🧹 Limpeza total da model '{}': {} arquivos removidos em gs://{}/{}",
-            model,
-            deleted,
-            _GCS_BUCKET,
-            prefix,
-        )
+        run_timestamp = file_name[:15]
+        if run_timestamp in keep:
+            continue
+        if min_timestamp and run_timestamp >= min_timestamp:
+            continue
+        if blob.time_created and blob.time_created > cutoff:
+            continue
+        to_delete.append(blob)
+
+    deleted = _delete_blobs(model, to_delete)
+    logger.info(
+        "🧹 Retenção da model '{}': {} arquivos antigos removidos em gs://{}/{}",
+        model,
+        deleted,
+        _GCS_BUCKET,
+        prefix,
+    )
     return deleted
 
 
-def save_dataframe_to_gcs(
-    df: pl.DataFrame,
+def _upload_parquet_buffer(object_name: str, buffer: io.BytesIO) -> str:
+    """Envia um Parquet já serializado em memória (com retry) e libera o buffer."""
+    client = _get_storage_client()
+    blob = client.bucket(_GCS_BUCKET).blob(object_name)
+    size = buffer.getbuffer().nbytes
+    started = time.perf_counter()
+    metrics.GCS_UPLOADS_IN_FLIGHT.inc()
+
+    try:
+        with tracing.span("gcs_upload", object=object_name, bytes=size):
+            for attempt in range(_UPLOAD_ATTEMPTS):
+                try:
+                    blob.upload_from_file(
+                        buffer,
+                        rewind=True,
+                        size=size,
+                        content_type="application/octet-stream",
+                    )
+                    break
+                except Exception as exc:
+                    if attempt + 1 >= _UPLOAD_ATTEMPTS:
+                        logger.error(f"🚨 Upload de {object_name} falhou após {_UPLOAD_ATTEMPTS} tentativas: {exc}")
+                        raise
+                    logger.warning(
+                        f"⏳ Tentativa {attempt + 1}/{_UPLOAD_ATTEMPTS} de upload falhou "
+                        f"({object_name}): {exc}"
+                    )
+                    time.sleep(5 * (attempt + 1))
+    finally:
+        buffer.close()
+        metrics.GCS_UPLOADS_IN_FLIGHT.dec()
+
+    metrics.GCS_UPLOAD_SECONDS.labels(kind="parquet").observe(time.perf_counter() - started)
+    metrics.GCS_UPLOADED_BYTES.labels(kind="parquet").inc(size)
+
+    gcs_uri = f"gs://{_GCS_BUCKET}/{object_name}"
+    logger.info(f"💾 Upload concluído: {gcs_uri}")
+    return gcs_uri
+
+
+def _target_file_bytes() -> int:
+    target_mb = env_int("PARQUET_TARGET_FILE_MB", _DEFAULT_TARGET_FILE_MB)
+    return max(target_mb, 1) * 1024 * 1024
+
+
+def schema_fingerprint(schema: Dict[str, Any]) -> str:
+    """Hash estável (sha256) de nomes e tipos das colunas."""
+    payload = json.dumps([[name, str(dtype)] for name, dtype in schema.items()])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _batch_bounds(df: pl.DataFrame) -> Dict[str, Dict[str, Any]]:
+    exprs: List[pl.Expr] = []
+    for column in _BOUND_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = pl.col(column)
+        if column == "id":
+            values = values.cast(pl.Int64, strict=False)
+        else:
+            values = values.cast(pl.Utf8)
+        exprs.extend([values.min().alias(f"{column}:min"), values.max().alias(f"{column}:max")])
+    if not exprs:
+        return {}
+
+    row = df.select(exprs).row(0, named=True)
+    bounds: Dict[str, Dict[str, Any]] = {}
+    for key, value in row.items():
+        column, stat = key.split(":")
+        bounds.setdefault(column, {})[stat] = value
+    return bounds
+
+
+def _merge_bounds(
+    current: Dict[str, Dict[str, Any]],
+    new: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    merged = {column: dict(values) for column, values in current.items()}
+    for column, values in new.items():
+        target = merged.setdefault(column, {"min": None, "max": None})
+        for stat, pick in (("min", min), ("max", max)):
+            candidates = [v for v in (target.get(stat), values.get(stat)) if v is not None]
+            target[stat] = pick(candidates) if candidates else None
+    return merged
+
+
+def save_run_manifest(
     model: str,
+    timestamp_str: str,
+    manifest: Dict[str, Any],
     *,
-    object_timestamp: Optional[str] = None,
-    chunk_index: Optional[int] = None,
+    mode: Optional[str] = None,
 ) -> str:
     """
-    Persiste um DataFrame no Google Cloud Storage.
+    Grava o manifest da execução ao lado dos chunks (`<timestamp>_manifest.json`).
 
-    Args:
-        df: DataFrame com os dados.
-        model: Nome do model (usado para montar o caminho no bucket).
+    Returns:
+        str: URI gs:// do manifest.
+    """
+    object_name = _build_object_name(
+        model,
+        timestamp_str,
+        "manifest",
+        mode=mode,
+        extension="json",
+    )
+    client = _get_storage_client()
+    blob = client.bucket(_GCS_BUCKET).blob(object_name)
+    blob.upload_from_string(
+        json.dumps(manifest, ensure_ascii=False, default=str),
+        content_type="application/json",
+    )
+    gcs_uri = f"gs://{_GCS_BUCKET}/{object_name}"
+    logger.info(f"🧾 Manifest gravado: {gcs_uri}")
+    return gcs_uri
+
+
+def save_run_history(df: pl.DataFrame, timestamp_str: str, run_id: str) -> str:
+    """
+    Grava o histórico de uma execução (uma linha por model) em
+    `_history/run_date=YYYY-MM-DD/<timestamp>_<run_id>.parquet`.
 
     Returns:
-        str: URI gs:// do arquivo salvo.
+        str: URI gs:// do arquivo.
     """
-    bucket_name = _GCS_BUCKET
-    now = datetime.now(timezone.utc)
-    timestamp_str = object_timestamp or now.strftime("%Y%m%d_%H%M%S")
-    ingestion_ts = now.isoformat()
+    run_date = datetime.strptime(timestamp_str[:8], "%Y%m%d").strftime("%Y-%m-%d")
+    object_name = (
+        f"{_GCS_BASE_PATH.strip('/')}/_history/run_date={run_date}/"
+        f"{timestamp_str}_{run_id}.parquet"
+    )
+    buffer = io.BytesIO()
+    df.write_parquet(buffer, **resolve_writer_profile().write_options())
+    return _upload_parquet_buffer(object_name, buffer)
 
-    df_to_save = df.with_columns(pl.lit(ingestion_ts).alias("ingestion_ts"))
 
-    chunk_suffix = None
-    if chunk_index is not None:
-        chunk_suffix = f"chunk{chunk_index:04d}"
+def save_profile_reports(
+    reports: Dict[str, bytes],
+    *,
+    timestamp: str,
+    model: Optional[str] = None,
+    mode: Optional[str] = None,
+    run_id: Optional[str] = None,
+) -> List[str]:
+    """
+    Grava relatórios de profiling (um arquivo por extensão).
+
+    Com `model`, ficam ao lado do manifest (`<timestamp>_profile.<ext>`);
+    sem, em `_profiles/run_date=YYYY-MM-DD/<timestamp>_<run_id>_profile.<ext>`.
+    Com `PROFILE_DIR`, grava no diretório local com o mesmo caminho relativo.
 
-    object_name = _build_object_name(model, timestamp_str, chunk_suffix)
-    client = _get_storage_client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(object_name)
+    Returns:
+        List[str]: caminhos locais ou URIs gs:// gravados.
+    """
+    if model:
+        object_names = {
+            extension: _build_object_name(model, timestamp, "profile", mode=mode, extension=extension)
+            for extension in reports
+        }
+    else:
+        run_date = datetime.strptime(timestamp[:8], "%Y%m%d").strftime("%Y-%m-%d")
+        prefix = f"{_GCS_BASE_PATH.strip('/')}/_profiles/run_date={run_date}/{timestamp}_{run_id}"
+        object_names = {extension: f"{prefix}_profile.{extension}" for extension in reports}
 
-    with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tmp:
-        temp_path = tmp.name
+    local_dir = os.getenv("PROFILE_DIR")
+    paths: List[str] = []
+    for extension, payload in reports.items():
+        object_name = object_names[extension]
+        if local_dir:
+            path = os.path.join(local_dir, object_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as handle:
+                handle.write(payload)
+            paths.append(path)
+            continue
+        blob = _get_storage_client().bucket(_GCS_BUCKET).blob(object_name)
+        blob.upload_from_string(payload, content_type="application/octet-stream")
+        paths.append(f"gs://{_GCS_BUCKET}/{object_name}")
+    return paths
 
-    df_to_save.write_parquet(temp_path)
 
+def load_run_manifest(uri: str) -> Optional[Dict[str, Any]]:
+    """Carrega um manifest gravado por `save_run_manifest` (None se não existir)."""
+    bucket_name, _, object_name = uri.removeprefix("gs://").partition("/")
+    client = _get_storage_client()
     try:
-        blob.upload_from_filename(temp_path)
-    finally:
+        raw = client.bucket(bucket_name).blob(object_name).download_as_text(encoding="utf-8")
+    except NotFound:
+        return None
+    return json.loads(raw)
+
+
+class UploadPool:
+    """
+    Uploads em background (Parquets e payloads), com limite de objetos em voo.
+
+    `submit` bloqueia quando `max_in_flight` buffers já aguardam upload, o que
+    limita a memória a ~`max_in_flight` x tamanho alvo do arquivo. Cada
+    Parquet tem retry próprio em `_upload_parquet_buffer`.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        *,
+        thread_name_prefix: str = "gcs-upload",
+    ):
+        if max_in_flight is None:
+            max_in_flight = env_int("GCS_UPLOAD_MAX_IN_FLIGHT", _DEFAULT_UPLOADS_IN_FLIGHT)
+        self.max_in_flight = max(max_in_flight, 1)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight,
+            thread_name_prefix=thread_name_prefix,
+        )
+
+    def submit(self, object_name: str, buffer: io.BytesIO) -> "Future[str]":
+        return self.submit_call(_upload_parquet_buffer, object_name, buffer)
+
+    def submit_call(self, func: Callable[..., str], *args: Any) -> "Future[str]":
+        """Agenda `func(*args)` respeitando o limite de uploads em voo."""
+        self._slots.acquire()
         try:
-            os.remove(temp_path)
-        except FileNotFoundError:
-            pass
+            future = self._executor.submit(tracing.bind_context(func), *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
 
-    gcs_uri = f"gs://{bucket_name}/{object_name}"
-    logger.info(f"💾 Upload concluído: {gcs_uri}")
-    return gcs_uri
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def payload_upload_pool() -> UploadPool:
+    """
+    Pool dos payloads offloaded, separado do pool dos Parquets.
+
+    Com slots próprios (`GCS_PAYLOAD_UPLOADS_IN_FLIGHT`, default 16), um
+    Parquet grande em upload não segura os payloads, e o fetch só espera
+    quando há muitos payloads em voo.
+    """
+    return UploadPool(
+        env_int("GCS_PAYLOAD_UPLOADS_IN_FLIGHT", _DEFAULT_PAYLOAD_UPLOADS_IN_FLIGHT),
+        thread_name_prefix="gcs-payload",
+    )
+
+
+class PayloadOffloader:
+    """
+    `store_payload` de `offload_large_values` que envia por um `UploadPool`
+    (o de `payload_upload_pool`, não o dos Parquets).
+
+    Os uploads seguem em background, sem segurar o loop de fetch. `known`
+    (compartilhado pela execução) guarda os digests já enviados: um payload
+    repetido em outro batch ou model não manda os bytes de novo.
+    `wait` deve rodar antes de publicar o dataset que referencia os payloads.
+    """
+
+    def __init__(self, upload_pool: UploadPool, known: Optional[Dict[str, str]] = None):
+        self.upload_pool = upload_pool
+        self.known = known if known is not None else {}
+        self._lock = threading.Lock()
+        self._uploads: List["Future[str]"] = []
+
+    def __call__(self, payload: bytes, digest: str, field_type: str) -> str:
+        with self._lock:
+            uri = self.known.get(digest)
+            if uri is not None:
+                return uri
+            uri = f"gs://{_GCS_BUCKET}/{_build_payload_object_name(digest)}"
+            self.known[digest] = uri
+
+        upload = self.upload_pool.submit_call(save_payload_to_gcs, payload, digest, field_type)
+        upload.add_done_callback(lambda done: self._forget_failed(done, digest))
+        self._uploads.append(upload)
+        return uri
+
+    def _forget_failed(self, upload: "Future[str]", digest: str) -> None:
+        # Digest sem objeto no bucket não pode ser reaproveitado por outro batch.
+        if upload.exception() is not None:
+            with self._lock:
+                self.known.pop(digest, None)
+
+    def wait(self) -> int:
+        """Espera os uploads agendados (propaga a primeira falha) e retorna quantos foram."""
+        uploads, self._uploads = self._uploads, []
+        for upload in uploads:
+            upload.result()
+        return len(uploads)
+
+
+class ParquetChunkWriter:
+    """
+    Escreve os batches de um model em poucos Parquets grandes.
+
+    Cada batch é acumulado e gravado como row group em um arquivo aberto em
+    memória; ao atingir o tamanho alvo (`PARQUET_TARGET_FILE_MB`) o arquivo é
+    fechado, enviado como `<timestamp>_chunkNNNN.parquet` e outro é aberto.
+    Assim o `batch_size` do search_read não define mais o tamanho dos arquivos.
+
+    Com `upload_pool`, os uploads seguem em background enquanto o próximo
+    arquivo é montado; `close` espera todos e devolve as URIs em ordem.
+
+    Com `PARQUET_COLUMN_PROFILES` (default ligado), cada batch também gera
+    perfis por coluna (nulos, min, max, distintos aproximados), unidos ao
+    longo da execução e gravados no manifest. `PARQUET_COLUMN_DISTINCT=0`
+    mantém os perfis sem o sketch de distintos; o tempo gasto nos perfis vai
+    para `profile_seconds` no manifest.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        object_timestamp: str,
+        profile: Optional[ParquetWriterProfile] = None,
+        target_bytes: Optional[int] = None,
+        upload_pool: Optional[UploadPool] = None,
+        mode: Optional[str] = None,
+        fields_metadata: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.model = model
+        self.object_timestamp = object_timestamp
+        self.profile = profile or resolve_writer_profile(model)
+        self.target_bytes = target_bytes or _target_file_bytes()
+        self.row_group_rows = self.profile.row_group_size or _DEFAULT_ROW_GROUP_ROWS
+        self.upload_pool = upload_pool
+        self.mode = mode
+        self.fields_metadata = fields_metadata or {}
+
+        self._uploads: List["Future[str]"] = []
+        self._chunks: List[Dict[str, Any]] = []
+        self._file_rows = 0
+        self._file_bounds: Dict[str, Dict[str, Any]] = {}
+        self._polars_schema: Optional[Dict[str, Any]] = None
+        self._profile_columns = env_flag("PARQUET_COLUMN_PROFILES", True)
+        self._profile_distinct = env_flag("PARQUET_COLUMN_DISTINCT", True)
+        self._column_profiles: Dict[str, ColumnProfile] = {}
+        self._profile_seconds = 0.0
+        self._schema: Optional[pa.Schema] = None
+        self._buffer: Optional[io.BytesIO] = None
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+    def write(self, df: pl.DataFrame) -> None:
+        """Adiciona um batch (com `ingestion_ts`) ao arquivo corrente."""
+        if df.is_empty():
+            return
+
+        ingestion_ts = datetime.now(timezone.utc).isoformat()
+        df_to_save = df.with_columns(pl.lit(ingestion_ts).alias("ingestion_ts"))
+        if self._polars_schema is None:
+            self._polars_schema = dict(df_to_save.schema)
+        self._file_rows += df.height
+        self._file_bounds = _merge_bounds(self._file_bounds, _batch_bounds(df))
+        if self._profile_columns:
+            self._profile_batch(df)
+
+        table = df_to_save.to_arrow()
+        del df_to_save
+        if self._schema is None:
+            self._schema = table.schema
+        elif not table.schema.equals(self._schema, check_metadata=False):
+            table = table.cast(self._schema)
+
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        self._pending_bytes += table.nbytes
+
+        if (
+            self._pending_rows >= self.row_group_rows
+            or self._pending_bytes >= _MAX_PENDING_BYTES
+        ):
+            self._flush_row_group()
+
+    def _profile_batch(self, df: pl.DataFrame) -> None:
+        started = time.perf_counter()
+        with metrics.COLUMN_PROFILE_SECONDS.labels(dataset=self.model).time(), tracing.span(
+            "profile_columns", dataset=self.model, rows=df.height
+        ):
+            bounds = {
+                column: profile.sketch_bound()
+                for column, profile in self._column_profiles.items()
+            }
+            self._column_profiles = merge_profiles(
+                self._column_profiles,
+                profile_dataframe(
+                    df,
+                    bounds,
+                    distinct=self._profile_distinct,
+                    fields_metadata=self.fields_metadata,
+                ),
+            )
+        self._profile_seconds += time.perf_counter() - started
+
+    @property
+    def bytes_written(self) -> int:
+        """Bytes dos Parquets já fechados (todos, depois de `close`)."""
+        return sum(chunk["bytes"] for chunk in self._chunks)
+
+    def close(self) -> List[str]:
+        """Grava o que restou e retorna as URIs gs:// na ordem dos chunks."""
+        self._flush_row_group()
+        self._finish_file()
+        uris = [upload.result() for upload in self._uploads]
+        for chunk, uri in zip(self._chunks, uris):
+            chunk["uri"] = uri
+        return uris
+
+    def manifest(self, *, mode: str) -> Dict[str, Any]:
+        """
+        Resumo da execução para o manifest: chunks (linhas, bytes, min/max de
+        `id`/`write_date`), totais, limites, perfis das colunas e fingerprint
+        do schema.
+
+        Deve ser chamado depois de `close`.
+        """
+        bounds: Dict[str, Dict[str, Any]] = {}
+        for chunk in self._chunks:
+            bounds = _merge_bounds(bounds, chunk["bounds"])
+
+        schema = {name: str(dtype) for name, dtype in (self._polars_schema or {}).items()}
+        return {
+            "model": self.model,
+            "run_timestamp": self.object_timestamp,
+            "mode": mode,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "records_count": sum(chunk["rows"] for chunk in self._chunks),
+            "bytes": sum(chunk["bytes"] for chunk in self._chunks),
+            "schema": schema,
+            "schema_fingerprint": schema_fingerprint(schema) if schema else None,
+            "bounds": bounds,
+            "columns": {
+                column: profile.to_dict()
+                for column, profile in self._column_profiles.items()
+            },
+            "profile_seconds": round(self._profile_seconds, 6),
+            "chunks": [dict(chunk) for chunk in self._chunks],
+        }
+
+    def _flush_row_group(self) -> None:
+        if not self._pending:
+            return
+
+        # Cada batch Categorical traz o próprio dicionário; sem unificar, o
+        # pyarrow troca para encoding plain no meio da coluna e o Polars não lê.
+        table = pa.concat_tables(self._pending).unify_dictionaries()
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+        if self._writer is None:
+            self._buffer = io.BytesIO()
+            self._writer = pq.ParquetWriter(
+                self._buffer,
+                self._schema,
+                **self.profile.arrow_writer_options(),
+            )
+        with metrics.PARQUET_ENCODE_SECONDS.labels(dataset=self.model).time(), tracing.span(
+            "write_row_group", dataset=self.model, rows=table.num_rows
+        ):
+            self._writer.write_table(table, row_group_size=self.row_group_rows)
+
+        if self._buffer.tell() >= self.target_bytes:
+            self._finish_file()
+
+    def _finish_file(self) -> None:
+        if self._writer is None:
+            return
+
+        with metrics.PARQUET_ENCODE_SECONDS.labels(dataset=self.model).time(), tracing.span(
+            "close_parquet", dataset=self.model, rows=self._file_rows
+        ) as close_span:
+            self._writer.close()
+            close_span.set_attribute("bytes", self._buffer.getbuffer().nbytes)
+        buffer = self._buffer
+        self._writer = None
+        self._buffer = None
+
+        self._chunks.append(
+            {
+                "uri": None,
+                "rows": self._file_rows,
+                "bytes": buffer.getbuffer().nbytes,
+                "bounds": self._file_bounds,
+            }
+        )
+        self._file_rows = 0
+        self._file_bounds = {}
+
+        chunk_suffix = f"chunk{len(self._uploads) + 1:04d}"
+        object_name = _build_object_name(
+            self.model,
+            self.object_timestamp,
+            chunk_suffix,
+            mode=self.mode,
+        )
+        if self.upload_pool is not None:
+            self._uploads.append(self.upload_pool.submit(object_name, buffer))
+            return
+
+        upload: "Future[str]" = Future()
+        upload.set_result(_upload_parquet_buffer(object_name, buffer))
+        self._uploads.append(upload)
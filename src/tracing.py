@@ -0,0 +1,221 @@
+import functools
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from loguru import logger
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - opentelemetry-api é opcional
+    otel_context = None
+    otel_trace = None
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_SERVICE_NAME = "odoo-extractor"
+_DEFAULT_FILE_PATH = "traces.jsonl"
+
+_lock = threading.Lock()
+_configured = False
+_provider: Any = None
+_tracer: Any = None
+_file_handle: Any = None
+
+
+class _NoopSpan:
+    """Span usado quando o tracing está desligado: aceita e descarta tudo."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def end(self, *, error: Optional[str] = None, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenTelemetry rejeita `None`; demais valores não primitivos viram texto."""
+    cleaned: Dict[str, Any] = {}
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if not isinstance(value, (bool, int, float, str)):
+            value = str(value)
+        cleaned[key] = value
+    return cleaned
+
+
+def _build_exporter(name: str) -> Any:
+    global _file_handle
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        # Endpoint/headers vêm das variáveis padrão OTEL_EXPORTER_OTLP_*.
+        return OTLPSpanExporter()
+    if name in {"file", "console"}:
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        if name == "console":
+            return ConsoleSpanExporter()
+        path = os.getenv("TRACING_FILE_PATH") or _DEFAULT_FILE_PATH
+        _file_handle = open(path, "a", encoding="utf-8")
+        logger.info(f"🔭 Spans gravados em {path}")
+        return ConsoleSpanExporter(
+            out=_file_handle,
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    raise ValueError(f"TRACING_EXPORTER desconhecido: {name}")
+
+
+def configure_tracing(exporter: Any = None, *, batch: bool = True) -> bool:
+    """
+    Inicializa o tracer do processo.
+
+    Sem `exporter`, usa `TRACING_EXPORTER` (`otlp`, `file` ou `console`);
+    vazio desliga o tracing. Requer `opentelemetry-sdk` (e, para `otlp`,
+    `opentelemetry-exporter-otlp-proto-http`); sem os pacotes, os spans
+    viram no-op. Retorna se o tracing ficou ativo.
+    """
+    global _configured, _provider, _tracer
+    with _lock:
+        _configured = True
+        name = (os.getenv("TRACING_EXPORTER") or "").strip().lower()
+        if exporter is None and name in {"", "0", "none", "off"}:
+            return False
+
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+
+            if exporter is None:
+                exporter = _build_exporter(name)
+        except (ImportError, ValueError) as exc:
+            logger.warning(f"⚠️ Tracing desligado: {exc}")
+            return False
+
+        service_name = os.getenv("OTEL_SERVICE_NAME") or _SERVICE_NAME
+        _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        processor = BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter)
+        _provider.add_span_processor(processor)
+        _tracer = _provider.get_tracer(_SERVICE_NAME)
+        logger.info(f"🔭 Tracing ativo (service.name={service_name})")
+        return True
+
+
+def _get_tracer() -> Any:
+    if not _configured:
+        configure_tracing()
+    return _tracer
+
+
+def enabled() -> bool:
+    return _get_tracer() is not None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Span filho do span corrente; exceções são registradas no span."""
+    tracer = _get_tracer()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+    with tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+class ActiveSpan:
+    """
+    Span aberto e tornado corrente sem bloco `with`, para laços longos
+    (um model inteiro) cujo fim fica no `finally`. `end` deve rodar na
+    mesma thread que o criou.
+    """
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self._span = _tracer.start_span(name, attributes=_clean(attributes))
+        self._token = otel_context.attach(otel_trace.set_span_in_context(self._span))
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.set_attributes({key: value})
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self._span.set_attributes(_clean(attributes))
+
+    def end(self, *, error: Optional[str] = None, **attributes: Any) -> None:
+        self.set_attributes(attributes)
+        if error:
+            self._span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, error))
+        otel_context.detach(self._token)
+        self._span.end()
+
+
+def start_span(name: str, **attributes: Any) -> Any:
+    if _get_tracer() is None:
+        return _NOOP_SPAN
+    return ActiveSpan(name, attributes)
+
+
+def annotate(**attributes: Any) -> None:
+    """Adiciona atributos ao span corrente (no-op sem tracing)."""
+    if _get_tracer() is None:
+        return
+    otel_trace.get_current_span().set_attributes(_clean(attributes))
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator: cada chamada da função vira um span."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def bind_context(func: F) -> F:
+    """
+    Propaga o contexto de trace para `func` quando ela roda em outra thread
+    (ex.: uploads no pool), mantendo-a como filha do span que a submeteu.
+    """
+    if _get_tracer() is None:
+        return func
+    captured = otel_context.get_current()
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = otel_context.attach(captured)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def shutdown_tracing() -> None:
+    """Exporta os spans pendentes e volta ao estado não configurado."""
+    global _configured, _provider, _tracer, _file_handle
+    with _lock:
+        if _provider is not None:
+            try:
+                _provider.shutdown()
+            except Exception as exc:
+                logger.warning(f"⚠️ Falha ao exportar spans pendentes: {exc}")
+        if _file_handle is not None:
+            _file_handle.close()
+        _configured = False
+        _provider = None
+        _tracer = None
+        _file_handle = None
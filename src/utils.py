@@ -1,4 +1,6 @@
+import hashlib
 import json
+import os
 from collections import Counter, defaultdict
 from datetime import datetime
 from decimal import Decimal
@@ -21,6 +23,28 @@ _FLOAT_FIELD_TYPES = {"float", "monetary"}
 _INTEGER_FIELD_TYPES = {"integer"}
 _DATETIME_FIELD_TYPES = {"datetime"}
 _DATE_FIELD_TYPES = {"date"}
+# Campos que repetem poucos valores distintos em milhões de linhas.
+# Só selection tem domínio fechado; many2one pode ter milhões de ids distintos.
+_DICTIONARY_FIELD_TYPES = {"selection"}
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Lê uma variável de ambiente booleana (1/true/yes/on)."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def env_int(name: str, default: int = 0) -> int:
+    """Lê uma variável de ambiente inteira, caindo no default se inválida."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
 
 
 def _is_null(value: Any) -> bool:
@@ -69,6 +93,14 @@ def _coerce_relation_list(value: Any) -> Optional[str]:
     return str(value)
 
 
+def _coerce_relation_count(value: Any) -> Optional[str]:
+    if _is_null(value):
+        return "0"
+    if isinstance(value, (list, tuple, set)):
+        return str(len(value))
+    return _coerce_relation_list(value)
+
+
 def _coerce_int(value: Any) -> Optional[int]:
     if _is_null(value):
         return None
@@ -137,10 +169,17 @@ def _parse_date_value(value: Any) -> Optional[datetime]:
     return None
 
 
-def _coerce_value(field_type: Optional[str], value: Any) -> Any:
+def _coerce_value(
+    field_type: Optional[str],
+    value: Any,
+    *,
+    explode_relations: bool = False,
+) -> Any:
     if field_type in _RELATION_ID_TYPES:
         return _coerce_many2one(value)
     if field_type in _RELATION_LIST_TYPES:
+        if explode_relations:
+            return _coerce_relation_count(value)
         return _coerce_relation_list(value)
     return _ensure_string(value)
 
@@ -229,21 +268,161 @@ def ensure_string_columns(
     return df
 
 
+def encode_dictionary_columns(
+    df: pl.DataFrame,
+    fields_metadata: Dict[str, Dict[str, Any]],
+) -> pl.DataFrame:
+    """
+    Converte colunas selection para Categorical.
+
+    O writer já grava páginas de dicionário para Utf8; o Categorical só muda
+    o tipo lógico lido pelos consumidores Polars/Arrow. many2one fica em
+    Utf8: a cardinalidade não é limitada e o Categorical acumularia os ids
+    no mapeamento global de categorias do Polars.
+    """
+    casts = [
+        pl.col(column).cast(pl.Categorical)
+        for column in df.columns
+        if (fields_metadata.get(column) or {}).get("type") in _DICTIONARY_FIELD_TYPES
+        and df.schema[column] == pl.Utf8
+    ]
+    if not casts:
+        return df
+    return df.with_columns(casts)
+
+
 def sanitize_records(
     records: List[Dict[str, Any]],
     fields_metadata: Dict[str, Dict[str, Any]],
+    *,
+    explode_relations: bool = False,
 ) -> List[Dict[str, Any]]:
-    """Normaliza valores usando o schema do Odoo para garantir tipos consistentes."""
+    """
+    Normaliza valores usando o schema do Odoo para garantir tipos consistentes.
+
+    Com `explode_relations=True`, campos one2many/many2many guardam apenas a
+    contagem de ids (os pares vão para `build_relation_link_frames`).
+    """
     normalized_records: List[Dict[str, Any]] = []
     for record in records:
         normalized: Dict[str, Any] = {}
         for key, value in record.items():
             metadata = fields_metadata.get(key) or {}
-            normalized[key] = _coerce_value(metadata.get("type"), value)
+            normalized[key] = _coerce_value(
+                metadata.get("type"),
+                value,
+                explode_relations=explode_relations,
+            )
         normalized_records.append(normalized)
     return normalized_records
 
 
+def payload_size_column(field: str) -> str:
+    """Coluna com o tamanho (bytes) de um campo binary/html."""
+    return f"{field}__bytes"
+
+
+def payload_offloaded_column(field: str) -> str:
+    """Coluna que marca (1/0) se o campo guarda a referência `gs://` do payload."""
+    return f"{field}__offloaded"
+
+
+def offload_large_values(
+    records: List[Dict[str, Any]],
+    fields_metadata: Dict[str, Dict[str, Any]],
+    thresholds: Dict[str, int],
+    store_payload: Callable[[bytes, str, str], str],
+) -> int:
+    """
+    Move valores grandes de campos binary/html para fora do batch.
+
+    `thresholds` mapeia tipo Odoo -> limite em bytes (0 desativa). Valores
+    acima do limite são enviados via `store_payload(payload, digest, field_type)`
+    e substituídos pela referência retornada; a coluna `<campo>__bytes`
+    guarda o tamanho original e `<campo>__offloaded` diz se o valor é a
+    referência (1) ou o conteúdo (0). Altera `records` in-place e retorna
+    quantos valores foram movidos.
+    """
+    fields = {
+        field: metadata.get("type")
+        for field, metadata in fields_metadata.items()
+        if thresholds.get(metadata.get("type") or "", 0) > 0
+    }
+    if not fields or not records:
+        return 0
+
+    references: Dict[str, str] = {}
+    offloaded = 0
+    for record in records:
+        for field, field_type in fields.items():
+            if field not in record:
+                continue
+            value = record[field]
+            if _is_null(value):
+                record[payload_size_column(field)] = None
+                record[payload_offloaded_column(field)] = None
+                continue
+
+            payload = str(value).encode("utf-8")
+            record[payload_size_column(field)] = len(payload)
+            record[payload_offloaded_column(field)] = 0
+            if len(payload) <= thresholds[field_type]:
+                continue
+
+            digest = hashlib.sha256(payload).hexdigest()
+            if digest not in references:
+                references[digest] = store_payload(payload, digest, field_type)
+            record[field] = references[digest]
+            record[payload_offloaded_column(field)] = 1
+            offloaded += 1
+    return offloaded
+
+
+def relation_list_fields(
+    fields_metadata: Dict[str, Dict[str, Any]],
+    selected_fields: Iterable[str],
+) -> List[str]:
+    """Retorna os campos one2many/many2many dentre os selecionados."""
+    return [
+        field
+        for field in selected_fields
+        if (fields_metadata.get(field) or {}).get("type") in _RELATION_LIST_TYPES
+    ]
+
+
+def build_relation_link_frames(
+    records: List[Dict[str, Any]],
+    fields: Iterable[str],
+) -> Dict[str, pl.DataFrame]:
+    """
+    Explode campos x2many do batch em tabelas `(id, related_id)`.
+
+    As listas viram uma coluna List e são explodidas pelo Polars; as chaves
+    seguem a persistência uniforme em Utf8 para casar com a tabela principal.
+    Registro com a relação vazia gera uma linha marcadora `(id, null)`: num
+    incremental, é o que retira os vínculos que o registro tinha antes.
+    """
+    ids = [record.get("id") for record in records]
+    frames: Dict[str, pl.DataFrame] = {}
+    for field in fields:
+        related = [
+            list(value) if isinstance(value, (list, tuple, set)) else None
+            for value in (record.get(field) for record in records)
+        ]
+        frame = (
+            pl.DataFrame(
+                {"id": ids, "related_id": related},
+                schema={"id": pl.Int64, "related_id": pl.List(pl.Int64)},
+                strict=False,
+            )
+            .explode("related_id")
+            .drop_nulls("id")
+            .select(pl.all().cast(pl.Utf8))
+        )
+        frames[field] = frame
+    return frames
+
+
 def _map_field_type_to_polars(field_type: Optional[str]) -> Optional[pl.DataType]:
     # Forca persistencia uniforme em string para todos os campos no parquet.
     return pl.Utf8
@@ -0,0 +1,199 @@
+import json
+import random
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.local_storage import LocalStorageClient
+from parquet_analysis import analyze_parquets
+from parquet_analysis.analyze_parquets import (
+    _compute_field_stats,
+    _footer_field_stats,
+    analyze_blob,
+    analyze_run,
+    result_rows,
+    write_results,
+)
+
+
+def _write_chunk(path, ids, write_dates):
+    pl.DataFrame({"id": ids, "write_date": write_dates}).write_parquet(path)
+    return str(path)
+
+
+def test_analyze_run_aggregates_all_chunks(tmp_path) -> None:
+    uris = [
+        _write_chunk(tmp_path / "a.parquet", ["1", "2"], ["2025-01-01", None]),
+        _write_chunk(tmp_path / "b.parquet", ["3", "4"], ["2025-03-01", "2025-02-01"]),
+    ]
+
+    result = analyze_run(uris, ["id", "missing"], ["date"], set())
+
+    assert result["rows"] == 4
+    assert result["chunks"] == 2
+    assert result["keyword_fields"] == ["write_date"]
+    assert result["stats"]["write_date"]["null_pct"] == 25.0
+    assert result["stats"]["write_date"]["min"] == "2025-01-01"
+    assert result["stats"]["write_date"]["max"] == "2025-03-01"
+    assert result["stats"]["id"]["max"] == "4"
+    assert result["stats"]["missing"] == {"available": False}
+
+
+def test_write_results_parquet(tmp_path) -> None:
+    uri = _write_chunk(tmp_path / "a.parquet", ["1"], ["2025-01-01"])
+    result = analyze_run([uri], ["id"], ["date"], set())
+    result["run_timestamp"] = "20250101_000000"
+
+    output = tmp_path / "out.parquet"
+    write_results(result_rows("res_partner", result), str(output))
+
+    df = pl.read_parquet(output)
+    assert df.get_column("field").to_list() == ["id", "write_date"]
+    assert df.get_column("available").to_list() == [True, True]
+
+
+class _LocalBlob:
+    """Blob que abre um arquivo local, registrando quantos bytes foram lidos."""
+
+    def __init__(self, path):
+        self.path = path
+        self.bytes_read = 0
+
+    def open(self, mode="rb", chunk_size=None):
+        blob = self
+        handle = open(self.path, mode)
+        original_read = handle.read
+
+        def read(size=-1):
+            data = original_read(size)
+            blob.bytes_read += len(data)
+            return data
+
+        handle.read = read
+        return handle
+
+
+def _write_footer_fixture(path) -> None:
+    rows = 3000
+    table = pa.table(
+        {
+            "id": [str(index) for index in range(rows)],
+            # Nulo em quase tudo; o primeiro row group é inteiramente nulo.
+            "write_date": [None] * 2500 + [f"2025-01-{index % 28 + 1:02d}" for index in range(500)],
+            "name": [f"nome {index % 97}" if index % 3 else None for index in range(rows)],
+            # Coluna larga e pouco compressível: não deve ser baixada.
+            "payload": [random.Random(index).randbytes(300).hex() for index in range(rows)],
+        }
+    )
+    pq.write_table(
+        table,
+        path,
+        row_group_size=1000,
+        write_statistics=["id", "write_date"],
+    )
+
+
+def test_analyze_blob_matches_full_read(tmp_path) -> None:
+    path = tmp_path / "chunk.parquet"
+    _write_footer_fixture(path)
+    blob = _LocalBlob(path)
+
+    result = analyze_blob(blob, ["id", "write_date", "name", "missing"], [], set())
+
+    full = pl.read_parquet(path)
+    for field in ("id", "write_date", "name"):
+        assert result["stats"][field] == _compute_field_stats(full, field), field
+    assert result["stats"]["missing"] == {"available": False}
+    assert result["rows"] == 3000
+    # Só a coluna sem estatísticas é lida; `payload` nunca é baixada.
+    assert result["columns_read"] == ["name"]
+    assert blob.bytes_read < path.stat().st_size / 2
+
+
+def test_footer_field_stats_requires_statistics(tmp_path) -> None:
+    path = tmp_path / "chunk.parquet"
+    _write_footer_fixture(path)
+    metadata = pq.ParquetFile(path).metadata
+
+    write_date = _footer_field_stats(metadata, 1)
+    assert write_date["null_pct"] == 2500 / 3000 * 100
+    assert (write_date["min"], write_date["max"]) == ("2025-01-01", "2025-01-28")
+    assert _footer_field_stats(metadata, 2) is None
+
+
+def test_whole_run_uses_manifest_profiles_without_reading_parquet(tmp_path, monkeypatch) -> None:
+    client = LocalStorageClient(str(tmp_path))
+    monkeypatch.setattr(analyze_parquets, "_storage_client", client)
+    bucket = client.bucket("bucket")
+    manifest_uri = "gs://bucket/odoo/sale_order/20260101_000000_manifest.json"
+    bucket.blob("odoo/sale_order/_CURRENT.json").upload_from_string(
+        json.dumps(
+            {
+                "base": {
+                    "run_timestamp": "20260101_000000",
+                    "manifest": manifest_uri,
+                    # O arquivo não existe: ler o Parquet falharia.
+                    "files": ["gs://bucket/odoo/sale_order/20260101_000000_chunk0001.parquet"],
+                },
+                "incremental": [],
+            }
+        )
+    )
+    bucket.blob("odoo/sale_order/20260101_000000_manifest.json").upload_from_string(
+        json.dumps(
+            {
+                "records_count": 5000,
+                "schema": {"id": "String", "write_date": "String", "ingestion_ts": "String"},
+                "columns": {
+                    "id": {"count": 5000, "null_pct": 0.0, "min": 1, "max": 5000, "approx_distinct": 4990},
+                    "write_date": {"count": 5000, "null_pct": 10.0, "min": "2025-01-01", "max": "2025-02-01"},
+                },
+                "chunks": [{}],
+            }
+        )
+    )
+
+    result = analyze_parquets._analyze_model_run("bucket", "sale_order", "odoo", ["id"], ["date"], set())
+
+    assert result["source"] == "manifest"
+    assert result["rows"] == 5000
+    assert result["stats"]["id"]["max"] == "5000"
+    assert result["stats"]["id"]["approx_distinct"] == 4990
+    assert result["stats"]["write_date"]["null_pct"] == 10.0
+
+
+def test_manifest_stats_requires_profiles_for_every_field() -> None:
+    manifest = {"schema": {"id": "String", "name": "String"}, "columns": {"id": {}}}
+
+    assert analyze_parquets.manifest_stats(manifest, ["name"], [], set()) is None
+    assert analyze_parquets.manifest_stats({"schema": {"id": "String"}}, ["id"], [], set()) is None
+
+
+def test_discover_models_skips_derived_datasets(monkeypatch) -> None:
+    class _Page:
+        prefixes = [
+            f"odoo/{folder}/"
+            for folder in (
+                "_blobs",
+                "sale_order",
+                "sale_order__order_line",
+                "sale_order__snapshot",
+                "res_partner",
+                "res_partner__category_id",
+                "x_orphan__field",
+            )
+        ]
+
+    class _Client:
+        def list_blobs(self, bucket_name, prefix=None, delimiter=None):
+            return type("Iterator", (), {"pages": [_Page()]})()
+
+    monkeypatch.setattr(analyze_parquets, "_storage_client", _Client())
+
+    assert analyze_parquets.discover_models("bucket", "odoo") == [
+        "res_partner",
+        "sale_order",
+        # Sem a pasta do model pai, não é um dataset derivado.
+        "x_orphan__field",
+    ]
@@ -0,0 +1,84 @@
+import base64
+import importlib
+import xmlrpc.client
+
+import polars as pl
+import pytest
+from google.api_core.exceptions import PreconditionFailed
+
+from benchmarks.fake_odoo import FAKE_PASSWORD, FAKE_UID, FakeOdooServer, SyntheticModel, parse_type_mix
+from benchmarks.local_storage import _STORAGE_MODULES, LocalStorageClient
+from benchmarks.run_benchmark import run_benchmark
+
+
+@pytest.fixture
+def restore_storage_clients(monkeypatch):
+    for module_name in _STORAGE_MODULES:
+        monkeypatch.setattr(importlib.import_module(module_name), "_storage_client", None)
+    for name in ("ODOO_URL", "ODOO_DB", "ODOO_USERNAME", "ODOO_PASSWORD"):
+        monkeypatch.setenv(name, "")
+
+
+def test_fake_server_pages_deterministic_records() -> None:
+    model = SyntheticModel("bench.a", rows=5, width=6, type_mix={"char": 1, "many2one": 1})
+    with FakeOdooServer([model]) as server:
+        proxy = xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/object", allow_none=True)
+        args = ("bench", FAKE_UID, FAKE_PASSWORD, "bench.a")
+        fields = proxy.execute_kw(*args, "fields_get", [], {"attributes": ["type"]})
+        first = proxy.execute_kw(*args, "search_read", [[]], {"fields": ["x_char_0"], "limit": 3})
+        second = proxy.execute_kw(*args, "search_read", [[]], {"fields": ["x_char_0"], "offset": 3})
+        again = proxy.execute_kw(*args, "search_read", [[]], {"fields": ["x_char_0"], "limit": 3})
+        count = proxy.execute_kw(*args, "search_count", [[]])
+
+    assert fields["x_many2one_1"] == {"type": "many2one"}
+    assert [record["id"] for record in first + second] == [1, 2, 3, 4, 5]
+    assert first == again
+    assert count == 5
+
+
+def test_fake_server_returns_binary_as_base64() -> None:
+    mix = parse_type_mix("char=1,binary=1")
+    model = SyntheticModel("bench.b", rows=3, width=2, type_mix=mix, null_ratio=0)
+    with FakeOdooServer([model]) as server:
+        proxy = xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/object", allow_none=True)
+        args = ("bench", FAKE_UID, FAKE_PASSWORD, "bench.b")
+        fields = proxy.execute_kw(*args, "fields_get", [], {"attributes": ["type"]})
+        records = proxy.execute_kw(*args, "search_read", [[]], {"fields": ["x_binary_0"]})
+
+    assert fields["x_binary_0"] == {"type": "binary"}
+    assert all(len(base64.b64decode(record["x_binary_0"], validate=True)) >= 256 for record in records)
+
+
+def test_local_storage_generation_preconditions(tmp_path) -> None:
+    bucket = LocalStorageClient(str(tmp_path)).bucket("lake")
+    blob = bucket.blob("a/b.json")
+    blob.upload_from_string("{}", if_generation_match=0)
+
+    with pytest.raises(PreconditionFailed):
+        bucket.blob("a/b.json").upload_from_string("{}", if_generation_match=0)
+
+    current = bucket.get_blob("a/b.json")
+    assert current.generation == blob.generation
+    current.upload_from_string('{"x": 1}', if_generation_match=current.generation)
+    assert bucket.get_blob("a/b.json").download_as_text() == '{"x": 1}'
+    assert [item.name for item in bucket.list_blobs(prefix="a/")] == ["a/b.json"]
+
+
+def test_run_benchmark_end_to_end(tmp_path, restore_storage_clients) -> None:
+    models = [SyntheticModel("bench.model_0", rows=250, width=12)]
+
+    with FakeOdooServer(models) as server:
+        report = run_benchmark(
+            [model.name for model in models],
+            server_url=server.url,
+            storage_root=str(tmp_path),
+            batch_size=100,
+        )
+
+    assert report["rows"] == 250
+    assert report["failed"] == 0
+    assert report["rpc_calls"] == 5  # fields_get + 3 páginas + página vazia final
+    assert report["parquet_bytes"] > 0
+    assert set(report["stages"]) >= {"fetch", "transform", "encode", "upload"}
+    chunks = list(tmp_path.rglob("bench_model_0/*.parquet"))
+    assert pl.read_parquet(chunks).height == 250
@@ -0,0 +1,52 @@
+import polars as pl
+
+from src.column_stats import merge_profiles, profile_dataframe
+
+
+def test_profile_dataframe_merges_across_batches() -> None:
+    first = profile_dataframe(pl.DataFrame({"state": ["draft", None, "posted"]}))
+    second = profile_dataframe(pl.DataFrame({"state": ["cancel", "draft", None]}))
+
+    merged = merge_profiles(first, second)["state"].to_dict()
+
+    assert merged["count"] == 6
+    assert merged["null_count"] == 2
+    assert merged["min"] == "cancel"
+    assert merged["max"] == "posted"
+    assert merged["approx_distinct"] == 3
+
+
+def test_profile_dataframe_estimates_high_cardinality() -> None:
+    profiles = {}
+    for batch in range(10):
+        df = pl.DataFrame({"id": [str(batch * 2000 + row) for row in range(2000)]})
+        profiles = merge_profiles(profiles, profile_dataframe(df))
+
+    estimate = profiles["id"].approx_distinct()
+
+    assert abs(estimate - 20_000) / 20_000 < 0.1
+
+
+def test_sketch_bounds_do_not_change_the_sketch() -> None:
+    bounded = {}
+    unbounded = {}
+    for batch in range(5):
+        df = pl.DataFrame({"id": [str(batch * 3000 + row) for row in range(3000)]})
+        bounds = {column: profile.sketch_bound() for column, profile in bounded.items()}
+        bounded = merge_profiles(bounded, profile_dataframe(df, bounds))
+        unbounded = merge_profiles(unbounded, profile_dataframe(df))
+
+    assert bounded["id"].sketch == unbounded["id"].sketch
+    assert bounded["id"].sketch_bound() == bounded["id"].sketch[-1]
+
+
+def test_profile_dataframe_without_distinct() -> None:
+    df = pl.DataFrame({"amount": [3, None, 1]})
+
+    profile = merge_profiles(
+        profile_dataframe(df, distinct=False),
+        profile_dataframe(df),
+    )["amount"].to_dict()
+
+    assert (profile["null_count"], profile["min"], profile["max"]) == (2, "1", "3")
+    assert profile["approx_distinct"] is None
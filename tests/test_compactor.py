@@ -0,0 +1,80 @@
+import polars as pl
+
+import src.storage as storage
+from app.engine.compactor import build_current_links, build_current_state
+from src.utils import build_relation_link_frames
+
+
+def test_build_current_state_keeps_latest_row_and_drops_tombstones(tmp_path) -> None:
+    first = tmp_path / "20260101_000000_chunk0001.parquet"
+    second = tmp_path / "20260102_000000_chunk0001.parquet"
+    pl.DataFrame(
+        {
+            "id": ["1", "2"],
+            "name": ["a", "b"],
+            "write_date": ["2026-01-01 00:00:00", "2026-01-01 00:00:00"],
+            "ingestion_ts": ["2026-01-01T00:00:00", "2026-01-01T00:00:00"],
+        }
+    ).write_parquet(first)
+    pl.DataFrame(
+        {
+            "id": ["1", "2", "3"],
+            "name": ["a2", "b", "c"],
+            "write_date": [
+                "2026-01-02 00:00:00",
+                "2026-01-02 00:00:00",
+                "2026-01-02 00:00:00",
+            ],
+            "ingestion_ts": ["2026-01-02T00:00:00"] * 3,
+            "__deleted": ["false", "true", None],
+        }
+    ).write_parquet(second)
+
+    out = build_current_state([str(first), str(second)]).collect(engine="streaming")
+
+    assert sorted(out.select("id", "name").rows()) == [("1", "a2"), ("3", "c")]
+    assert "__deleted" not in out.columns
+
+
+def test_build_current_links_replaces_link_set_per_parent(tmp_path) -> None:
+    def write(path, records, ingestion_ts):
+        frame = build_relation_link_frames(records, ["tag_ids"])["tag_ids"]
+        frame.with_columns(pl.lit(ingestion_ts).alias("ingestion_ts")).write_parquet(path)
+
+    full = tmp_path / "20260101_000000_chunk0001.parquet"
+    inc = tmp_path / "20260102_000000_chunk0001.parquet"
+    write(
+        full,
+        [{"id": 1, "tag_ids": [10, 11]}, {"id": 2, "tag_ids": [20]}, {"id": 3, "tag_ids": [30]}],
+        "2026-01-01T00:00:00",
+    )
+    write(inc, [{"id": 1, "tag_ids": [12]}, {"id": 2, "tag_ids": []}], "2026-01-02T00:00:00")
+
+    out = build_current_links([str(full), str(inc)]).collect(engine="streaming")
+
+    assert sorted(out.select("id", "related_id").rows()) == [("1", "12"), ("3", "30")]
+
+
+def test_list_relation_datasets_skips_snapshots(monkeypatch) -> None:
+    class _Blob:
+        def __init__(self, name):
+            self.name = name
+
+    names = [
+        "data-lake/odoo/sale_order__tag_ids/_CURRENT.json",
+        "data-lake/odoo/sale_order__tag_ids/20260101_000000_chunk0001.parquet",
+        "data-lake/odoo/sale_order__tag_ids__snapshot/_CURRENT.json",
+        "data-lake/odoo/sale_order__snapshot/_CURRENT.json",
+        "data-lake/odoo/sale_order__line_ids/_CURRENT.json",
+    ]
+
+    class _Client:
+        def list_blobs(self, bucket_name, prefix=None):
+            return [_Blob(name) for name in names if name.startswith(prefix)]
+
+    monkeypatch.setattr(storage, "_storage_client", _Client())
+
+    assert storage.list_relation_datasets("sale.order") == [
+        "sale.order__line_ids",
+        "sale.order__tag_ids",
+    ]
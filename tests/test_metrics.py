@@ -0,0 +1,35 @@
+import xmlrpc.client
+
+from src import metrics
+from src.metrics import REGISTRY, export_job_metrics, render_latest
+from src.odoo_extractor.connection import TimeoutTransport
+
+
+def _sample(name, labels=None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+def test_transport_counts_decoded_response_bytes() -> None:
+    payload = xmlrpc.client.dumps(([{"id": 1, "name": "Acme"}],), methodresponse=True).encode()
+    before = _sample("odoo_rpc_response_bytes_total")
+
+    parser, unmarshaller = TimeoutTransport().getparser()
+    parser.feed(payload)
+    parser.close()
+
+    assert unmarshaller.close() == ([{"id": 1, "name": "Acme"}],)
+    assert _sample("odoo_rpc_response_bytes_total") - before == len(payload)
+
+
+def test_render_and_textfile_export(tmp_path, monkeypatch) -> None:
+    metrics.ROWS.labels(model="res.partner", mode="inc").inc(10)
+    path = tmp_path / "odoo_extractor.prom"
+    monkeypatch.setenv("METRICS_TEXTFILE_PATH", str(path))
+    monkeypatch.delenv("METRICS_PUSHGATEWAY_URL", raising=False)
+
+    body, content_type = render_latest()
+    export_job_metrics("odoo-extractor-inc")
+
+    assert content_type.startswith("text/plain")
+    assert b'etl_rows_total{mode="inc",model="res.partner"}' in body
+    assert "etl_rows_total" in path.read_text()
@@ -0,0 +1,112 @@
+import json
+import marshal
+import sys
+import threading
+import tracemalloc
+
+import pytest
+
+from app.engine import profiling
+
+
+@profiling.profiled
+def _fake_extraction(*, models, profile=None, fail=False):
+    session = profiling.current_session()
+    session.bind(run_id="abc123", run_timestamp="20250102_030405")
+    for model in models:
+        session.start_model(model)
+        try:
+            for rows in (10, 200):
+                with session.batch(model, rows):
+                    payload = [str(value) * 10 for value in range(rows)]
+                    del payload
+            if fail:
+                raise RuntimeError("falhou")
+        finally:
+            session.finish_model(model, timestamp="20250102_030405", mode="full")
+    return {"total_models": len(models)}
+
+
+def test_resolve_profile_mode(monkeypatch) -> None:
+    monkeypatch.setenv("ETL_PROFILE", "Model")
+    assert profiling.resolve_profile_mode(None) == "model"
+    assert profiling.resolve_profile_mode("off") is None
+    assert profiling.resolve_profile_mode("run") == "run"
+    with pytest.raises(ValueError):
+        profiling.resolve_profile_mode("sampling")
+
+
+def test_run_profile_writes_reports_locally(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+
+    summary = _fake_extraction(models=["res.partner", "sale.order"], profile="run")
+
+    paths = summary["profile_paths"]
+    assert sorted(path.rsplit(".", 1)[-1] for path in paths) == ["json", "pstats", "txt"]
+    assert all("_profiles/run_date=2025-01-02/20250102_030405_abc123_profile" in p for p in paths)
+
+    memory = json.loads(next(open(p).read() for p in paths if p.endswith(".json")))
+    assert [batch["model"] for batch in memory["batches"]] == [
+        "res.partner",
+        "res.partner",
+        "sale.order",
+        "sale.order",
+    ]
+    assert memory["peak_batch"]["peak_bytes"] > 0
+    assert memory["top_allocations"]
+    stats = marshal.loads(next(open(p, "rb").read() for p in paths if p.endswith(".pstats")))
+    assert any(func[2] == "_fake_extraction" for func in stats)
+    assert not tracemalloc.is_tracing()
+
+
+def test_model_profile_is_stopped_when_model_fails(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.delenv("ETL_PROFILE", raising=False)
+
+    with pytest.raises(RuntimeError):
+        _fake_extraction(models=["res.partner"], profile="model", fail=True)
+
+    reports = sorted(path.name for path in tmp_path.rglob("*_profile.*"))
+    assert reports == [
+        "20250102_030405_profile.json",
+        "20250102_030405_profile.pstats",
+        "20250102_030405_profile.txt",
+    ]
+    assert sys.getprofile() is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiling_disabled_by_default(monkeypatch) -> None:
+    monkeypatch.delenv("ETL_PROFILE", raising=False)
+
+    summary = _fake_extraction(models=["res.partner"])
+
+    assert "profile_paths" not in summary
+    assert not tracemalloc.is_tracing()
+
+
+def test_concurrent_profiled_runs_are_rejected(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.delenv("ETL_PROFILE", raising=False)
+    started, release = threading.Event(), threading.Event()
+
+    @profiling.profiled
+    def _blocking_extraction(*, profile=None):
+        started.set()
+        release.wait(5)
+        return {}
+
+    worker = threading.Thread(target=_blocking_extraction, kwargs={"profile": "run"})
+    worker.start()
+    try:
+        assert started.wait(5)
+        assert profiling.profiling_active()
+        with pytest.raises(profiling.ProfilingBusyError):
+            _fake_extraction(models=["res.partner"], profile="model")
+        assert _fake_extraction(models=["res.partner"]) == {"total_models": 1}
+    finally:
+        release.set()
+        worker.join()
+
+    assert not profiling.profiling_active()
+    assert "profile_paths" in _fake_extraction(models=["res.partner"], profile="run")
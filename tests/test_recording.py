@@ -0,0 +1,111 @@
+import gzip
+import importlib
+import json
+import xmlrpc.client
+
+import polars as pl
+import pytest
+
+from benchmarks.fake_odoo import FAKE_DB, FAKE_PASSWORD, FAKE_UID, FakeOdooServer, SyntheticModel
+from benchmarks.local_storage import _STORAGE_MODULES
+from benchmarks.run_benchmark import run_benchmark
+from src.odoo_extractor.connection import TimeoutTransport
+from src.odoo_extractor.recording import (
+    RecordingTransport,
+    ReplayTransport,
+    build_transport,
+    recorded_models,
+)
+
+
+@pytest.fixture
+def restore_storage_clients(monkeypatch):
+    for module_name in _STORAGE_MODULES:
+        monkeypatch.setattr(importlib.import_module(module_name), "_storage_client", None)
+    for name in ("ODOO_URL", "ODOO_DB", "ODOO_USERNAME", "ODOO_PASSWORD"):
+        monkeypatch.setenv(name, "")
+
+
+def _call(proxy, method, args, kwargs):
+    return proxy.execute_kw(FAKE_DB, FAKE_UID, FAKE_PASSWORD, "bench.rec", method, args, kwargs)
+
+
+def test_record_then_replay_without_server(tmp_path) -> None:
+    model = SyntheticModel("bench.rec", rows=4, width=5)
+    directory = str(tmp_path)
+
+    with FakeOdooServer([model]) as server:
+        proxy = xmlrpc.client.ServerProxy(
+            f"{server.url}/xmlrpc/2/object",
+            allow_none=True,
+            transport=RecordingTransport(directory, timeout=10),
+        )
+        fields = _call(proxy, "fields_get", [], {"attributes": ["type"]})
+        rows = _call(proxy, "search_read", [[]], {"fields": list(fields), "limit": 3})
+        with pytest.raises(xmlrpc.client.Fault):
+            _call(proxy, "search_read", [[]], {"fields": ["x_missing"]})
+
+    recordings = sorted(tmp_path.rglob("*.json.gz"))
+    assert len(recordings) == 3
+    for path in recordings:
+        content = gzip.decompress(path.read_bytes()).decode("utf-8")
+        assert FAKE_PASSWORD not in json.dumps(json.loads(content)["args"])
+        assert f"<string>{FAKE_PASSWORD}</string>" not in content
+    assert recorded_models(directory) == ["bench.rec"]
+
+    replay = xmlrpc.client.ServerProxy(
+        "http://127.0.0.1:9/xmlrpc/2/object",
+        allow_none=True,
+        transport=ReplayTransport(directory, timeout=10),
+    )
+    assert _call(replay, "fields_get", [], {"attributes": ["type"]}) == fields
+    assert _call(replay, "search_read", [[]], {"fields": list(fields), "limit": 3}) == rows
+    with pytest.raises(xmlrpc.client.Fault, match="Invalid field"):
+        _call(replay, "search_read", [[]], {"fields": ["x_missing"]})
+    with pytest.raises(xmlrpc.client.Fault, match="Gravação não encontrada"):
+        _call(replay, "search_read", [[]], {"fields": list(fields), "limit": 2})
+
+
+def test_extraction_replays_recorded_run(tmp_path, monkeypatch, restore_storage_clients) -> None:
+    models = [SyntheticModel("bench.rec", rows=120, width=8)]
+    recording_dir = str(tmp_path / "recordings")
+    monkeypatch.setenv("ODOO_RECORDING_DIR", recording_dir)
+
+    monkeypatch.setenv("ODOO_TRANSPORT_MODE", "record")
+    with FakeOdooServer(models) as server:
+        recorded = run_benchmark(
+            ["bench.rec"],
+            server_url=server.url,
+            storage_root=str(tmp_path / "live"),
+            batch_size=50,
+        )
+
+    monkeypatch.setenv("ODOO_TRANSPORT_MODE", "replay")
+    monkeypatch.setenv("ODOO_URL", "http://127.0.0.1:9")
+    replayed = run_benchmark(
+        recorded_models(recording_dir),
+        storage_root=str(tmp_path / "replay"),
+        batch_size=50,
+    )
+
+    assert recorded["rows"] == replayed["rows"] == 120
+    assert replayed["failed"] == 0
+    live = pl.read_parquet(sorted((tmp_path / "live").rglob("bench_rec/*.parquet")))
+    again = pl.read_parquet(sorted((tmp_path / "replay").rglob("bench_rec/*.parquet")))
+    assert live.drop("ingestion_ts").sort("id").equals(again.drop("ingestion_ts").sort("id"))
+
+
+def test_build_transport_by_env(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("ODOO_RECORDING_DIR", str(tmp_path))
+    monkeypatch.delenv("ODOO_TRANSPORT_MODE", raising=False)
+    assert type(build_transport(timeout=5)) is TimeoutTransport
+
+    monkeypatch.setenv("ODOO_TRANSPORT_MODE", "replay")
+    monkeypatch.setenv("ODOO_REPLAY_SPEED", "2")
+    transport = build_transport(timeout=5)
+    assert isinstance(transport, ReplayTransport)
+    assert transport.speed == 2.0 and transport.directory == str(tmp_path)
+
+    monkeypatch.setenv("ODOO_TRANSPORT_MODE", "tape")
+    with pytest.raises(ValueError):
+        build_transport(timeout=5)
@@ -0,0 +1,59 @@
+import time
+
+from app.engine.run_history import (
+    RUN_HISTORY_SCHEMA,
+    StageTimer,
+    build_history_record,
+    history_dataframe,
+    timed_iter,
+)
+
+
+def _slow_batches():
+    for size in (3, 2):
+        time.sleep(0.01)
+        yield list(range(size))
+
+
+def test_timed_iter_only_counts_waiting_time() -> None:
+    timer = StageTimer()
+
+    for _ in timed_iter(_slow_batches(), timer, "fetch"):
+        with timer.stage("encode"):
+            pass
+
+    stages = timer.as_dict()
+    assert stages["fetch"] >= 0.02
+    assert stages["encode"] < stages["fetch"]
+    assert stages["cursor"] == 0.0
+
+
+def test_history_record_matches_schema() -> None:
+    record = build_history_record(
+        run_id="abc",
+        run_timestamp="20250101_000000",
+        mode="inc",
+        result={
+            "model": "sale.order",
+            "status": "success",
+            "records_count": 5,
+            "file_paths": ["gs://bucket/a.parquet"],
+            "error": None,
+        },
+        started_at="2025-01-01T00:00:00+00:00",
+        duration_s=1.5,
+        stages=StageTimer().as_dict(),
+        rpc={"calls": 3, "retries": 1, "seconds": 0.75},
+        bytes_written=1024,
+        batch_size=2000,
+        batch_rows=[3, 2],
+    )
+
+    df = history_dataframe([record])
+
+    assert df.schema == RUN_HISTORY_SCHEMA
+    row = df.row(0, named=True)
+    assert row["rows"] == 5
+    assert row["files"] == 1
+    assert row["rpc_retries"] == 1
+    assert row["batch_rows_avg"] == 2.5
@@ -0,0 +1,61 @@
+import threading
+
+from app.engine.run_manager import ModelLocks, RunManager
+
+
+def test_model_locks_are_exclusive_per_owner() -> None:
+    locks = ModelLocks()
+
+    assert locks.acquire("sale.order", "run-a")
+    assert not locks.acquire("sale.order", "run-b")
+    assert locks.acquire("res.partner", "run-b")
+
+    locks.release("sale.order", "run-b")
+    assert locks.owner("sale.order") == "run-a"
+
+    locks.release("sale.order", "run-a")
+    assert locks.acquire("sale.order", "run-b")
+
+
+def test_run_manager_records_progress_and_summary() -> None:
+    release = threading.Event()
+
+    def runner(*, models, progress, model_locks, run_id, **kwargs):
+        progress("run_started", total=len(models))
+        for model in models:
+            assert model_locks.acquire(model, run_id)
+            progress("model_started", model=model)
+            release.wait(timeout=5)
+            progress("model_finished", model=model, status="success")
+            model_locks.release(model, run_id)
+        return {"total_models": len(models), "kwargs": kwargs}
+
+    manager = RunManager(runner=runner, max_workers=1)
+    record = manager.submit(kind="inc", models=["res.partner"], incremental=True)
+
+    assert manager.get(record.run_id) is record
+    release.set()
+    record.future.result(timeout=5)
+
+    status = record.to_dict()
+    assert status["status"] == "success"
+    assert status["models_total"] == 1
+    assert status["models_done"] == 1
+    assert status["summary"] == {"total_models": 1, "kwargs": {"incremental": True}}
+    events = [event["event"] for event in record.events_since(0)]
+    assert events == ["run_started", "model_started", "model_finished", "run_finished"]
+    assert [event["seq"] for event in record.events_since(2)] == [2, 3]
+    manager.shutdown()
+
+
+def test_run_manager_marks_failed_runs() -> None:
+    def runner(**kwargs):
+        raise RuntimeError("odoo indisponível")
+
+    manager = RunManager(runner=runner, max_workers=1)
+    record = manager.submit(kind="full", models=["res.partner"])
+    record.future.result(timeout=5)
+
+    assert record.status == "error"
+    assert record.error == "odoo indisponível"
+    manager.shutdown()
@@ -0,0 +1,177 @@
+import importlib
+import json
+from itertools import count
+
+import pytest
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from app.engine import run_pointer
+from app.engine.extractor import run_extraction
+from app.engine.run_pointer import RunPointerStore, needs_full_refresh, pointer_files, pointer_timestamps
+from benchmarks.fake_odoo import FAKE_DB, FAKE_LOGIN, FAKE_PASSWORD, FakeOdooServer, SyntheticModel
+from benchmarks.local_storage import _STORAGE_MODULES, install_local_storage
+
+_generations = count(1)
+
+
+class _FakeBlob:
+    def __init__(self, objects, name):
+        self._objects = objects
+        self.name = name
+        self.generation = objects[name][1] if name in objects else None
+
+    def download_as_text(self, encoding="utf-8", if_generation_match=None):
+        if self.name not in self._objects:
+            raise NotFound(self.name)
+        data, generation = self._objects[self.name]
+        if if_generation_match is not None and if_generation_match != generation:
+            raise PreconditionFailed(self.name)
+        return data
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        current = self._objects.get(self.name, (None, 0))[1]
+        if if_generation_match is not None and if_generation_match != current:
+            raise PreconditionFailed(self.name)
+        self.generation = next(_generations)
+        self._objects[self.name] = (data, self.generation)
+
+
+class _FakeBucket:
+    def __init__(self, objects):
+        self._objects = objects
+
+    def blob(self, name):
+        return _FakeBlob(self._objects, name)
+
+    def get_blob(self, name):
+        return _FakeBlob(self._objects, name) if name in self._objects else None
+
+
+class _FakeClient:
+    def __init__(self):
+        self.objects = {}
+
+    def bucket(self, name):
+        return _FakeBucket(self.objects)
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(run_pointer, "_storage_client", client)
+    return client
+
+
+def _publish(store, timestamp, mode):
+    return store.publish(
+        "sale.order",
+        run_timestamp=timestamp,
+        mode=mode,
+        files=[f"gs://b/{timestamp}_chunk0001.parquet"],
+        manifest=f"gs://b/{timestamp}_manifest.json",
+    )
+
+
+def test_full_then_incremental_pointer_contents(fake_gcs) -> None:
+    store = RunPointerStore()
+    _publish(store, "20260101_000000", "inc")
+    _publish(store, "20260102_000000", "full")
+    _publish(store, "20260102_010000", "inc")
+    pointer = _publish(store, "20260102_020000", "inc")
+
+    assert pointer["base"]["run_timestamp"] == "20260102_000000"
+    assert [run["run_timestamp"] for run in pointer["incremental"]] == [
+        "20260102_010000",
+        "20260102_020000",
+    ]
+    assert pointer_files(pointer) == [
+        "gs://b/20260102_000000_chunk0001.parquet",
+        "gs://b/20260102_010000_chunk0001.parquet",
+        "gs://b/20260102_020000_chunk0001.parquet",
+    ]
+    assert pointer_timestamps(pointer) == {"20260102_000000", "20260102_010000", "20260102_020000"}
+    assert store.load("sale.order") == pointer
+    assert json.loads(fake_gcs.objects["data-lake/odoo/sale_order/_CURRENT.json"][0]) == pointer
+
+
+def test_publish_retries_on_concurrent_writer(fake_gcs, monkeypatch) -> None:
+    store = RunPointerStore()
+    _publish(store, "20260102_000000", "full")
+    original_read = store._read
+    calls = []
+
+    def racing_read(model):
+        current = original_read(model)
+        if not calls:
+            # Outro task publica entre a leitura e a escrita deste.
+            _publish(RunPointerStore(), "20260102_010000", "inc")
+        calls.append(model)
+        return current
+
+    monkeypatch.setattr(store, "_read", racing_read)
+    pointer = _publish(store, "20260102_020000", "inc")
+
+    assert len(calls) == 2
+    assert [run["run_timestamp"] for run in pointer["incremental"]] == [
+        "20260102_010000",
+        "20260102_020000",
+    ]
+
+
+def test_publish_retries_when_pointer_changes_during_read(fake_gcs, monkeypatch) -> None:
+    store = RunPointerStore()
+    _publish(store, "20260102_000000", "full")
+    original_read = store._read
+    calls = []
+
+    def flaky_read(model):
+        calls.append(model)
+        if len(calls) == 1:
+            raise PreconditionFailed("_CURRENT.json")
+        return original_read(model)
+
+    monkeypatch.setattr(store, "_read", flaky_read)
+    pointer = _publish(store, "20260102_010000", "inc")
+
+    assert len(calls) == 2
+    assert pointer["base"]["run_timestamp"] == "20260102_000000"
+
+
+def test_needs_full_refresh_after_max_incremental_runs(monkeypatch) -> None:
+    monkeypatch.setenv("GCS_POINTER_MAX_INCREMENTAL", "2")
+    run = {"run_timestamp": "20260102_010000", "files": []}
+
+    assert not needs_full_refresh({"base": run, "incremental": [run]})
+    assert needs_full_refresh({"base": run, "incremental": [run, run]})
+
+
+def test_needs_full_refresh_without_base() -> None:
+    run = {"run_timestamp": "20260102_010000", "files": []}
+
+    assert needs_full_refresh(None)
+    assert needs_full_refresh({"base": None, "incremental": [run]})
+
+
+def test_incremental_run_falls_back_to_full_at_limit(tmp_path, monkeypatch) -> None:
+    for module_name in _STORAGE_MODULES:
+        monkeypatch.setattr(importlib.import_module(module_name), "_storage_client", None)
+    monkeypatch.setenv("GCS_POINTER_MAX_INCREMENTAL", "2")
+    monkeypatch.setenv("RUN_HISTORY", "0")
+    install_local_storage(str(tmp_path))
+
+    with FakeOdooServer([SyntheticModel("bench.inc", rows=3, width=2)]) as server:
+        for name, value in {
+            "ODOO_URL": server.url,
+            "ODOO_DB": FAKE_DB,
+            "ODOO_USERNAME": FAKE_LOGIN,
+            "ODOO_PASSWORD": FAKE_PASSWORD,
+        }.items():
+            monkeypatch.setenv(name, value)
+        pointers = []
+        for _ in range(4):
+            run_extraction(models=["bench.inc"], fields=None, limit=None, batch_size=10, incremental=True)
+            pointers.append(RunPointerStore().load("bench.inc"))
+
+    # Sem `_CURRENT`, o primeiro incremental vira full; o limite força outro.
+    assert [len(pointer["incremental"]) for pointer in pointers] == [0, 1, 2, 0]
+    assert [pointer["base"]["mode"] for pointer in pointers] == ["full"] * 4
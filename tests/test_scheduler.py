@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+from app.engine.scheduler import ChangeRateScheduler, is_due, update_entry
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_first_run_stays_hot_then_learns_rate() -> None:
+    entry = update_entry(None, rows=50_000, has_cursor=True, now=NOW)
+    assert entry["tier"] == "hot"
+    assert "rows_per_hour" not in entry
+
+    entry = update_entry(entry, rows=0, has_cursor=True, now=NOW + timedelta(hours=1))
+    assert entry["rows_per_hour"] == 0
+    assert entry["tier"] == "cold"
+
+    entry = update_entry(entry, rows=40, has_cursor=True, now=NOW + timedelta(hours=2))
+    assert entry["rows_per_hour"] == 20
+    assert entry["tier"] == "hot"
+
+
+def test_models_without_cursor_use_configured_tier(monkeypatch) -> None:
+    monkeypatch.setenv("SCHEDULER_NO_CURSOR_TIER", "cold")
+
+    entry = update_entry(None, rows=10_000, has_cursor=False, now=NOW)
+
+    assert entry["tier"] == "cold"
+
+
+def test_is_due_follows_tier_cadence(monkeypatch) -> None:
+    monkeypatch.setenv("SCHEDULER_WARM_MINUTES", "60")
+    warm = {"tier": "warm", "last_run_at": NOW.isoformat()}
+
+    assert is_due(None, NOW)
+    assert is_due({"tier": "hot", "last_run_at": NOW.isoformat()}, NOW)
+    assert not is_due(warm, NOW + timedelta(minutes=30))
+    # Invocações agendadas de hora em hora chegam alguns segundos adiantadas.
+    assert is_due(warm, NOW + timedelta(minutes=59))
+
+
+class _MemoryStore:
+    def __init__(self, state):
+        self.state = state
+
+    def load(self):
+        return dict(self.state)
+
+    def update(self, mutate):
+        mutate(self.state)
+
+
+def test_scheduler_filters_due_models_and_records_results() -> None:
+    store = _MemoryStore(
+        {
+            "res.country": {"tier": "cold", "last_run_at": NOW.isoformat()},
+            "sale.order": {"tier": "hot", "last_run_at": NOW.isoformat()},
+        }
+    )
+    scheduler = ChangeRateScheduler(store)
+    later = NOW + timedelta(minutes=10)
+
+    due = scheduler.due_models(["res.country", "sale.order", "new.model"], now=later)
+    assert due == ["sale.order", "new.model"]
+
+    scheduler.record_results(
+        [
+            {"model": "sale.order", "status": "success", "records_count": 100, "cursor_field": "write_date"},
+            {"model": "new.model", "status": "error", "records_count": 0, "cursor_field": None},
+        ],
+        now=later,
+    )
+    assert store.state["sale.order"]["last_run_at"] == later.isoformat()
+    assert store.state["sale.order"]["tier"] == "hot"
+    assert "new.model" not in store.state
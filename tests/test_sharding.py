@@ -0,0 +1,46 @@
+from app.engine import sharding
+from app.engine.sharding import estimate_model_weights, lpt_partition, select_task_models
+
+
+def test_lpt_partition_balances_work_not_model_count() -> None:
+    weights = {"big": 100.0, "a": 30.0, "b": 30.0, "c": 20.0, "d": 10.0, "e": 10.0}
+
+    groups = lpt_partition(weights, 2)
+
+    loads = sorted(sum(weights[model] for model in group) for group in groups)
+    assert loads == [100.0, 100.0]
+    assert ["big"] in groups
+    assert sorted(model for group in groups for model in group) == sorted(weights)
+
+
+def test_lpt_partition_is_deterministic() -> None:
+    weights = {f"model.{index}": float(index % 3) for index in range(20)}
+
+    assert lpt_partition(weights, 4) == lpt_partition(dict(reversed(weights.items())), 4)
+
+
+def test_estimate_model_weights_defaults_to_median(monkeypatch) -> None:
+    known = {"a": 10.0, "b": 30.0, "c": 50.0}
+    monkeypatch.setattr(sharding, "_model_weight", lambda store, model, mode: known.get(model))
+
+    weights = estimate_model_weights(["a", "b", "c", "new"], mode="full", pointer_store=object())
+
+    assert weights == {"a": 10.0, "b": 30.0, "c": 50.0, "new": 30.0}
+
+
+def test_select_task_models_uses_task_env(monkeypatch) -> None:
+    monkeypatch.setenv("CLOUD_RUN_TASK_COUNT", "2")
+    monkeypatch.delenv("CLOUD_RUN_EXECUTION", raising=False)
+    monkeypatch.setattr(
+        sharding,
+        "estimate_model_weights",
+        lambda models, mode: {"a": 5.0, "b": 3.0, "c": 2.0},
+    )
+
+    monkeypatch.setenv("CLOUD_RUN_TASK_INDEX", "0")
+    first = select_task_models(["a", "b", "c"], mode="inc")
+    monkeypatch.setenv("CLOUD_RUN_TASK_INDEX", "1")
+    second = select_task_models(["a", "b", "c"], mode="inc")
+
+    assert first == ["a"]
+    assert second == ["b", "c"]
@@ -0,0 +1,154 @@
+import io
+
+import polars as pl
+import pyarrow.parquet as pq
+
+import src.storage as storage
+
+
+def test_parquet_chunk_writer_rolls_over_at_target_size(monkeypatch) -> None:
+    uploaded = {}
+
+    def fake_upload(object_name: str, buffer: io.BytesIO) -> str:
+        uploaded[object_name] = buffer.getvalue()
+        return f"gs://bucket/{object_name}"
+
+    monkeypatch.setattr(storage, "_upload_parquet_buffer", fake_upload)
+
+    writer = storage.ParquetChunkWriter(
+        "sale.order",
+        object_timestamp="20260101_000000",
+        profile=storage.ParquetWriterProfile(name="test", row_group_size=1000),
+        target_bytes=2_000,
+    )
+    for batch in range(20):
+        writer.write(pl.DataFrame({"id": [f"{batch}-{row}" for row in range(500)]}))
+
+    paths = writer.close()
+
+    assert len(paths) > 1
+    assert paths[0].endswith("sale_order/20260101_000000_chunk0001.parquet")
+    total_rows = sum(
+        pq.ParquetFile(io.BytesIO(payload)).metadata.num_rows
+        for payload in uploaded.values()
+    )
+    assert total_rows == 10_000
+
+
+def test_parquet_chunk_writer_keeps_chunk_order_with_upload_pool(monkeypatch) -> None:
+    import random
+    import time
+
+    def slow_upload(object_name: str, buffer: io.BytesIO) -> str:
+        time.sleep(random.uniform(0, 0.02))
+        return f"gs://bucket/{object_name}"
+
+    monkeypatch.setattr(storage, "_upload_parquet_buffer", slow_upload)
+
+    pool = storage.UploadPool(max_in_flight=3)
+    writer = storage.ParquetChunkWriter(
+        "sale.order",
+        object_timestamp="20260101_000000",
+        profile=storage.ParquetWriterProfile(name="test", row_group_size=500),
+        target_bytes=1,
+        upload_pool=pool,
+    )
+    for batch in range(8):
+        writer.write(pl.DataFrame({"id": [f"{batch}-{row}" for row in range(500)]}))
+
+    paths = writer.close()
+    pool.shutdown()
+
+    assert [path.rsplit("_", 1)[-1] for path in paths] == [
+        f"chunk{index:04d}.parquet" for index in range(1, 9)
+    ]
+
+
+def test_parquet_chunk_writer_manifest_tracks_rows_bytes_and_bounds(monkeypatch) -> None:
+    monkeypatch.setattr(
+        storage,
+        "_upload_parquet_buffer",
+        lambda object_name, buffer: f"gs://bucket/{object_name}",
+    )
+
+    writer = storage.ParquetChunkWriter(
+        "sale.order",
+        object_timestamp="20260101_000000",
+        profile=storage.ParquetWriterProfile(name="test", row_group_size=2),
+        target_bytes=1,
+    )
+    writer.write(
+        pl.DataFrame({"id": ["9", "10"], "write_date": ["2026-01-02 00:00:00", None]})
+    )
+    writer.write(pl.DataFrame({"id": ["3"], "write_date": ["2026-01-01 00:00:00"]}))
+    writer.close()
+
+    manifest = writer.manifest(mode="inc")
+
+    assert manifest["mode"] == "inc"
+    assert manifest["records_count"] == 3
+    assert [chunk["rows"] for chunk in manifest["chunks"]] == [2, 1]
+    assert all(chunk["bytes"] > 0 and chunk["uri"] for chunk in manifest["chunks"])
+    assert manifest["bounds"]["id"] == {"min": 3, "max": 10}
+    assert manifest["bounds"]["write_date"] == {
+        "min": "2026-01-01 00:00:00",
+        "max": "2026-01-02 00:00:00",
+    }
+    assert manifest["schema_fingerprint"]
+    assert manifest["columns"]["id"]["approx_distinct"] == 3
+    assert manifest["profile_seconds"] > 0
+
+
+def test_parquet_chunk_writer_profiles_without_distinct(monkeypatch) -> None:
+    monkeypatch.setenv("PARQUET_COLUMN_DISTINCT", "0")
+    monkeypatch.setattr(
+        storage,
+        "_upload_parquet_buffer",
+        lambda object_name, buffer: f"gs://bucket/{object_name}",
+    )
+
+    writer = storage.ParquetChunkWriter(
+        "sale.order",
+        object_timestamp="20260101_000000",
+        fields_metadata={"amount": {"type": "monetary"}, "name": {"type": "char"}},
+    )
+    writer.write(pl.DataFrame({"id": ["9", "10"], "amount": ["9.5", "10.25"], "name": ["9", "10"]}))
+    writer.close()
+
+    manifest = writer.manifest(mode="full")
+    columns = manifest["columns"]
+    assert (columns["id"]["min"], columns["id"]["max"]) == (9, 10)
+    assert (columns["id"]["min"], columns["id"]["max"]) == tuple(manifest["bounds"]["id"].values())
+    assert (columns["amount"]["min"], columns["amount"]["max"]) == (9.5, 10.25)
+    assert (columns["name"]["min"], columns["name"]["max"]) == ("10", "9")
+    assert columns["id"]["approx_distinct"] is None
+
+
+def test_parquet_chunk_writer_categorical_batches_are_readable(monkeypatch) -> None:
+    uploaded = {}
+
+    def fake_upload(object_name: str, buffer: io.BytesIO) -> str:
+        uploaded[object_name] = buffer.getvalue()
+        return f"gs://bucket/{object_name}"
+
+    monkeypatch.setattr(storage, "_upload_parquet_buffer", fake_upload)
+
+    writer = storage.ParquetChunkWriter(
+        "sale.order",
+        object_timestamp="20260101_000000",
+        profile=storage.ParquetWriterProfile(name="test"),
+    )
+    for values in (["draft", "sale", None], ["cancel", "draft"], ["done", None]):
+        writer.write(
+            pl.DataFrame({"id": ["1"] * len(values), "state": values}).with_columns(
+                pl.col("state").cast(pl.Categorical)
+            )
+        )
+    writer.close()
+
+    (payload,) = uploaded.values()
+    df = pl.read_parquet(io.BytesIO(payload))
+    assert df["state"].dtype == pl.Categorical
+    assert df["state"].cast(pl.Utf8).to_list() == [
+        "draft", "sale", None, "cancel", "draft", "done", None,
+    ]
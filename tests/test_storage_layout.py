@@ -0,0 +1,20 @@
+from src.storage import _build_object_name
+
+
+def test_build_object_name_flat_layout_by_default(monkeypatch) -> None:
+    monkeypatch.delenv("GCS_PARTITIONED_LAYOUT", raising=False)
+
+    name = _build_object_name("sale.order", "20260306_180846", "chunk0001", mode="inc")
+
+    assert name == "data-lake/odoo/sale_order/20260306_180846_chunk0001.parquet"
+
+
+def test_build_object_name_partitioned_layout(monkeypatch) -> None:
+    monkeypatch.setenv("GCS_PARTITIONED_LAYOUT", "1")
+
+    name = _build_object_name("sale.order", "20260306_180846", "chunk0001", mode="inc")
+
+    assert name == (
+        "data-lake/odoo/sale_order/run_date=2026-03-06/mode=inc/"
+        "20260306_180846_chunk0001.parquet"
+    )
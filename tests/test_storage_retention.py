@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import src.storage as storage
+
+_OLD = datetime.now(timezone.utc) - timedelta(days=3)
+_PREFIX = "data-lake/odoo/sale_order/"
+
+
+class _FakeBlob:
+    def __init__(self, objects, name, time_created=None):
+        self._objects = objects
+        self.name = name
+        self.time_created = time_created
+
+    def delete(self):
+        del self._objects[self.name]
+
+
+class _FakeClient:
+    def __init__(self, created):
+        self.objects = dict(created)
+
+    def list_blobs(self, bucket_name, prefix=None):
+        return [
+            _FakeBlob(self.objects, name, created)
+            for name, created in sorted(self.objects.items())
+            if name.startswith(prefix or "")
+        ]
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch):
+    def install(files):
+        client = _FakeClient({f"{_PREFIX}{name}": created for name, created in files.items()})
+        monkeypatch.setattr(storage, "_storage_client", client)
+        return client
+
+    return install
+
+
+def test_collect_old_runs_keeps_published_pending_recent_and_internal(fake_gcs) -> None:
+    recent = datetime.now(timezone.utc) - timedelta(hours=1)
+    client = fake_gcs(
+        {
+            "_CURRENT.json": _OLD,
+            "20260101_000000_chunk0001.parquet": _OLD,
+            "20260101_000000_manifest.json": _OLD,
+            "20260102_000000_chunk0001.parquet": _OLD,
+            "20260103_000000_chunk0001.parquet": _OLD,
+            "20260104_000000_chunk0001.parquet": recent,
+            "run_date=2026-01-01/mode=inc/20260101_120000_chunk0001.parquet": _OLD,
+            "20260105_000000_chunk0001.parquet": _OLD,
+        }
+    )
+
+    deleted = storage.collect_old_runs(
+        "sale.order",
+        keep_timestamps={"20260103_000000"},
+        min_timestamp="20260105_000000",
+        retention_hours=24,
+    )
+
+    assert deleted == 4
+    assert sorted(name.removeprefix(_PREFIX) for name in client.objects) == [
+        "20260103_000000_chunk0001.parquet",
+        "20260104_000000_chunk0001.parquet",
+        "20260105_000000_chunk0001.parquet",
+        "_CURRENT.json",
+    ]
+
+
+def test_collect_old_runs_uses_retention_env(fake_gcs, monkeypatch) -> None:
+    monkeypatch.setenv("GCS_RETENTION_HOURS", "100")
+    client = fake_gcs({"20260101_000000_chunk0001.parquet": _OLD})
+
+    assert storage.collect_old_runs("sale.order", keep_timestamps=[]) == 0
+    assert len(client.objects) == 1
+
+
+def test_collect_old_runs_does_not_touch_other_models(fake_gcs) -> None:
+    client = fake_gcs({"20260101_000000_chunk0001.parquet": _OLD})
+    client.objects["data-lake/odoo/sale_order__order_line/20260101_000000_chunk0001.parquet"] = _OLD
+
+    storage.collect_old_runs("sale.order", keep_timestamps=[], retention_hours=0)
+
+    assert list(client.objects) == [
+        "data-lake/odoo/sale_order__order_line/20260101_000000_chunk0001.parquet"
+    ]
@@ -0,0 +1,96 @@
+import io
+import threading
+
+import pytest
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+
+import src.storage as storage
+
+
+class _FlakyBlob:
+    """Blob que falha nas primeiras `failures` chamadas."""
+
+    def __init__(self, name, failures=0, error=ServiceUnavailable):
+        self.name = name
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.payloads = []
+        self._lock = threading.Lock()
+
+    def _attempt(self):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise self.error(self.name)
+
+    def delete(self):
+        self._attempt()
+
+    def upload_from_file(self, file_obj, rewind=False, size=None, content_type=None):
+        if rewind:
+            file_obj.seek(0)
+        payload = file_obj.read(size)
+        self._attempt()
+        self.payloads.append(payload)
+
+
+class _Client:
+    def __init__(self, blobs):
+        self.blobs = {blob.name: blob for blob in blobs}
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return self.blobs[name]
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(storage.time, "sleep", lambda seconds: None)
+
+
+def test_delete_blobs_retries_and_tolerates_missing_objects(monkeypatch) -> None:
+    monkeypatch.setenv("GCS_DELETE_WORKERS", "4")
+    blobs = [
+        _FlakyBlob("ok"),
+        _FlakyBlob("flaky", failures=1),
+        _FlakyBlob("gone", failures=1, error=NotFound),
+        _FlakyBlob("broken", failures=99),
+    ]
+
+    deleted = storage._delete_blobs("sale.order", blobs)
+
+    assert deleted == 3
+    assert [blob.calls for blob in blobs] == [1, 2, 1, storage._DELETE_ATTEMPTS]
+
+
+def test_delete_blobs_without_objects() -> None:
+    assert storage._delete_blobs("sale.order", []) == 0
+
+
+def test_upload_parquet_buffer_retries_with_full_payload(monkeypatch) -> None:
+    blob = _FlakyBlob("data-lake/odoo/a.parquet", failures=1)
+    monkeypatch.setattr(storage, "_storage_client", _Client([blob]))
+    buffer = io.BytesIO(b"PAR1-data")
+    buffer.seek(4)
+
+    uri = storage._upload_parquet_buffer(blob.name, buffer)
+
+    assert uri == f"gs://gobrax-data-lake/{blob.name}"
+    assert blob.calls == 2
+    assert blob.payloads == [b"PAR1-data"]
+    assert buffer.closed
+
+
+def test_upload_parquet_buffer_raises_after_last_attempt(monkeypatch) -> None:
+    blob = _FlakyBlob("data-lake/odoo/a.parquet", failures=99)
+    monkeypatch.setattr(storage, "_storage_client", _Client([blob]))
+    buffer = io.BytesIO(b"PAR1")
+
+    with pytest.raises(ServiceUnavailable):
+        storage._upload_parquet_buffer(blob.name, buffer)
+
+    assert blob.calls == storage._UPLOAD_ATTEMPTS
+    assert buffer.closed
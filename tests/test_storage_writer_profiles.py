@@ -0,0 +1,91 @@
+import io
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from parquet_analysis.benchmark_writer_profiles import encode_with_writer
+from src.storage import WRITER_PROFILES, ParquetWriterProfile, resolve_writer_profile
+
+
+def test_resolve_writer_profile_uses_deployment_default(monkeypatch) -> None:
+    monkeypatch.delenv("PARQUET_WRITER_PROFILE", raising=False)
+    monkeypatch.delenv("PARQUET_WRITER_PROFILE_OVERRIDES", raising=False)
+    assert resolve_writer_profile("sale.order").name == "default"
+
+    monkeypatch.setenv("PARQUET_WRITER_PROFILE", " Balanced ")
+    assert resolve_writer_profile("sale.order").name == "balanced"
+
+
+def test_resolve_writer_profile_applies_model_overrides(monkeypatch) -> None:
+    monkeypatch.setenv("PARQUET_WRITER_PROFILE", "fast")
+    monkeypatch.setenv(
+        "PARQUET_WRITER_PROFILE_OVERRIDES",
+        "account.move=COMPACT, mail.message = balanced,broken,=fast,res.partner=",
+    )
+
+    assert resolve_writer_profile("account.move").name == "compact"
+    assert resolve_writer_profile("mail.message").name == "balanced"
+    assert resolve_writer_profile("res.partner").name == "fast"
+    # Sem model (ex.: histórico), os overrides não se aplicam.
+    assert resolve_writer_profile().name == "fast"
+
+
+def test_resolve_writer_profile_falls_back_on_unknown_name(monkeypatch) -> None:
+    monkeypatch.setenv("PARQUET_WRITER_PROFILE", "turbo")
+    monkeypatch.setenv("PARQUET_WRITER_PROFILE_OVERRIDES", "sale.order=nope")
+
+    assert resolve_writer_profile().name == "default"
+    assert resolve_writer_profile("sale.order").name == "default"
+
+
+def test_arrow_writer_options_map_profile_fields() -> None:
+    assert WRITER_PROFILES["default"].arrow_writer_options() == {
+        "compression": "zstd",
+        "write_statistics": True,
+        "compression_level": 3,
+    }
+    assert WRITER_PROFILES["compact"].arrow_writer_options() == {
+        "compression": "zstd",
+        "write_statistics": True,
+        "compression_level": 19,
+        "data_page_size": 1024 * 1024,
+    }
+    no_stats = ParquetWriterProfile(name="x", compression="lz4", statistics=False)
+    assert no_stats.arrow_writer_options() == {"compression": "lz4", "write_statistics": False}
+
+
+def test_arrow_writer_options_control_footer_statistics() -> None:
+    table = pa.table({"id": ["1", "2", "3"]})
+
+    def column_stats(profile: ParquetWriterProfile):
+        buffer = io.BytesIO()
+        with pq.ParquetWriter(buffer, table.schema, **profile.arrow_writer_options()) as writer:
+            writer.write_table(table)
+        metadata = pq.ParquetFile(io.BytesIO(buffer.getvalue())).metadata
+        return metadata.row_group(0).column(0).statistics
+
+    stats = column_stats(WRITER_PROFILES["balanced"])
+    assert (stats.min, stats.max, stats.null_count) == ("1", "3", 0)
+    assert column_stats(ParquetWriterProfile(name="x", statistics=False)) is None
+
+
+def test_write_options_are_accepted_by_polars() -> None:
+    df = pl.DataFrame({"id": ["1", "2"]})
+    for profile in WRITER_PROFILES.values():
+        buffer = io.BytesIO()
+        df.write_parquet(buffer, **profile.write_options())
+        assert pl.read_parquet(io.BytesIO(buffer.getvalue())).equals(df)
+
+
+def test_benchmark_encodes_through_the_chunk_writer() -> None:
+    df = pl.DataFrame({"id": [str(index) for index in range(5000)], "write_date": ["2026-01-01"] * 5000})
+
+    payloads = encode_with_writer(df, WRITER_PROFILES["fast"], batch_size=1000)
+
+    assert len(payloads) == 1
+    parquet_file = pq.ParquetFile(io.BytesIO(payloads[0]))
+    column = parquet_file.metadata.row_group(0).column(0)
+    assert column.compression == "LZ4"
+    assert column.statistics.has_min_max
+    assert pl.read_parquet(io.BytesIO(payloads[0])).drop("ingestion_ts").equals(df)
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import tracing
+
+
+@pytest.fixture(autouse=True)
+def _reset_tracing():
+    tracing.shutdown_tracing()
+    yield
+    tracing.shutdown_tracing()
+
+
+def test_spans_are_noop_without_exporter(monkeypatch) -> None:
+    monkeypatch.delenv("TRACING_EXPORTER", raising=False)
+
+    with tracing.span("batch", rows=10) as current:
+        current.set_attribute("columns", 3)
+    handle = tracing.start_span("model", model="res.partner")
+    handle.end(error="boom", rows=0)
+
+    assert tracing.enabled() is False
+    assert tracing.bind_context(len) is len
+
+
+def test_unknown_exporter_disables_tracing(monkeypatch) -> None:
+    monkeypatch.setenv("TRACING_EXPORTER", "zipkin")
+
+    assert tracing.enabled() is False
+
+
+def test_span_tree_crosses_upload_threads() -> None:
+    in_memory = pytest.importorskip("opentelemetry.sdk.trace.export.in_memory_span_exporter")
+    exporter = in_memory.InMemorySpanExporter()
+    assert tracing.configure_tracing(exporter, batch=False)
+
+    @tracing.traced("run_extraction")
+    def run() -> None:
+        model_span = tracing.start_span("model", model="res.partner")
+        with tracing.span("batch", rows=2, skipped=None):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+
+                def upload() -> None:
+                    with tracing.span("gcs_upload", bytes=42):
+                        pass
+
+                executor.submit(tracing.bind_context(upload)).result()
+        model_span.end(error="falhou", rows=2)
+
+    run()
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert set(spans) == {"run_extraction", "model", "batch", "gcs_upload"}
+    assert spans["model"].parent.span_id == spans["run_extraction"].context.span_id
+    assert spans["batch"].parent.span_id == spans["model"].context.span_id
+    assert spans["gcs_upload"].parent.span_id == spans["batch"].context.span_id
+    assert dict(spans["batch"].attributes) == {"rows": 2}
+    assert spans["gcs_upload"].attributes["bytes"] == 42
+    assert not spans["model"].status.is_ok
@@ -0,0 +1,25 @@
+import polars as pl
+
+from src.utils import encode_dictionary_columns
+
+
+def test_encode_dictionary_columns_only_selection() -> None:
+    df = pl.DataFrame(
+        {
+            "state": ["draft", "posted", "draft"],
+            "partner_id": ["7", "7", "9"],
+            "name": ["A", "B", "C"],
+        }
+    )
+    metadata = {
+        "state": {"type": "selection"},
+        "partner_id": {"type": "many2one"},
+        "name": {"type": "char"},
+    }
+
+    out = encode_dictionary_columns(df, metadata)
+
+    assert out.schema["state"] == pl.Categorical
+    assert out.schema["partner_id"] == pl.Utf8
+    assert out.schema["name"] == pl.Utf8
+    assert out["state"].cast(pl.Utf8).to_list() == ["draft", "posted", "draft"]
@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+import src.storage as storage
+from src.utils import offload_large_values
+
+
+def test_offload_large_values_replaces_payloads_over_threshold() -> None:
+    records = [
+        {"id": 1, "body": "<p>curto</p>", "datas": "A" * 20},
+        {"id": 2, "body": False, "datas": "A" * 20},
+    ]
+    metadata = {
+        "id": {"type": "integer"},
+        "body": {"type": "html"},
+        "datas": {"type": "binary"},
+    }
+    stored = []
+
+    def store(payload: bytes, digest: str, field_type: str) -> str:
+        stored.append((digest, field_type))
+        return f"gs://bucket/_blobs/{digest}"
+
+    offloaded = offload_large_values(
+        records,
+        metadata,
+        {"binary": 10, "html": 100},
+        store,
+    )
+
+    assert offloaded == 2
+    assert len(stored) == 1
+    assert records[0]["datas"] == records[1]["datas"] == f"gs://bucket/_blobs/{stored[0][0]}"
+    assert records[0]["datas__bytes"] == 20
+    assert records[0]["datas__offloaded"] == 1
+    assert records[0]["body"] == "<p>curto</p>"
+    assert records[0]["body__bytes"] == 12
+    assert records[0]["body__offloaded"] == 0
+    assert records[1]["body__bytes"] is None
+    assert records[1]["body__offloaded"] is None
+
+
+def test_payload_offloader_uploads_in_background_once_per_run(monkeypatch) -> None:
+    uploaded = []
+    release = threading.Event()
+
+    def fake_save(payload: bytes, digest: str, field_type: str) -> str:
+        release.wait(5)
+        uploaded.append(digest)
+        return f"gs://bucket/{digest}"
+
+    monkeypatch.setattr(storage, "save_payload_to_gcs", fake_save)
+    metadata = {"id": {"type": "integer"}, "datas": {"type": "binary"}}
+    pool = storage.UploadPool(max_in_flight=2)
+    known = {}
+
+    first = storage.PayloadOffloader(pool, known)
+    batch = [{"id": 1, "datas": "A" * 20}, {"id": 2, "datas": "B" * 20}]
+    # Retorna antes do upload terminar: o fetch não espera o GCS.
+    assert offload_large_values(batch, metadata, {"binary": 10}, first) == 2
+    release.set()
+    assert first.wait() == 2
+
+    second = storage.PayloadOffloader(pool, known)
+    repeated = [{"id": 3, "datas": "A" * 20}]
+    offload_large_values(repeated, metadata, {"binary": 10}, second)
+    pool.shutdown()
+
+    assert second.wait() == 0
+    assert sorted(uploaded) == sorted(known)
+    assert repeated[0]["datas"] == batch[0]["datas"]
+    assert batch[0]["datas"].startswith("gs://gobrax-data-lake/data-lake/odoo/_blobs/")
+
+
+def test_payload_offloader_forgets_failed_digests(monkeypatch) -> None:
+    def failing_save(payload: bytes, digest: str, field_type: str) -> str:
+        raise RuntimeError("gcs indisponível")
+
+    monkeypatch.setattr(storage, "save_payload_to_gcs", failing_save)
+    pool = storage.UploadPool(max_in_flight=1)
+    known = {}
+    offloader = storage.PayloadOffloader(pool, known)
+
+    offloader(b"payload", "abc123", "binary")
+    with pytest.raises(RuntimeError):
+        offloader.wait()
+    pool.shutdown()
+
+    assert known == {}
+
+
+def test_payload_pool_is_not_blocked_by_parquet_uploads(monkeypatch) -> None:
+    release = threading.Event()
+    monkeypatch.setenv("GCS_PAYLOAD_UPLOADS_IN_FLIGHT", "4")
+    monkeypatch.setattr(storage, "save_payload_to_gcs", lambda payload, digest, field_type: digest)
+    parquet_pool = storage.UploadPool(max_in_flight=1)
+    # O único slot dos Parquets fica ocupado por um upload lento.
+    parquet_pool.submit_call(lambda: release.wait(5) and "chunk")
+
+    payload_pool = storage.payload_upload_pool()
+    offloader = storage.PayloadOffloader(payload_pool)
+    for index in range(4):
+        offloader(b"x", f"digest{index}", "binary")
+
+    assert payload_pool.max_in_flight == 4
+    assert offloader.wait() == 4
+    release.set()
+    parquet_pool.shutdown()
+    payload_pool.shutdown()
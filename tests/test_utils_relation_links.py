@@ -0,0 +1,29 @@
+from src.utils import build_relation_link_frames, sanitize_records
+
+
+def test_build_relation_link_frames_explodes_pairs() -> None:
+    records = [
+        {"id": 1, "tag_ids": [10, 11]},
+        {"id": 2, "tag_ids": []},
+        {"id": 3, "tag_ids": False},
+        {"id": 4, "tag_ids": [12]},
+    ]
+
+    frames = build_relation_link_frames(records, ["tag_ids"])
+
+    assert frames["tag_ids"].rows() == [
+        ("1", "10"),
+        ("1", "11"),
+        ("2", None),
+        ("3", None),
+        ("4", "12"),
+    ]
+
+
+def test_sanitize_records_keeps_relation_count_when_exploding() -> None:
+    records = [{"id": 1, "tag_ids": [10, 11]}, {"id": 2, "tag_ids": False}]
+    metadata = {"id": {"type": "integer"}, "tag_ids": {"type": "many2many"}}
+
+    out = sanitize_records(records, metadata, explode_relations=True)
+
+    assert [row["tag_ids"] for row in out] == ["2", "0"]
@@ -0,0 +1,182 @@
+import importlib
+import json
+from itertools import count
+
+import pytest
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from app.engine import work_queue
+from app.engine.extractor import run_extraction
+from app.engine.work_queue import LeaseQueue
+from benchmarks.fake_odoo import FAKE_DB, FAKE_LOGIN, FAKE_PASSWORD, FakeOdooServer, SyntheticModel
+from benchmarks.local_storage import _STORAGE_MODULES, install_local_storage
+
+_generations = count(1)
+
+
+class _FakeBlob:
+    def __init__(self, objects, name):
+        self._objects = objects
+        self.name = name
+        self.generation = objects[name][1] if name in objects else None
+
+    def download_as_text(self, encoding="utf-8", if_generation_match=None):
+        if self.name not in self._objects:
+            raise NotFound(self.name)
+        data, generation = self._objects[self.name]
+        if if_generation_match is not None and if_generation_match != generation:
+            raise PreconditionFailed(self.name)
+        return data
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        current = self._objects.get(self.name, (None, 0))[1]
+        if if_generation_match is not None and if_generation_match != current:
+            raise PreconditionFailed(self.name)
+        self.generation = next(_generations)
+        self._objects[self.name] = (data, self.generation)
+
+    def delete(self, if_generation_match=None):
+        if self.name not in self._objects:
+            raise NotFound(self.name)
+        if if_generation_match is not None and if_generation_match != self._objects[self.name][1]:
+            raise PreconditionFailed(self.name)
+        del self._objects[self.name]
+
+
+class _FakeBucket:
+    def __init__(self, objects):
+        self._objects = objects
+
+    def blob(self, name):
+        return _FakeBlob(self._objects, name)
+
+    def get_blob(self, name):
+        return _FakeBlob(self._objects, name) if name in self._objects else None
+
+
+class _FakeClient:
+    def __init__(self):
+        self.objects = {}
+
+    def bucket(self, name):
+        return _FakeBucket(self.objects)
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(work_queue, "_storage_client", client)
+    return client
+
+
+def _drain(queue, success=True):
+    """Consome a fila reportando o mesmo resultado para todos os models."""
+    processed = []
+    for model in queue:
+        processed.append(model)
+        queue.finish(model, success=success)
+    return processed
+
+
+def test_tasks_share_models_without_overlap(fake_gcs) -> None:
+    models = ["a", "b", "c", "d"]
+    first_queue = LeaseQueue("exec-1", models, owner="task-0")
+    second_queue = LeaseQueue("exec-1", models, owner="task-1")
+    first = first_queue.iter_models()
+    second = second_queue.iter_models()
+
+    processed = []
+    for queue, iterator in ((first_queue, first), (second_queue, second)) * 2:
+        processed.append(next(iterator))
+        queue.finish(processed[-1], success=True)
+
+    assert processed == ["a", "b", "c", "d"]
+    assert list(first) == []
+    assert list(second) == []
+
+
+def test_failed_model_returns_to_the_queue(fake_gcs) -> None:
+    assert _drain(LeaseQueue("exec-1", ["a", "b"], owner="task-0"), success=False) == ["a", "b"]
+
+    retry = LeaseQueue("exec-1", ["a", "b"], owner="task-1")
+    assert _drain(retry) == ["a", "b"]
+    assert _drain(LeaseQueue("exec-1", ["a", "b"], owner="task-2")) == []
+
+
+def test_unreported_model_is_not_completed(fake_gcs) -> None:
+    queue = LeaseQueue("exec-1", ["a", "b"], owner="task-0")
+
+    # Pedir o próximo sem reportar `a` não o conclui.
+    assert list(queue) == ["a", "b"]
+
+    assert LeaseQueue("exec-1", ["a"], owner="task-1").try_claim("a") is True
+
+
+def test_expired_lease_is_taken_over(fake_gcs, monkeypatch) -> None:
+    crashed = LeaseQueue("exec-1", ["a"], owner="task-0", lease_seconds=1)
+    assert crashed.try_claim("a") is True
+
+    survivor = LeaseQueue("exec-1", ["a"], owner="task-1")
+    assert survivor.try_claim("a") is None
+
+    later = work_queue.time.time() + 5
+    monkeypatch.setattr(work_queue.time, "time", lambda: later)
+    assert _drain(survivor) == ["a"]
+
+    assert LeaseQueue("exec-1", ["a"], owner="task-2").try_claim("a") is False
+
+
+def test_interrupted_model_is_released(fake_gcs) -> None:
+    queue = LeaseQueue("exec-1", ["a", "b"], owner="task-0")
+    iterator = queue.iter_models()
+    assert next(iterator) == "a"
+
+    iterator.close()
+
+    assert LeaseQueue("exec-1", ["a"], owner="task-1").try_claim("a") is True
+
+
+def test_done_leases_expire_so_queue_id_can_be_reused(fake_gcs, monkeypatch) -> None:
+    assert _drain(LeaseQueue("daily", ["a", "b"], owner="run-1", done_seconds=60)) == ["a", "b"]
+    assert _drain(LeaseQueue("daily", ["a", "b"], owner="run-2")) == []
+
+    later = work_queue.time.time() + 61
+    monkeypatch.setattr(work_queue.time, "time", lambda: later)
+
+    assert _drain(LeaseQueue("daily", ["a", "b"], owner="run-3")) == ["a", "b"]
+
+
+def test_extraction_completes_only_successful_models(tmp_path, monkeypatch) -> None:
+    for module_name in _STORAGE_MODULES:
+        monkeypatch.setattr(importlib.import_module(module_name), "_storage_client", None)
+    monkeypatch.setenv("RUN_HISTORY", "0")
+    storage_client = install_local_storage(str(tmp_path))
+
+    with FakeOdooServer([SyntheticModel("bench.ok", rows=3, width=2)]) as server:
+        for name, value in {
+            "ODOO_URL": server.url,
+            "ODOO_DB": FAKE_DB,
+            "ODOO_USERNAME": FAKE_LOGIN,
+            "ODOO_PASSWORD": FAKE_PASSWORD,
+        }.items():
+            monkeypatch.setenv(name, value)
+        summary = run_extraction(
+            models=["bench.ok", "bench.missing"],
+            fields=None,
+            limit=None,
+            batch_size=10,
+            incremental=False,
+            run_id="run-1",
+            queue="api-queue",
+        )
+
+    assert [result["status"] for result in summary["results"]] == ["success", "error"]
+    lease_path = storage_client.path_for_uri(
+        "gs://gobrax-data-lake/data-lake/odoo/_leases/api-queue/bench_ok.json"
+    )
+    with open(lease_path, encoding="utf-8") as handle:
+        lease = json.load(handle)
+    assert lease["state"] == "done"
+    assert lease["owner"].endswith("/run-1")
+    # O model com erro volta para a fila.
+    assert LeaseQueue("api-queue", ["bench.missing"], owner="other").try_claim("bench.missing") is True